@@ -0,0 +1,158 @@
+"""Debounced tack alarm for the pífano.
+
+The raw rule of pifano2.py — sound while the ETA after a virtual tack beats
+the current ETA — flips on every fix when the two ETAs are close. ``TackAlarm``
+adds:
+
+* hysteresis: switch on when tacking gains more than ``margin_on`` minutes,
+  off only when the gain drops below ``margin_off``;
+* dwell: stay at least ``min_dwell`` seconds in a state once switched;
+* rate limit: at most ``max_toggles`` switches per ``window`` seconds.
+
+A non-finite ETA (no VMG) counts as "no gain", like the original rule.
+
+``replay`` runs recorded tracks through several settings and reports how
+often each one toggles, on the ETAs the page computes (``alarm_inputs``):
+
+    python alarm.py tracks/20261017-140200-3fa2c1 --wp 42.5521,-8.9403
+    python alarm.py --synthetic 3
+"""
+import argparse
+from collections import deque
+
+import numpy as np
+
+from track import read_track
+
+MARGIN_ON = 0.3     # minutes of gain to switch on
+MARGIN_OFF = 0.0    # switch off below this gain
+MIN_DWELL = 10.0    # seconds
+MAX_TOGGLES = 6     # per WINDOW
+WINDOW = 60.0       # seconds
+
+RAW = dict(margin_on=0.0, margin_off=0.0, min_dwell=0.0, max_toggles=None)
+
+
+class TackAlarm:
+    def __init__(self, margin_on=MARGIN_ON, margin_off=MARGIN_OFF, min_dwell=MIN_DWELL,
+                 max_toggles=MAX_TOGGLES, window=WINDOW):
+        self.margin_on = margin_on
+        self.margin_off = margin_off
+        self.min_dwell = min_dwell
+        self.max_toggles = max_toggles
+        self.window = window
+        self.on = False
+        self.since = -np.inf
+        self.toggles = deque()
+        self.count = 0
+
+    def update(self, t, eta, eta_virtual):
+        """Feed one fix (time in seconds, ETAs in minutes); returns the alarm state."""
+        gain = eta - eta_virtual if np.isfinite(eta) and np.isfinite(eta_virtual) else -np.inf
+        want = gain > self.margin_on if not self.on else gain >= self.margin_off
+        if want == self.on or t - self.since < self.min_dwell:
+            return self.on
+        if self.max_toggles is not None:
+            while self.toggles and t - self.toggles[0] >= self.window:
+                self.toggles.popleft()
+            if len(self.toggles) >= self.max_toggles:
+                return self.on
+            self.toggles.append(t)
+        self.on = want
+        self.since = t
+        self.count += 1
+        return self.on
+
+
+def alarm_inputs(track, wp_lat, wp_lon, tack_angle=90.0):
+    """Per-fix (t, eta, eta_virtual) for a recorded track, as the page computes them.
+
+    Through ``replay.FixPipeline``: the streaming Kalman filter, and the
+    virtual tack mirrored about the ``WindEstimator`` wind once there is one
+    (``tack_angle`` before that).
+    """
+    from replay import FixPipeline  # replay imports TackAlarm from here
+
+    pipe = FixPipeline(wp_lat, wp_lon, tack_angle)
+    rows = zip(*(np.asarray(track[k], dtype=float).tolist() for k in ("t", "lat", "lon", "acc")))
+    out = [r for r in (pipe.update(*row) for row in rows) if r is not None]
+    return tuple(np.array([r[k] for r in out], dtype=float) for k in ("t", "eta", "eta_virtual"))
+
+
+def replay(t, eta, eta_virtual, settings):
+    """Run each ``settings`` dict through ``TackAlarm``; toggles and time on per setting."""
+    report = []
+    for s in settings:
+        alarm = TackAlarm(**s)
+        states = np.array([alarm.update(*x) for x in zip(t.tolist(), eta.tolist(), eta_virtual.tolist())])
+        dt = np.diff(t, append=t[-1]) if len(t) else t
+        report.append({**s, "toggles": alarm.count, "on_s": float(dt[states].sum()) if len(t) else 0.0})
+    return report
+
+
+def main():
+    from replay import OSTREIRA, synthetic_track
+
+    parser = argparse.ArgumentParser(description="Replay tracks through the tack alarm")
+    parser.add_argument("sessions", nargs="*", help="session directories")
+    parser.add_argument("--synthetic", type=int, default=0, help="number of synthetic tracks instead")
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--wp", default=f"{OSTREIRA[0]},{OSTREIRA[1]}", help="waypoint as LAT,LON")
+    parser.add_argument("--tack", type=float, default=90.0, help="tack angle (deg) until the wind is estimated")
+    args = parser.parse_args()
+    wp_lat, wp_lon = (float(x) for x in args.wp.split(","))
+
+    settings = [
+        RAW,
+        dict(margin_on=0.3, margin_off=0.0, min_dwell=0.0, max_toggles=None),
+        dict(margin_on=0.3, margin_off=0.0, min_dwell=10.0, max_toggles=None),
+        dict(),  # defaults
+        dict(margin_on=1.0, margin_off=0.2, min_dwell=30.0, max_toggles=2),
+    ]
+    if args.synthetic:
+        tracks = [(f"sintético {i}", synthetic_track(mark=(wp_lat, wp_lon), minutes=args.minutes, seed=i, t0=0.0))
+                  for i in range(args.synthetic)]
+    elif args.sessions:
+        tracks = [(path, read_track(path)) for path in args.sessions]
+    else:
+        parser.error("give sessions or --synthetic N")
+
+    for name, track in tracks:
+        t, eta, eta_virtual = alarm_inputs(track, wp_lat, wp_lon, args.tack)
+        print(f"⛵ {name}: {len(t)} fixes, {(t[-1] - t[0]) / 60 if len(t) else 0:.0f} min")
+        for r in replay(t, eta, eta_virtual, settings):
+            print(f"   on {r.get('margin_on', MARGIN_ON):>4} off {r.get('margin_off', MARGIN_OFF):>4} "
+                  f"dwell {r.get('min_dwell', MIN_DWELL):>4} max {str(r.get('max_toggles', MAX_TOGGLES)):>4}"
+                  f" -> {r['toggles']:5d} toggles, {r['on_s'] / 60:6.1f} min on")
+
+
+# --- Browser copy (served as frontend/gps/core.js) ---
+ALARM_JS = f"""
+// Debounced tack alarm (same as alarm.py)
+class TackAlarm {{
+  constructor(marginOn = {MARGIN_ON}, marginOff = {MARGIN_OFF}, minDwell = {MIN_DWELL},
+              maxToggles = {MAX_TOGGLES}, windowS = {WINDOW}) {{
+    this.marginOn = marginOn; this.marginOff = marginOff; this.minDwell = minDwell;
+    this.maxToggles = maxToggles; this.windowS = windowS;
+    this.on = false; this.since = -Infinity; this.toggles = [];
+  }}
+  // t in seconds, ETAs in minutes (NaN/Infinity when there is no VMG)
+  update(t, eta, etaVirtual) {{
+    const gain = (isFinite(eta) && isFinite(etaVirtual)) ? eta - etaVirtual : -Infinity;
+    const want = this.on ? gain >= this.marginOff : gain > this.marginOn;
+    if (want === this.on || t - this.since < this.minDwell) return this.on;
+    if (this.maxToggles !== null) {{
+      while (this.toggles.length && t - this.toggles[0] >= this.windowS) this.toggles.shift();
+      if (this.toggles.length >= this.maxToggles) return this.on;
+      this.toggles.push(t);
+    }}
+    this.on = want;
+    this.since = t;
+    return this.on;
+  }}
+}}
+"""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""After-the-race numbers for a recorded session, leg by leg.
+
+``analyze`` runs a whole track through the page logic once and returns:
+
+* ``series`` — one row per second (sample and hold of the filtered fixes;
+  gaps longer than ``MAX_GAP`` are NaN): VMG and ETA to the mark of the
+  current leg, the ETA after tacking, and ``wrong`` — the pifano2.py rule,
+  tacking would get there sooner — so the time on the worse tack is a count
+  of seconds;
+* ``tacks`` — every tack ``WindEstimator`` saw, with the meters lost: the
+  VMG of the legs before and after (``REF_S`` seconds each) times the
+  maneuver's duration, minus what the boat made good during it;
+* ``legs`` — per mark of the course: time, mean VMG, time on the worse
+  tack, tacks and their loss, and distance sailed (on the simplified track,
+  see simplify.py) against the rhumb line from where the leg started.
+
+Legs end where ``course.score`` finds the mark rounded. Everything is
+vectorized but the wind estimator, which is a streaming state machine.
+"""
+import numpy as np
+
+from course import score
+from kalman import smooth
+from nav import KN_TO_MS, distance, eta, solve, tack_course, vmg
+from simplify import simplify
+from wind import WindEstimator
+
+ACC_THRESHOLD = 20.0  # meters, as the pages
+MAX_GAP = 10.0        # seconds without fixes before the series has a hole
+PRE = 5.0             # seconds before the turn counted in a tack
+POST = 10.0           # seconds after the turn counted in a tack
+REF_S = 30.0          # seconds of each leg that set the reference VMG
+
+
+def _maneuvers(t, sog, cog):
+    """Per-fix wind estimate and the ``(start, end)`` of each tack, from ``WindEstimator``."""
+    est = WindEstimator()
+    twd = np.full(len(t), np.nan)
+    tacks, last = [], None
+    for i, (ti, s, c) in enumerate(zip(t.tolist(), sog.tolist(), cog.tolist())):
+        w = est.update(ti, s, c)
+        twd[i] = np.nan if w is None else w
+        event = est.events[-1] if est.events else None
+        if event is not None and event is not last and event[3]:
+            # The turn is between the end of the previous leg and the start of this one
+            tacks.append((est.prev[1], est.seg["t0"]))
+        last = event
+    return twd, tacks
+
+
+def analyze(track, course, tack_angle=90.0):
+    """Per-second series, tacks and legs of ``track`` sailed around ``course`` (see module doc)."""
+    t = np.asarray(track["t"], dtype=float)
+    acc = np.where(np.asarray(track["acc"], dtype=float) > ACC_THRESHOLD, np.nan, track["acc"])
+    lat = np.where(np.isnan(acc), np.nan, np.asarray(track["lat"], dtype=float))
+    masked = {"t": t, "lat": lat, "lon": track["lon"], "acc": acc}
+    f = smooth(t, lat, track["lon"], acc)
+    ok = f["ok"]
+    t, lat, lon, sog, cog = t[ok], f["lat"][ok], f["lon"][ok], f["sog"][ok], f["cog"][ok]
+
+    # Leg of every fix: the number of marks rounded before it, from the same
+    # accurate fixes (masked, so the indexes still point into ``track``)
+    rounded = np.array([leg["index"] for leg in score(masked, course)], dtype=np.int64)
+    leg = np.searchsorted(rounded, np.flatnonzero(ok), side="left")
+    sailing = leg < len(course)
+    t, lat, lon, sog, cog, leg = (a[sailing] for a in (t, lat, lon, sog, cog, leg))
+    if len(t) < 2:
+        return None
+
+    # Page numbers against the mark of each fix's leg
+    res = solve(lat, lon, sog, cog, course.lat, course.lon, tack_angle)
+    rows = np.arange(len(t))
+    dist, brg, v, eta_now = (res[k][rows, leg] for k in ("dist", "bearing", "vmg", "eta"))
+    twd, tacks = _maneuvers(t, sog, cog)
+    known = np.isfinite(twd) & np.isfinite(cog)
+    virt = np.where(known, tack_course(np.nan_to_num(cog), np.nan_to_num(twd)), res["virtual_course"][rows, leg])
+    eta_virt = eta(dist, vmg(sog, virt, brg))
+    wrong = np.isfinite(eta_now) & np.isfinite(eta_virt) & (eta_virt < eta_now)
+
+    # One sample per second: the last fix at or before it
+    ts = np.arange(np.ceil(t[0]), t[-1] + 1)
+    i = np.searchsorted(t, ts, side="right") - 1
+    hole = ts - t[i] > MAX_GAP
+    series = {
+        "t": ts,
+        "leg": np.where(hole, -1, leg[i]),
+        "vmg": np.where(hole, np.nan, v[i]),
+        "eta": np.where(hole, np.nan, eta_now[i]),
+        "eta_virtual": np.where(hole, np.nan, eta_virt[i]),
+        "wrong": ~hole & wrong[i],
+        "twd": np.where(hole, np.nan, twd[i]),
+    }
+
+    # Meters lost in each tack against the VMG of the legs around it
+    tack_rows = []
+    for t_a, t_b in tacks:
+        inside = (ts >= t_a - PRE) & (ts <= t_b + POST)
+        before = (ts >= t_a - PRE - REF_S) & (ts < t_a - PRE)
+        after = (ts > t_b + POST) & (ts <= t_b + POST + REF_S)
+        ref = np.nanmean(np.concatenate([series["vmg"][before], series["vmg"][after]])) if (
+            before.any() or after.any()) else np.nan
+        if not inside.any() or not np.isfinite(ref):
+            continue
+        made = np.nansum(series["vmg"][inside]) * KN_TO_MS
+        tack_rows.append({
+            "t": float(t_a), "leg": int(leg[min(np.searchsorted(t, t_a), len(t) - 1)]), "seconds": float(t_b - t_a),
+            "lost": float(ref * KN_TO_MS * inside.sum() - made),
+        })
+
+    # Distance sailed on the simplified track, segment by segment
+    kept = simplify({"t": t, "lat": lat, "lon": lon})
+    seg = distance(lat[kept[:-1]], lon[kept[:-1]], lat[kept[1:]], lon[kept[1:]])
+    sailed = np.bincount(leg[kept[:-1]], weights=seg, minlength=len(course))
+
+    legs = []
+    for k in range(len(course)):
+        here = series["leg"] == k
+        first = np.flatnonzero(leg == k)
+        if not len(first):
+            break
+        lost = [r["lost"] for r in tack_rows if r["leg"] == k]
+        legs.append({
+            "mark": course.names[k],
+            "rounded": k < len(rounded),
+            "seconds": int(here.sum()),
+            "vmg": float(np.nanmean(series["vmg"][here])) if here.any() else np.nan,
+            "wrong_s": int(series["wrong"][here].sum()),
+            "tacks": len(lost),
+            "lost": float(np.sum(lost)),
+            "sailed": float(sailed[k]),
+            "rhumb": float(distance(lat[first[0]], lon[first[0]], course.lat[k], course.lon[k])),
+        })
+    return {"series": series, "tacks": tack_rows, "legs": legs}
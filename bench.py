@@ -0,0 +1,273 @@
+"""Benchmarks for the navigation math and the page render path.
+
+Fixed synthetic inputs (seeded fleets of fixes against the marks of the
+pages, marks.csv), each primitive timed as a plain ``math`` loop (how vmg3.py used to
+do it) and vectorized with ``nav``; plus the Kalman filter, the replay batch
+and a headless run of each Streamlit page. The geodesy backends are timed
+against each other with their error against WGS-84 (Vincenty), in the Ría
+and on offshore legs. Results go to JSON so two commits can be compared:
+
+    python bench.py -o bench_before.json
+    python bench.py --sizes 1000 100000 10000000 -o bench_after.json --compare bench_before.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+import geodesy
+import nav
+from kalman import smooth
+from marks import MARKS_FILE, Marks, page_waypoints
+from replay import OSTREIRA, run_batch, synthetic_track
+
+# The marks of vmg5.py / pifano.py / pifano2.py
+MARKS = np.array(list(page_waypoints(Marks.load(MARKS_FILE)).values()))
+OFFSHORE = np.array([(38.53, -28.63), (28.10, -15.42), (32.30, -64.78), (50.10, -5.55)])  # Horta, Las Palmas, Bermuda, Falmouth
+SCALAR_MAX = 20000   # scalar loops are timed on at most this many fixes
+CHUNK = 1_000_000    # vectorized work is done in chunks of fixes to bound memory
+PAGES = ["vmg5.py", "pifano.py", "pifano2.py"]
+
+
+def fleet(n, seed=0):
+    """``n`` random fixes over the Ría de Arousa."""
+    rng = np.random.default_rng(seed)
+    return {
+        "lat": rng.uniform(42.50, 42.62, n),
+        "lon": rng.uniform(-9.00, -8.78, n),
+        "spd": rng.uniform(0, 8, n),
+        "hdg": rng.uniform(0, 360, n),
+    }
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+# --- Scalar reference (one fix, one mark at a time) ---
+def distance_scalar(lat1, lon1, lat2, lon2):
+    φ1, φ2 = math.radians(lat1), math.radians(lat2)
+    dφ, dλ = φ2 - φ1, math.radians(lon2 - lon1)
+    a = math.sin(dφ / 2) ** 2 + math.cos(φ1) * math.cos(φ2) * math.sin(dλ / 2) ** 2
+    return nav.R_EARTH * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def bearing_scalar(lat1, lon1, lat2, lon2):
+    φ1, φ2 = math.radians(lat1), math.radians(lat2)
+    dλ = math.radians(lon2 - lon1)
+    x = math.sin(dλ) * math.cos(φ2)
+    y = math.cos(φ1) * math.sin(φ2) - math.sin(φ1) * math.cos(φ2) * math.cos(dλ)
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+
+def angle_diff_scalar(a, b):
+    d = abs(a - b) % 360
+    return 360 - d if d > 180 else d
+
+
+def solve_scalar(lat, lon, spd, hdg):
+    for la, lo, s, h in zip(lat, lon, spd, hdg):
+        for wla, wlo in MARKS:
+            d = distance_scalar(la, lo, wla, wlo)
+            b = bearing_scalar(la, lo, wla, wlo)
+            v = s * math.cos(math.radians(angle_diff_scalar(h, b)))
+            _ = d / (v * nav.KN_TO_MS) / 60 if v > nav.MIN_VMG else math.inf
+
+
+def chunked(fn, f, n):
+    for i in range(0, n, CHUNK):
+        fn({k: v[i:i + CHUNK] for k, v in f.items()})
+
+
+def chunked_prepared(prep, fn, f, n, repeat):
+    """Seconds of ``fn(*prep(chunk))`` over the chunks, best of ``repeat`` each; ``prep`` is not timed."""
+    total = 0.0
+    for i in range(0, n, CHUNK):
+        args = prep({k: v[i:i + CHUNK] for k, v in f.items()})
+        total += best_of(lambda: fn(*args), repeat)
+    return total
+
+
+# --- Benchmarks ---
+def bench_primitives(n, results):
+    f = fleet(n)
+    m_lat, m_lon = MARKS[:, 0][None, :], MARKS[:, 1][None, :]
+    ns = min(n, SCALAR_MAX)
+    lat, lon = f["lat"][:ns].tolist(), f["lon"][:ns].tolist()
+    spd, hdg = f["spd"][:ns].tolist(), f["hdg"][:ns].tolist()
+    marks = MARKS.tolist()
+    brg = [[bearing_scalar(a, b, c, d) for c, d in marks] for a, b in zip(lat, lon)]  # angle_diff's input
+
+    scalar = {
+        "distance": lambda: [distance_scalar(a, b, c, d) for a, b in zip(lat, lon) for c, d in marks],
+        "bearing": lambda: [bearing_scalar(a, b, c, d) for a, b in zip(lat, lon) for c, d in marks],
+        "angle_diff": lambda: [angle_diff_scalar(h, b) for h, row in zip(hdg, brg) for b in row],
+        "solve": lambda: solve_scalar(lat, lon, spd, hdg),
+    }
+    vector = {
+        "distance": lambda c: nav.distance(c["lat"][:, None], c["lon"][:, None], m_lat, m_lon),
+        "bearing": lambda c: nav.bearing(c["lat"][:, None], c["lon"][:, None], m_lat, m_lon),
+        "solve": lambda c: nav.solve(c["lat"], c["lon"], c["spd"], c["hdg"], MARKS[:, 0], MARKS[:, 1]),
+    }
+    # Heading against the bearing to each mark, as in solve; the bearings are not timed
+    prepared = {
+        "angle_diff": (lambda c: (c["hdg"][:, None], nav.bearing(c["lat"][:, None], c["lon"][:, None], m_lat, m_lon)),
+                       nav.angle_diff),
+    }
+    for name in scalar:
+        s = best_of(scalar[name], repeat=1 if ns > 5000 else 3)
+        results[f"{name}/scalar/{n}"] = {"n": ns, "marks": len(MARKS), "seconds": s, "ns_per_pair": s / (ns * len(MARKS)) * 1e9}
+        if name in prepared:
+            v = chunked_prepared(*prepared[name], f, n, repeat=3)
+        else:
+            v = best_of(lambda: chunked(vector[name], f, n), repeat=1 if n > CHUNK else 3)
+        results[f"{name}/vector/{n}"] = {"n": n, "marks": len(MARKS), "seconds": v, "ns_per_pair": v / (n * len(MARKS)) * 1e9}
+
+
+def bench_geodesy(n, results):
+    f = fleet(n)
+    lat, lon = f["lat"][:, None], f["lon"][:, None]
+    ref_d, ref_b = geodesy.Vincenty().inverse(lat, lon, MARKS[:, 0][None, :], MARKS[:, 1][None, :])
+    off_d, off_b = geodesy.Vincenty().inverse(MARKS[:, 0][:, None], MARKS[:, 1][:, None], OFFSHORE[:, 0], OFFSHORE[:, 1])
+    for mode in geodesy.BACKENDS:
+        geo = geodesy.backend(mode)
+        d, b = geo.inverse(lat, lon, MARKS[:, 0][None, :], MARKS[:, 1][None, :])
+        od, ob = geo.inverse(MARKS[:, 0][:, None], MARKS[:, 1][:, None], OFFSHORE[:, 0], OFFSHORE[:, 1])
+        for name in ("distance", "bearing", "inverse"):
+            fn = getattr(geo, name)
+            s = best_of(lambda: chunked(lambda c: fn(c["lat"][:, None], c["lon"][:, None],
+                                                      MARKS[:, 0][None, :], MARKS[:, 1][None, :]), f, n))
+            results[f"geodesy/{mode}/{name}/{n}"] = {"n": n, "marks": len(MARKS), "seconds": s,
+                                                      "ns_per_pair": s / (n * len(MARKS)) * 1e9}
+        results[f"geodesy/{mode}/inverse/{n}"].update({
+            "max_error_m": float(np.abs(d - ref_d).max()),
+            "max_error_deg": float(np.abs((b - ref_b + 180) % 360 - 180).max()),
+            "offshore_max_error_m": float(np.abs(od - off_d).max()),
+            "offshore_max_error_deg": float(np.abs((ob - off_b + 180) % 360 - 180).max()),
+        })
+
+
+def bench_tracks(results, boats=50, minutes=60):
+    tracks = [synthetic_track(minutes=minutes, seed=i, t0=0.0) for i in range(boats)]
+    stacked = {k: np.stack([tr[k] for tr in tracks]) for k in tracks[0]}
+    n = stacked["t"].size
+    s = best_of(lambda: smooth(stacked["t"], stacked["lat"], stacked["lon"], stacked["acc"]))
+    results[f"kalman/batch/{n}"] = {"n": n, "seconds": s, "ns_per_fix": s / n * 1e9}
+    s = best_of(lambda: run_batch(stacked, *OSTREIRA))
+    results[f"replay/batch/{n}"] = {"n": n, "seconds": s, "ns_per_fix": s / n * 1e9}
+
+
+def bench_pages(results, runs=5):
+    from streamlit.testing.v1 import AppTest
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    for page in PAGES:
+        at = AppTest.from_file(os.path.join(here, page))
+        at.run(timeout=60)  # first run pays the imports
+        s = best_of(lambda: at.run(timeout=60), repeat=runs)
+        results[f"page/{page}"] = {"runs": runs, "seconds": s}
+
+
+def bench_pydeck(results, runs=20):
+    import pydeck as pdk
+
+    lat, lon = MARKS[0]
+    points = [{"lat": la, "lon": lo, "name": str(i)} for i, (la, lo) in enumerate(MARKS)]
+
+    def build():
+        return pdk.Deck(
+            map_style=None,
+            initial_view_state=pdk.ViewState(latitude=lat, longitude=lon, zoom=11, pitch=0),
+            layers=[
+                pdk.Layer("ScatterplotLayer", data=points, get_position=["lon", "lat"], get_radius=50),
+                pdk.Layer("LineLayer", data=[{"start": [lon, lat], "end": [b, a]} for a, b in MARKS],
+                          get_source_position="start", get_target_position="end"),
+            ],
+        ).to_json()
+
+    s = best_of(build, repeat=runs)
+    results["pydeck/deck"] = {"runs": runs, "seconds": s}
+
+
+def bench_fleetmap(results, n=100_000):
+    from fleetmap import pack_tracks
+
+    tr = synthetic_track(minutes=n / 60, seed=0, t0=0.0)
+    s = best_of(lambda: pack_tracks({"boat": tr}, {}))
+    results[f"fleetmap/pack/{n}"] = {"n": n, "seconds": s, "ns_per_fix": s / n * 1e9}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(new, old_path):
+    with open(old_path) as f:
+        old = json.load(f)["results"]
+    print(f"\n{'benchmark':34} {'old':>10} {'new':>10} {'ratio':>7}")
+    for name, r in new.items():
+        if name in old:
+            o, n = old[name]["seconds"], r["seconds"]
+            flag = " ⚠️" if n > 1.1 * o else ""
+            print(f"{name:34} {o:10.4f} {n:10.4f} {n / o:7.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VMG benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--no-pages", action="store_true", help="skip the Streamlit page runs")
+    parser.add_argument("-o", "--output", default="bench.json")
+    parser.add_argument("--compare", help="earlier JSON to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    for n in args.sizes:
+        bench_primitives(n, results)
+        bench_geodesy(n, results)
+    bench_tracks(results)
+    if not args.no_pages:
+        bench_pages(results)
+    bench_fleetmap(results)
+    try:
+        bench_pydeck(results)
+    except ImportError:
+        print("pydeck not installed: skipping the deck build")
+
+    for name, r in results.items():
+        per = r.get("ns_per_pair", r.get("ns_per_fix"))
+        extra = f" ({per:,.1f} ns per {'pair' if 'ns_per_pair' in r else 'fix'})" if per is not None else ""
+        if "max_error_m" in r:
+            extra += (f" · error {r['max_error_m']:.3f} m {r['max_error_deg']:.4f}° in the Ría, "
+                      f"{r['offshore_max_error_m']:,.0f} m {r['offshore_max_error_deg']:.2f}° offshore")
+        print(f"{name:34} {r['seconds'] * 1000:10.2f} ms{extra}")
+
+    report = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Race courses: a route of marks, leg by leg.
+
+A course is the marks in the order they are sailed, e.g. Rua Norte →
+Ostreira → Castro. ``CourseTracker`` follows the fix stream:
+
+* a mark counts as rounded when the boat comes within ``radius`` meters of
+  it; the tracker then moves on to the next mark;
+* the ETA of the current leg is the pages' VMG ETA to the current mark;
+* the legs after it are taken at the boat's average speed (an exponential
+  average of SOG over ``tau`` seconds) in a straight line, so the total ETA
+  is the current leg's ETA plus ``rest[leg] / speed``.
+
+Leg lengths and the remaining distance after each mark are computed once,
+so every fix costs the same whatever the length of the course.
+
+``score`` runs a recorded track against a course in one go:
+
+    python course.py tracks/20261017-140200-3fa2c1 --route "Rua Norte,Ostreira,Castro"
+"""
+import argparse
+
+import numpy as np
+
+from kalman import smooth
+from marks import MARKS_FILE, Marks
+from nav import KN_TO_MS, MIN_VMG, angle_diff, bearing, distance
+from track import read_track
+
+ROUND_RADIUS = 50.0   # meters
+SPEED_TAU = 60.0      # seconds
+
+
+class Course:
+    def __init__(self, names, lat, lon, radius=ROUND_RADIUS):
+        self.names = list(names)
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.radius = radius
+        # legs[i]: meters from mark i-1 to mark i (0 for the first mark)
+        self.legs = np.concatenate([[0.0], distance(self.lat[:-1], self.lon[:-1], self.lat[1:], self.lon[1:])])
+        # rest[i]: meters from mark i to the finish along the course
+        self.rest = np.concatenate([np.cumsum(self.legs[::-1])[::-1][1:], [0.0]])
+
+    @classmethod
+    def from_marks(cls, marks, names, radius=ROUND_RADIUS):
+        """Course through the marks called ``names`` in a ``marks.Marks`` database."""
+        idx = [marks.names.index(n) for n in names]
+        return cls(names, marks.lat[idx], marks.lon[idx], radius)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def length(self):
+        return float(self.legs.sum())
+
+
+class CourseTracker:
+    """Per-fix progress along a ``Course``."""
+
+    def __init__(self, course, tau=SPEED_TAU):
+        self.course = course
+        self.tau = tau
+        self.leg = 0          # index of the mark we are sailing to
+        self.rounded = []     # (t, mark index)
+        self.speed = np.nan   # knots, averaged
+        self.t_last = None
+
+    @property
+    def finished(self):
+        return self.leg >= len(self.course)
+
+    def update(self, t, lat, lon, sog, cog):
+        """Feed one smoothed fix (SOG in knots); returns the progress, or ``None`` once finished."""
+        c = self.course
+        if self.t_last is not None and np.isfinite(sog):
+            a = 1 - np.exp(-(t - self.t_last) / self.tau)
+            self.speed = sog if np.isnan(self.speed) else self.speed + a * (sog - self.speed)
+        elif np.isfinite(sog):
+            self.speed = sog
+        self.t_last = t
+        if self.finished:
+            return None
+
+        dist = float(distance(lat, lon, c.lat[self.leg], c.lon[self.leg]))
+        rounded = dist <= c.radius
+        if rounded:
+            self.rounded.append((t, self.leg))
+            self.leg += 1
+            if self.finished:
+                return {"leg": self.leg, "mark": None, "rounded": True, "dist": 0.0, "eta": 0.0,
+                        "rest": 0.0, "eta_total": 0.0}
+            dist = float(distance(lat, lon, c.lat[self.leg], c.lon[self.leg]))
+
+        brg = float(bearing(lat, lon, c.lat[self.leg], c.lon[self.leg]))
+        angle = 0.0 if np.isnan(cog) else float(angle_diff(cog, brg))
+        vmg = sog * np.cos(np.radians(angle))
+        eta = dist / (vmg * KN_TO_MS) / 60 if vmg > MIN_VMG else np.inf
+        return {
+            "leg": self.leg, "mark": c.names[self.leg], "rounded": rounded,
+            "dist": dist, "bearing": brg, "vmg": vmg, "eta": eta,
+            "rest": float(c.rest[self.leg]), "eta_total": eta + self.eta_rest(),
+        }
+
+    def eta_rest(self):
+        """Minutes for the legs after the current one, at the average speed."""
+        rest = 0.0 if self.finished else float(self.course.rest[self.leg])
+        if rest == 0:
+            return 0.0
+        return rest / (self.speed * KN_TO_MS) / 60 if self.speed > MIN_VMG else np.inf
+
+
+def score(track, course):
+    """Leg times of a recorded track sailed around ``course``.
+
+    The track is smoothed like the pages do; each mark is looked for (within
+    ``course.radius``) only after the previous one was rounded. Returns one
+    dict per mark reached: name, fix index, time, leg seconds and the leg's
+    straight-line speed in knots.
+    """
+    f = smooth(track["t"], track["lat"], track["lon"], np.maximum(track["acc"], 1.0))
+    t = np.asarray(track["t"], dtype=float)
+    lat = np.where(f["ok"], f["lat"], np.nan)
+    lon = np.where(f["ok"], f["lon"], np.nan)
+    legs, i0, t0 = [], 0, None
+    for k, name in enumerate(course.names):
+        d = distance(lat[i0:], lon[i0:], course.lat[k], course.lon[k])
+        hits = np.flatnonzero(d <= course.radius)
+        if not len(hits):
+            break
+        i = i0 + int(hits[0])
+        dt = None if t0 is None else float(t[i] - t0)
+        legs.append({
+            "mark": name, "index": i, "t": float(t[i]), "seconds": dt,
+            "speed": float(course.legs[k] / dt / KN_TO_MS) if dt else None,
+        })
+        i0, t0 = i, t[i]
+    return legs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score recorded tracks against a course")
+    parser.add_argument("sessions", nargs="+", help="session directories")
+    parser.add_argument("--route", required=True, help="mark names in order, comma separated")
+    parser.add_argument("--marks", default=MARKS_FILE, help="mark database (CSV or GPX)")
+    parser.add_argument("--radius", type=float, default=ROUND_RADIUS, help="rounding radius (m)")
+    args = parser.parse_args()
+    course = Course.from_marks(Marks.load(args.marks), [n.strip() for n in args.route.split(",")], args.radius)
+    print(f"🏁 {' → '.join(course.names)} ({course.length / 1852:.2f} nm)")
+    for path in args.sessions:
+        legs = score(read_track(path), course)
+        done = "finished" if len(legs) == len(course) else f"{len(legs)}/{len(course)} marks"
+        print(f"⛵ {path}: {done}")
+        for leg in legs:
+            extra = f" {leg['seconds'] / 60:6.1f} min {leg['speed']:5.2f} kn" if leg["seconds"] else ""
+            print(f"   {leg['mark']:20}{extra}")
+
+
+# --- Browser copy (served as frontend/gps/core.js) ---
+COURSE_JS = f"""
+// Route progress (same as course.py)
+class CourseTracker {{
+  // marks: [[name, lat, lon], ...]
+  constructor(marks, radius = {ROUND_RADIUS}, tau = {SPEED_TAU}) {{
+    this.marks = marks; this.radius = radius; this.tau = tau;
+    this.rest = new Array(marks.length).fill(0);
+    for (let i = marks.length - 2; i >= 0; i--) {{
+      this.rest[i] = this.rest[i + 1] + haversine(marks[i][1], marks[i][2], marks[i + 1][1], marks[i + 1][2]);
+    }}
+    this.leg = 0; this.speed = NaN; this.tLast = null;
+  }}
+  get finished() {{ return this.leg >= this.marks.length; }}
+  get mark() {{ return this.finished ? null : this.marks[this.leg]; }}
+  // t in seconds, sog in knots; returns true when a mark was just rounded
+  update(t, lat, lon, sog) {{
+    if (isFinite(sog)) {{
+      const a = this.tLast === null ? 1 : 1 - Math.exp(-(t - this.tLast) / this.tau);
+      this.speed = isNaN(this.speed) ? sog : this.speed + a * (sog - this.speed);
+    }}
+    this.tLast = t;
+    if (this.finished) return false;
+    const m = this.marks[this.leg];
+    if (haversine(lat, lon, m[1], m[2]) > this.radius) return false;
+    this.leg += 1;
+    return true;
+  }}
+  // Minutes for the legs after the current one, at the average speed
+  etaRest() {{
+    const rest = this.finished ? 0 : this.rest[this.leg];
+    if (rest === 0) return 0;
+    return this.speed > MIN_VMG ? rest / (this.speed * KN_TO_MS) / 60 : Infinity;
+  }}
+}}
+"""
+
+
+if __name__ == "__main__":
+    main()
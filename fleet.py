@@ -0,0 +1,218 @@
+"""Fleet server: many boats post fix batches, dashboards read fleet snapshots.
+
+Runs on its own next to (or behind a proxy with) the Streamlit app:
+
+    python fleet.py --port 8765
+
+HTTP endpoints (JSON):
+
+    POST /fixes      {"boat": "ESP-123", "enc": "gzip"|"json", "data": ...}
+                     same batch encoding as the GPS component (track.decode_fixes)
+    GET  /snapshot?lat=42.5521&lon=-8.9403
+                     latest state of every boat with distance, bearing, VMG and
+                     ETA to that waypoint, as columns
+
+State lives in ``FleetTable``, one NumPy array per field with a row per boat,
+so a snapshot is a single vectorized ``nav`` call over the whole fleet.
+Everything runs on one asyncio loop; a batch costs O(batch) and a snapshot
+O(boats).
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from nav import MS_TO_KN, bearing, distance, eta, vmg
+from track import decode_fixes
+
+FIELDS = {
+    "t": np.float64,     # time of the latest fix, epoch seconds
+    "lat": np.float64,
+    "lon": np.float64,
+    "acc": np.float32,
+    "sog": np.float32,   # knots
+    "cog": np.float32,   # degrees, NaN when unknown
+    "fixes": np.int64,   # fixes received
+}
+MAX_SNAPSHOTS = 256      # cached snapshots (one per waypoint asked for), least recent out first
+# A bad request body: missing/wrong fields, bad JSON, base64 or gzip
+BAD_REQUEST = (KeyError, ValueError, TypeError, OSError, EOFError, zlib.error)
+
+
+class FleetTable:
+    """Latest state per boat as a struct of arrays."""
+
+    def __init__(self, capacity=256):
+        self.ids = []
+        self.rows = {}
+        self.cols = {name: np.full(capacity, np.nan if np.dtype(dt).kind == "f" else 0, dtype=dt)
+                     for name, dt in FIELDS.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, boat):
+        row = self.rows.get(boat)
+        if row is None:
+            row = self.rows[boat] = len(self.ids)
+            self.ids.append(boat)
+            capacity = len(self.cols["t"])
+            if row >= capacity:
+                for name, col in self.cols.items():
+                    grown = np.full(2 * capacity, np.nan if col.dtype.kind == "f" else 0, dtype=col.dtype)
+                    grown[:capacity] = col
+                    self.cols[name] = grown
+        return row
+
+    def update(self, boat, fixes):
+        """Fold a batch of fixes (dict of columns) into the boat's row."""
+        t = fixes["t"]
+        if not len(t):
+            return
+        row = self._row(boat)
+        c = self.cols
+        last = int(np.argmax(t))
+        if t[last] <= c["t"][row]:
+            return  # late or duplicate batch
+        lat, lon = float(fixes["lat"][last]), float(fixes["lon"][last])
+        spd, hdg = float(fixes["spd"][last]), float(fixes["hdg"][last])
+        if math.isnan(spd) or math.isnan(hdg):
+            # Phone gave no speed/heading: derive them from the previous position
+            if len(t) > 1:
+                prev = int(np.argsort(t)[-2])
+                t0, lat0, lon0 = t[prev], float(fixes["lat"][prev]), float(fixes["lon"][prev])
+            else:
+                t0, lat0, lon0 = c["t"][row], c["lat"][row], c["lon"][row]
+            dt = t[last] - t0
+            if dt > 0 and not math.isnan(lat0):
+                if math.isnan(spd):
+                    spd = float(distance(lat0, lon0, lat, lon)) / dt
+                if math.isnan(hdg):
+                    hdg = float(bearing(lat0, lon0, lat, lon))
+        c["t"][row] = t[last]
+        c["lat"][row] = lat
+        c["lon"][row] = lon
+        c["acc"][row] = fixes["acc"][last]
+        c["sog"][row] = spd * MS_TO_KN if not math.isnan(spd) else np.nan
+        c["cog"][row] = hdg
+        c["fixes"][row] += len(t)
+
+    def snapshot(self, wp_lat=None, wp_lon=None):
+        """Columns for every boat, plus dist/bearing/vmg/eta when a waypoint is given."""
+        n = len(self.ids)
+        snap = {"boat": list(self.ids)}
+        snap.update({name: col[:n] for name, col in self.cols.items()})
+        if wp_lat is not None and wp_lon is not None:
+            d = distance(snap["lat"], snap["lon"], wp_lat, wp_lon)
+            b = bearing(snap["lat"], snap["lon"], wp_lat, wp_lon)
+            v = vmg(np.nan_to_num(snap["sog"]), snap["cog"], b)
+            snap.update({"dist": d, "bearing": b, "vmg": v, "eta": eta(d, v)})
+        return snap
+
+
+def to_json(snap):
+    """Snapshot as JSON; NaN and inf become null."""
+    def clean(col):
+        if isinstance(col, np.ndarray):
+            col = col.astype(float)
+            return [x if math.isfinite(x) else None for x in col.tolist()]
+        return col
+    return json.dumps({name: clean(col) for name, col in snap.items()})
+
+
+class FleetServer:
+    """Minimal HTTP/1.1 server (keep-alive) over asyncio streams."""
+
+    def __init__(self, table=None, snapshot_ttl=0.5):
+        self.table = table or FleetTable()
+        self.snapshot_ttl = snapshot_ttl  # seconds a snapshot is reused per waypoint
+        self._snapshots = OrderedDict()  # wp -> (time, body), oldest first
+        self.batches = 0
+
+    def handle_fixes(self, body):
+        msg = json.loads(body)
+        self.table.update(str(msg["boat"]), decode_fixes(msg))
+        self.batches += 1
+        return 200, '{"ok": true}'
+
+    def handle_snapshot(self, query):
+        q = parse_qs(query)
+        wp = (float(q["lat"][0]), float(q["lon"][0])) if "lat" in q and "lon" in q else (None, None)
+        now = time.monotonic()
+        cached = self._snapshots.get(wp)
+        if cached and now - cached[0] < self.snapshot_ttl:
+            return 200, cached[1]
+        body = to_json(self.table.snapshot(*wp))
+        # Waypoints come from the clients: drop what expired and cap the rest
+        self._snapshots.pop(wp, None)
+        while self._snapshots and now - next(iter(self._snapshots.values()))[0] >= self.snapshot_ttl:
+            self._snapshots.popitem(last=False)
+        self._snapshots[wp] = (now, body)
+        while len(self._snapshots) > MAX_SNAPSHOTS:
+            self._snapshots.popitem(last=False)
+        return 200, body
+
+    def route(self, method, target, body):
+        url = urlsplit(target)
+        if method == "POST" and url.path == "/fixes":
+            return self.handle_fixes(body)
+        if method == "GET" and url.path == "/snapshot":
+            return self.handle_snapshot(url.query)
+        return 404, '{"error": "not found"}'
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                try:
+                    status, payload = self.route(method, target, body)
+                except BAD_REQUEST as e:
+                    status, payload = 400, json.dumps({"error": str(e)})
+                data = payload.encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    "Access-Control-Allow-Origin: *\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.serve_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VMG fleet server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    print(f"🚤 Fleet server on http://{args.host}:{args.port}")
+    asyncio.run(FleetServer().serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
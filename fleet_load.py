@@ -0,0 +1,143 @@
+"""Synthetic load for the fleet server.
+
+Starts ``fleet.py`` in a subprocess (or targets ``--url``), then simulates
+``--boats`` boats sailing around the Ría de Arousa at 1 Hz, each posting a fix
+batch every ``--batch`` seconds over its own keep-alive connection, plus
+``--dashboards`` clients polling snapshots every second. Prints request
+latency percentiles:
+
+    python fleet_load.py --boats 500 --seconds 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+RUA_NORTE = (42.5521, -8.9403)
+
+
+class Client:
+    """One keep-alive HTTP connection."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b""):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await self.writer.drain()
+        status = await self.reader.readline()
+        length = 0
+        while True:
+            h = await self.reader.readline()
+            if h in (b"\r\n", b""):
+                break
+            k, _, v = h.decode().partition(":")
+            if k.lower() == "content-length":
+                length = int(v)
+        await self.reader.readexactly(length)
+        return int(status.split()[1])
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def boat(name, client, seconds, batch, latencies, errors):
+    lat = RUA_NORTE[0] + random.uniform(-0.02, 0.02)
+    lon = RUA_NORTE[1] + random.uniform(-0.03, 0.03)
+    hdg = random.uniform(0, 360)
+    await asyncio.sleep(random.uniform(0, batch))  # spread boats over the period
+    t_end = time.time() + seconds
+    while time.time() < t_end:
+        fixes = []
+        now = time.time()
+        for i in range(batch):
+            hdg = (hdg + random.gauss(0, 3)) % 360
+            spd = random.uniform(2, 4)  # m/s
+            lat += spd * np.cos(np.radians(hdg)) / 111320
+            lon += spd * np.sin(np.radians(hdg)) / (111320 * np.cos(np.radians(lat)))
+            fixes.append([now - batch + i + 1, lat, lon, 5.0, spd, hdg])
+        cols = dict(zip(["t", "lat", "lon", "acc", "spd", "hdg"], map(list, zip(*fixes))))
+        body = json.dumps({"boat": name, "enc": "json", "data": cols}).encode()
+        t0 = time.perf_counter()
+        if await client.request("POST", "/fixes", body) != 200:
+            errors.append(name)
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(max(0.0, batch - (time.time() - now)))
+
+
+async def dashboard(client, seconds, latencies):
+    t_end = time.time() + seconds
+    while time.time() < t_end:
+        t0 = time.perf_counter()
+        await client.request("GET", f"/snapshot?lat={RUA_NORTE[0]}&lon={RUA_NORTE[1]}")
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(1.0)
+
+
+def report(label, latencies):
+    if not latencies:
+        print(f"{label}: no requests")
+        return
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    print(f"{label}: {len(ms)} requests | p50 {p50:.2f} ms | p95 {p95:.2f} ms | "
+          f"p99 {p99:.2f} ms | max {ms.max():.2f} ms")
+
+
+async def run(host, port, boats, dashboards, seconds, batch):
+    clients = [Client(host, port) for _ in range(boats + dashboards)]
+    post_lat, snap_lat, errors = [], [], []
+    tasks = [boat(f"boat-{i:04d}", clients[i], seconds, batch, post_lat, errors) for i in range(boats)]
+    tasks += [dashboard(clients[boats + i], seconds, snap_lat) for i in range(dashboards)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+    for c in clients:
+        c.close()
+    print(f"⛵ {boats} boats, batch {batch} s, {dashboards} dashboards, {elapsed:.1f} s")
+    print(f"   {len(post_lat) * batch / elapsed:.0f} fixes/s, {len(errors)} errors")
+    report("   POST /fixes   ", post_lat)
+    report("   GET /snapshot ", snap_lat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for fleet.py")
+    parser.add_argument("--url", help="existing server, e.g. http://127.0.0.1:8765 (default: start one)")
+    parser.add_argument("--boats", type=int, default=300)
+    parser.add_argument("--dashboards", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--batch", type=int, default=1, help="seconds of fixes per POST (1 Hz fixes)")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        host, port = "127.0.0.1", 8765 + random.randint(1, 1000)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fleet.py")
+        server = subprocess.Popen([sys.executable, script, "--host", host, "--port", str(port)],
+                                  stdout=subprocess.DEVNULL)
+        time.sleep(1.5)
+    try:
+        asyncio.run(run(host, port, args.boats, args.dashboards, args.seconds, args.batch))
+    finally:
+        if server is not None:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
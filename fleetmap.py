@@ -0,0 +1,138 @@
+"""Streamlit map for fleets and long tracks (frontend/fleetmap).
+
+Replaces the per-rerun ``pdk.Deck`` of vmg3.py. The map is a static canvas
+component, so it needs no network: with ``tiles`` (a ``{z}/{x}/{y}`` URL
+template, e.g. a local tile server) it draws a basemap, without it plain
+water and a lat/lon grid.
+
+Tracks travel as little-endian float32 columns in one ``bytes`` argument
+(lat, lon and a Douglas–Peucker importance per point) and only the points
+the browser does not have yet are sent: the component reports how many
+points of each track it holds, like the ``ack`` of the GPS uplink.
+
+``importance`` is computed once per point: the Douglas–Peucker distance at
+which the point gets selected, capped by its parent's. Keeping the points
+with ``importance >= tolerance`` is exactly the Douglas–Peucker
+simplification at that tolerance, so the browser re-simplifies for every
+zoom level with one comparison per point, and 100k-point tracks stay
+interactive.
+"""
+import os
+
+import numpy as np
+import streamlit as st
+import streamlit.components.v1 as components
+
+from nav import R_EARTH
+
+MIN_TOL = 0.5          # meters; below this the split stops (points get 0)
+MAX_SEND = 500_000     # points per rerun, the rest follows on the next one
+
+_fleetmap = components.declare_component(
+    "fleetmap", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "fleetmap")
+)
+
+
+def importance(lat, lon, min_tol=MIN_TOL):
+    """Douglas–Peucker importance (meters) of every point; endpoints are ``inf``.
+
+    The ranges of one recursion level are processed together, so the Python
+    loop runs once per level rather than once per split.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    n = len(lat)
+    imp = np.zeros(n)
+    if n == 0:
+        return imp
+    imp[[0, -1]] = np.inf
+    y = np.radians(lat - lat[0]) * R_EARTH
+    x = np.radians(lon - lon[0]) * R_EARTH * np.cos(np.radians(lat[0]))
+    a = np.array([0]) if n > 2 else np.empty(0, dtype=np.int64)
+    b = np.array([n - 1]) if n > 2 else np.empty(0, dtype=np.int64)
+    while len(a):
+        counts = b - a - 1
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        seg = np.repeat(np.arange(len(a)), counts)
+        idx = np.arange(counts.sum()) - offsets[seg] + a[seg] + 1
+        # Distance from each interior point to its range's chord (segment)
+        ax, ay, bx, by = x[a[seg]], y[a[seg]], x[b[seg]], y[b[seg]]
+        dx, dy = bx - ax, by - ay
+        len2 = dx * dx + dy * dy
+        u = np.clip(((x[idx] - ax) * dx + (y[idx] - ay) * dy) / np.where(len2 > 0, len2, 1), 0, 1)
+        d = np.nan_to_num(np.hypot(x[idx] - ax - u * dx, y[idx] - ay - u * dy))  # NaN gaps never split
+        dmax = np.maximum.reduceat(d, offsets)
+        hit = d == dmax[seg]
+        first = np.unique(seg[hit], return_index=True)[1]
+        split = idx[np.flatnonzero(hit)[first]]
+        imp[split] = np.minimum(dmax, np.minimum(imp[a], imp[b]))
+        go = dmax > min_tol
+        imp[split[~go]] = 0.0
+        a, m, b = a[go], split[go], b[go]
+        a, b = np.concatenate([a, m]), np.concatenate([m, b])
+        keep = b - a > 1
+        a, b = a[keep], b[keep]
+    return imp
+
+
+def pack_tracks(tracks, have):
+    """Binary delta of ``tracks`` ({id: {"lat", "lon"}}) given what the browser ``have``s.
+
+    Returns ``(layout, data)``: layout rows ``[id, start, n]`` and the float32
+    columns lat, lon, importance of each delta, one after the other. A delta
+    is simplified with the last point the browser has as its anchor, so its
+    ends are always kept.
+    """
+    layout, parts, budget = [], [], MAX_SEND
+    for tid, cols in tracks.items():
+        n = len(cols["lat"])
+        start = have.get(str(tid), 0)
+        if start > n:  # the track was replaced: start over
+            start = 0
+        end = min(n, start + budget)
+        if end <= start:
+            continue
+        anchor = max(start - 1, 0)
+        lat = np.asarray(cols["lat"][anchor:end], dtype=float)
+        lon = np.asarray(cols["lon"][anchor:end], dtype=float)
+        imp = importance(lat, lon)[start - anchor:]
+        parts += [lat[start - anchor:].astype("<f4"), lon[start - anchor:].astype("<f4"), imp.astype("<f4")]
+        layout.append([str(tid), start, end - start])
+        budget -= end - start
+        if budget <= 0:
+            break
+    return layout, b"".join(p.tobytes() for p in parts)
+
+
+def fleet_map(tracks=None, boats=None, marks=None, links=None, tiles=None, height=480, key="fleetmap"):
+    """Draw tracks, boats and marks; returns nothing.
+
+    * ``tracks`` — {id: {"lat": array, "lon": array}}; arrays may be memory
+      maps and may grow between reruns (only the new points are sent).
+    * ``boats`` — {"name": [...], "lat": array, "lon": array, "cog": array}.
+    * ``marks`` — {name: (lat, lon)}.
+    * ``links`` — [(lat1, lon1, lat2, lon2), ...] dashed lines (e.g. bearings).
+    """
+    # What the browser holds, as it last reported it; it reports again
+    # whenever that differs from the ``base`` we sent against
+    have = (st.session_state.get(key) or {}).get("have", {})
+    layout, data = pack_tracks(tracks or {}, have)
+    if boats is not None and len(boats["lat"]):
+        boat_cols = np.concatenate([np.asarray(boats[k], dtype="<f4") for k in ("lat", "lon", "cog")])
+        boat_names = [str(n) for n in boats["name"]]
+    else:
+        boat_cols, boat_names = np.empty(0, "<f4"), []
+    _fleetmap(
+        base=have,
+        layout=layout,
+        data=data,
+        track_ids=[str(t) for t in (tracks or {})],
+        boats=boat_cols.tobytes(),
+        boat_names=boat_names,
+        marks=[[n, float(la), float(lo)] for n, (la, lo) in (marks or {}).items()],
+        links=[[float(v) for v in link] for link in (links or [])],
+        tiles=tiles,
+        height=height,
+        key=key,
+        default=None,
+    )
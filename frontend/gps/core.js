@@ -0,0 +1,407 @@
+// Generated by gps_component.py from nav.py, kalman.py, alarm.py, course.py, wind.py, telemetry.py, sampling.py and navcore.py — do not edit
+
+const R_EARTH = 6371000.0;
+const MS_TO_KN = 1.94384;
+const KN_TO_MS = 0.5144;
+const MIN_VMG = 0.1;
+
+// Haversine distance
+function haversine(lat1, lon1, lat2, lon2) {
+  const dLat = (lat2 - lat1) * Math.PI / 180;
+  const dLon = (lon2 - lon1) * Math.PI / 180;
+  const a = Math.sin(dLat / 2)**2 +
+            Math.cos(lat1 * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180) *
+            Math.sin(dLon / 2)**2;
+  return R_EARTH * 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
+}
+
+// Bearing calculation
+function bearingTo(lat1, lon1, lat2, lon2) {
+  const y = Math.sin((lon2 - lon1) * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180);
+  const x = Math.cos(lat1 * Math.PI / 180) * Math.sin(lat2 * Math.PI / 180) -
+            Math.sin(lat1 * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180) *
+            Math.cos((lon2 - lon1) * Math.PI / 180);
+  return (Math.atan2(y, x) * 180 / Math.PI + 360) % 360;
+}
+
+function angleDiff(a, b) {
+  let d = Math.abs(a - b) % 360;
+  return d > 180 ? 360 - d : d;
+}
+
+// Minutes to cover dist (m) at vmg (kn); Infinity when vmg <= MIN_VMG
+function etaMin(dist, vmg) {
+  return vmg > MIN_VMG ? dist / (vmg * KN_TO_MS) / 60 : Infinity;
+}
+
+// One filtered fix against waypoints, on this tack and on the other (same as
+// nav.evaluate); cog null/NaN when unknown, twd null without a wind estimate
+function evaluate(lat, lon, sog, cog, twd, wpLat, wpLon, tackAngle = 90.0) {
+  const known = cog !== null && !isNaN(cog);
+  const vmgTo = (course, brg) => sog * Math.cos((isNaN(course) ? 0 : angleDiff(course, brg)) * Math.PI / 180);
+  const out = { dist: [], bearing: [], vmg: [], eta: [], virtualCourse: [], etaVirtual: [] };
+  for (let i = 0; i < wpLat.length; i++) {
+    const dist = haversine(lat, lon, wpLat[i], wpLon[i]);
+    const brg = bearingTo(lat, lon, wpLat[i], wpLon[i]);
+    let virt = NaN;
+    if (known && twd !== null) {
+      virt = (2 * twd - cog + 720) % 360;
+    } else if (known) {
+      const plus = (cog + tackAngle) % 360;
+      const minus = (cog - tackAngle + 360) % 360;
+      virt = angleDiff(plus, brg) < angleDiff(minus, brg) ? plus : minus;
+    }
+    const v = vmgTo(known ? cog : NaN, brg);
+    out.dist.push(dist); out.bearing.push(brg); out.vmg.push(v); out.eta.push(etaMin(dist, v));
+    out.virtualCourse.push(virt); out.etaVirtual.push(etaMin(dist, vmgTo(virt, brg)));
+  }
+  return out;
+}
+
+// Constant-velocity Kalman filter (same as kalman.py)
+class KalmanCV {
+  constructor(q = 0.2, gate = 13.8) {
+    this.q = q; this.gate = gate; this.origin = null; this.t = null; this.rejects = 0;
+  }
+  reset(t, x, y, r) {
+    this.t = t; this.x = x; this.y = y; this.vx = 0; this.vy = 0;
+    this.P00 = r; this.P01 = 0; this.P11 = 25.0; this.rejects = 0;
+  }
+  // Returns {lat, lon, sog, cog} (sog in knots, cog null when slow) or null for an outlier
+  update(t, lat, lon, acc) {
+    const D = Math.PI / 180;
+    if (this.origin === null) this.origin = { lat, lon, cos: Math.cos(lat * D) };
+    const o = this.origin;
+    const zx = (lon - o.lon) * D * R_EARTH * o.cos;
+    const zy = (lat - o.lat) * D * R_EARTH;
+    const r = acc * acc;
+    if (this.t === null) {
+      this.reset(t, zx, zy, r);
+    } else {
+      const dt = Math.max(t - this.t, 0), dt2 = dt * dt;
+      const P00 = this.P00 + 2 * dt * this.P01 + dt2 * this.P11 + this.q * dt2 * dt / 3;
+      const P01 = this.P01 + dt * this.P11 + this.q * dt2 / 2;
+      const P11 = this.P11 + this.q * dt;
+      const px = this.x + this.vx * dt, py = this.y + this.vy * dt;
+      const S = P00 + r, ix = zx - px, iy = zy - py;
+      if ((ix * ix + iy * iy) / S > this.gate) {
+        this.rejects += 1;
+        if (this.rejects <= 3) return null;
+        this.reset(t, zx, zy, r);
+      } else {
+        const K0 = P00 / S, K1 = P01 / S;
+        this.x = px + K0 * ix; this.y = py + K0 * iy;
+        this.vx += K1 * ix; this.vy += K1 * iy;
+        this.P00 = (1 - K0) * P00; this.P01 = (1 - K0) * P01; this.P11 = P11 - K1 * P01;
+        this.t = t; this.rejects = 0;
+      }
+    }
+    const sog = Math.hypot(this.vx, this.vy) * MS_TO_KN;
+    const cog = (Math.atan2(this.vx, this.vy) / D + 360) % 360;
+    return {
+      lat: o.lat + this.y / (D * R_EARTH),
+      lon: o.lon + this.x / (D * R_EARTH * o.cos),
+      sog: sog,
+      cog: sog >= 0.5 ? cog : null,
+    };
+  }
+}
+
+// Debounced tack alarm (same as alarm.py)
+class TackAlarm {
+  constructor(marginOn = 0.3, marginOff = 0.0, minDwell = 10.0,
+              maxToggles = 6, windowS = 60.0) {
+    this.marginOn = marginOn; this.marginOff = marginOff; this.minDwell = minDwell;
+    this.maxToggles = maxToggles; this.windowS = windowS;
+    this.on = false; this.since = -Infinity; this.toggles = [];
+  }
+  // t in seconds, ETAs in minutes (NaN/Infinity when there is no VMG)
+  update(t, eta, etaVirtual) {
+    const gain = (isFinite(eta) && isFinite(etaVirtual)) ? eta - etaVirtual : -Infinity;
+    const want = this.on ? gain >= this.marginOff : gain > this.marginOn;
+    if (want === this.on || t - this.since < this.minDwell) return this.on;
+    if (this.maxToggles !== null) {
+      while (this.toggles.length && t - this.toggles[0] >= this.windowS) this.toggles.shift();
+      if (this.toggles.length >= this.maxToggles) return this.on;
+      this.toggles.push(t);
+    }
+    this.on = want;
+    this.since = t;
+    return this.on;
+  }
+}
+
+// Route progress (same as course.py)
+class CourseTracker {
+  // marks: [[name, lat, lon], ...]
+  constructor(marks, radius = 50.0, tau = 60.0) {
+    this.marks = marks; this.radius = radius; this.tau = tau;
+    this.rest = new Array(marks.length).fill(0);
+    for (let i = marks.length - 2; i >= 0; i--) {
+      this.rest[i] = this.rest[i + 1] + haversine(marks[i][1], marks[i][2], marks[i + 1][1], marks[i + 1][2]);
+    }
+    this.leg = 0; this.speed = NaN; this.tLast = null;
+  }
+  get finished() { return this.leg >= this.marks.length; }
+  get mark() { return this.finished ? null : this.marks[this.leg]; }
+  // t in seconds, sog in knots; returns true when a mark was just rounded
+  update(t, lat, lon, sog) {
+    if (isFinite(sog)) {
+      const a = this.tLast === null ? 1 : 1 - Math.exp(-(t - this.tLast) / this.tau);
+      this.speed = isNaN(this.speed) ? sog : this.speed + a * (sog - this.speed);
+    }
+    this.tLast = t;
+    if (this.finished) return false;
+    const m = this.marks[this.leg];
+    if (haversine(lat, lon, m[1], m[2]) > this.radius) return false;
+    this.leg += 1;
+    return true;
+  }
+  // Minutes for the legs after the current one, at the average speed
+  etaRest() {
+    const rest = this.finished ? 0 : this.rest[this.leg];
+    if (rest === 0) return 0;
+    return this.speed > MIN_VMG ? rest / (this.speed * KN_TO_MS) / 60 : Infinity;
+  }
+}
+
+// True wind from tacks and gybes (same as wind.py)
+function circularMean(degs) {
+  let s = 0, c = 0;
+  for (const d of degs) { s += Math.sin(d * Math.PI / 180); c += Math.cos(d * Math.PI / 180); }
+  return (Math.atan2(s, c) * 180 / Math.PI + 360) % 360;
+}
+
+class WindEstimator {
+  constructor(windowS = 900.0) {
+    this.windowS = windowS; this.events = []; this.seg = null; this.prev = null; this.turnMin = Infinity;
+  }
+  get twd() { return this.events.length ? circularMean(this.events.map((e) => e[1])) : null; }
+  heading(seg) { return (Math.atan2(seg.sin, seg.cos) * 180 / Math.PI + 360) % 360; }
+  // t in seconds, sog in knots, cog null when unknown; returns the wind direction or null
+  update(t, sog, cog) {
+    while (this.events.length > 1 && t - this.events[0][0] > this.windowS) this.events.shift();
+    if (cog === null || !isFinite(cog)) return this.twd;
+    const D = Math.PI / 180;
+    let seg = this.seg;
+    if (seg !== null && angleDiff(cog, this.heading(seg)) <= 25.0) {
+      seg.t1 = t; seg.sin += Math.sin(cog * D); seg.cos += Math.cos(cog * D); seg.sog += sog; seg.n += 1;
+    } else {
+      if (seg !== null && seg.t1 - seg.t0 >= 20.0) {
+        this.prev = [this.heading(seg), seg.t1, seg.sog / seg.n];
+        this.turnMin = Infinity;
+      }
+      seg = this.seg = { t0: t, t1: t, sin: Math.sin(cog * D), cos: Math.cos(cog * D), sog: sog, n: 1, checked: false };
+    }
+    this.turnMin = Math.min(this.turnMin, sog);
+    if (!seg.checked && seg.t1 - seg.t0 >= 20.0) {
+      seg.checked = true;
+      if (this.prev !== null && seg.t0 - this.prev[1] <= 45.0) {
+        this.maneuver(t, this.prev, [this.heading(seg), seg.t1, seg.sog / seg.n]);
+      }
+    }
+    return this.twd;
+  }
+  maneuver(t, before, after) {
+    const turn = angleDiff(before[0], after[0]);
+    if (turn < 50.0 || turn > 120.0) return;
+    const bisector = circularMean([before[0], after[0]]);
+    const twd = this.twd;
+    const tack = twd !== null ? angleDiff(bisector, twd) < 90
+      : this.turnMin < 0.8 * (before[2] + after[2]) / 2 || turn > 80.0;
+    if (twd !== null && angleDiff(bisector, tack ? twd : (twd + 180) % 360) > 30.0) return;
+    this.events.push([t, tack ? bisector : (bisector + 180) % 360, turn, tack]);
+    if (this.events.length > 32) this.events.shift();
+  }
+}
+
+// Fix latency histograms (same buckets as telemetry.py)
+class LatencyHistogram {
+  constructor() { this.counts = new Map(); }
+  record(ms) {
+    const us = Math.min(Math.max(Math.round(ms * 1000), 0), 3600000000);
+    const shift = Math.max(Math.floor(Math.log2(us || 1)) + 1 - 6, 0);
+    const idx = shift === 0 ? us : shift * 32 + Math.floor(us / 2 ** shift);
+    this.counts.set(idx, (this.counts.get(idx) || 0) + 1);
+  }
+  pairs() { return [...this.counts]; }
+}
+
+// One timer per fix: begin() in the watchPosition callback returns it, it
+// travels with the fix (to the navigation worker and back), lap(timer, stage)
+// after each stage, end(timer) once gps-output is written (total = next
+// frame). Fixes overlap when the worker is slow, so each keeps its own.
+const telemetry = {
+  stages: {},
+  drops: { acc: 0, jump: 0, skip: 0 },
+  fixes: 0,
+
+  record(stage, ms) {
+    (this.stages[stage] = this.stages[stage] || new LatencyHistogram()).record(ms);
+  },
+  begin() {
+    this.fixes += 1;
+    const now = performance.now();
+    return { t0: now, last: now };
+  },
+  lap(timer, stage) {
+    const now = performance.now();
+    this.record(stage, now - timer.last);
+    timer.last = now;
+  },
+  drop(reason) {
+    this.drops[reason] += 1;
+  },
+  end(timer) {
+    // A hidden tab gets no frames until it is shown again
+    if (!document.hidden) requestAnimationFrame(() => this.record("total", performance.now() - timer.t0));
+  },
+  snapshot() {
+    const stages = {};
+    for (const name in this.stages) stages[name] = this.stages[name].pairs();
+    return { fixes: this.fixes, drops: this.drops, stages: stages };
+  },
+};
+
+// Adaptive fix sampling (same as sampling.py)
+class SamplingController {
+  constructor(intervals = [1.0, 2.0, 4.0, 8.0], stableS = 20.0, idleInterval = 15.0,
+              idleSog = 1.0, nearMark = 300.0, hdgTol = 20.0, sogTol = 1.5, gps = true) {
+    this.intervals = intervals; this.stableS = stableS; this.idleInterval = idleInterval; this.idleSog = idleSog;
+    this.nearMark = nearMark; this.hdgTol = hdgTol; this.sogTol = sogTol; this.gps = gps;
+    this.level = 0; this.since = null; this.last = null; this.interval = intervals[0];
+    this.t = null; this.sog = 0; this.sin = 0; this.cos = 0;
+  }
+  smooth(t, sog, cog) {
+    const a = this.t === null ? 1 : Math.min((t - this.t) / 5.0, 1);
+    this.t = t;
+    this.sog += a * (sog - this.sog);
+    if (cog === null || isNaN(cog)) {
+      this.sin = this.cos = 0;
+    } else if (this.sin === 0 && this.cos === 0) {
+      this.sin = Math.sin(cog * Math.PI / 180); this.cos = Math.cos(cog * Math.PI / 180);
+    } else {
+      this.sin += a * (Math.sin(cog * Math.PI / 180) - this.sin);
+      this.cos += a * (Math.cos(cog * Math.PI / 180) - this.cos);
+    }
+    cog = (this.sin === 0 && this.cos === 0) ? null : (Math.atan2(this.sin, this.cos) * 180 / Math.PI + 360) % 360;
+    return [this.sog, cog];
+  }
+  // One filtered fix (t s, sog kn, cog null/NaN when unknown, dist m); true to compute and render it
+  update(t, sog, cog, dist) {
+    [sog, cog] = this.smooth(t, sog, cog);
+    if (this.last === null) {
+      this.last = [t, sog, cog]; this.since = t;
+      return true;
+    }
+    const [t0, sog0, cog0] = this.last;
+    const changed = Math.abs(sog - sog0) > this.sogTol || (cog === null) !== (cog0 === null) ||
+                    (cog !== null && cog0 !== null && angleDiff(cog, cog0) > this.hdgTol);
+    if (sog < this.idleSog && !changed) {
+      this.level = 0; this.since = t;
+      this.interval = this.idleInterval;
+    } else {
+      if (changed || dist < this.nearMark) {
+        this.level = 0; this.since = t;
+      } else if (t - this.since >= this.stableS && this.level < this.intervals.length - 1) {
+        this.level += 1; this.since = t;
+      }
+      this.interval = this.intervals[this.level];
+    }
+    if (changed || t - t0 >= this.interval) {
+      this.last = [t, sog, cog];
+      return true;
+    }
+    return false;
+  }
+  // Seconds the GPS can sleep after a computed fix (0: keep watching)
+  pause() {
+    return (!this.gps || this.interval < 8.0) ? 0 : this.interval - 2.0;
+  }
+}
+
+// Per-fix navigation (same as navcore.py); runs in nav_worker.js
+const ACC_THRESHOLD = 20.0;
+
+class NavCore {
+  constructor(settings = {}) {
+    this.settings = {}; this.course = null; this.alarm = null;
+    this.configure(settings);
+    this.start();
+  }
+  configure(settings) {
+    const old = this.settings;
+    this.settings = settings;
+    if (this.alarm === null || JSON.stringify(old.alarm) !== JSON.stringify(settings.alarm)) {
+      const a = settings.alarm || {};
+      this.alarm = new TackAlarm(a.margin_on, a.margin_off, a.min_dwell, a.max_toggles, a.window);
+    }
+    if (JSON.stringify(old.route) !== JSON.stringify(settings.route) ||
+        (this.course === null && settings.route && settings.route.length)) {
+      this.course = (settings.route && settings.route.length) ? new CourseTracker(settings.route) : null;
+    }
+    const marks = settings.marks || [];
+    this.names = marks.map((m) => m[0]);
+    this.markLat = marks.map((m) => m[1]);
+    this.markLon = marks.map((m) => m[2]);
+  }
+  start() {
+    this.kf = new KalmanCV();
+    this.wind = new WindEstimator();
+    this.sampler = this.settings.sampling === false ? null : new SamplingController();
+  }
+  // One raw fix (t in seconds); kind: acc, jump, skip, finished or fix
+  update(t, lat, lon, acc) {
+    if (acc > ACC_THRESHOLD) return { kind: "acc", acc: acc };
+    const fix = this.kf.update(t, lat, lon, acc);
+    if (!fix) return { kind: "jump" };
+    const sog = fix.sog, cog = fix.cog;
+
+    let wp = this.settings.waypoint;
+    const c = this.course;
+    if (c) {
+      c.update(t, fix.lat, fix.lon, sog);
+      if (c.finished) return { kind: "finished" };
+      wp = [c.mark[1], c.mark[2]];
+    }
+    const twd = this.wind.update(t, sog, cog);
+    let pause = 0;
+    if (this.sampler) {
+      if (!this.sampler.update(t, sog, cog, haversine(fix.lat, fix.lon, wp[0], wp[1]))) return { kind: "skip" };
+      if (this.settings.gps_pause !== false) pause = this.sampler.pause();
+    }
+
+    const tackAngle = this.settings.tack_angle === undefined ? 90.0 : this.settings.tack_angle;
+    const r = evaluate(fix.lat, fix.lon, sog, cog, twd, [wp[0], ...this.markLat], [wp[1], ...this.markLon], tackAngle);
+    const eta = r.eta[0], etaV = r.etaVirtual[0], virt = r.virtualCourse[0];
+    const known = cog !== null && !isNaN(cog);
+    return {
+      kind: "fix",
+      t: t, sog: sog, cog: known ? cog : null, twd: twd,
+      bearing: r.bearing[0], dist: r.dist[0], eta: eta,
+      virtual_course: virt, eta_virtual: etaV,
+      tack: (twd !== null && known) ? angleDiff(cog, virt) : tackAngle,
+      leg: c ? [c.leg + 1, c.marks.length] : null,
+      mark: c ? c.mark[0] : null,
+      eta_total: c ? eta + c.etaRest() : null,
+      alarm: this.alarm.update(t, eta, etaV),
+      pause: pause,
+      marks: this.names.map((name, i) => [name, r.dist[i + 1], r.eta[i + 1], r.etaVirtual[i + 1]]),
+    };
+  }
+  // Worker protocol (browser only): {type: "configure", settings}, {type: "start"},
+  // {type: "fix", t, lat, lon, acc, timer} -> the update's result plus ms, its run
+  // time, and the fix's telemetry timer as it came (the page's clock, not ours)
+  handle(msg) {
+    if (msg.type === "configure") this.configure(msg.settings);
+    else if (msg.type === "start") this.start();
+    else if (msg.type === "fix") {
+      const t0 = performance.now();
+      const r = this.update(msg.t, msg.lat, msg.lon, msg.acc);
+      r.ms = performance.now() - t0;
+      r.timer = msg.timer;
+      return r;
+    }
+    return null;
+  }
+}
@@ -0,0 +1,10 @@
+// --- Navigation worker: the tracker's per-fix math off the main thread ---
+// NavCore (navcore.py, in core.js) answers every message of tracker.js;
+// the page only renders what comes back.
+importScripts("core.js");
+
+const core = new NavCore();
+onmessage = (event) => {
+  const result = core.handle(event.data);
+  if (result !== null) postMessage(result);
+};
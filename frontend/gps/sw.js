@@ -0,0 +1,52 @@
+// --- Service worker: the tracker keeps working without a connection ---
+// Its scope is the component directory (frontend/gps as Streamlit serves
+// it). Static files come straight from the cache and are refreshed in the
+// background (stale-while-revalidate), so offline.html opens from cache on
+// the water and picks up new versions once online. Fife.ogg is cross-origin
+// without CORS: it is cached opaque, which <audio> can still play.
+const CACHE = "vmg-gps-v1";
+const FIFE_URL = "https://upload.wikimedia.org/wikipedia/commons/8/8a/Fife.ogg";
+const ASSETS = ["index.html", "offline.html", "core.js", "uplink.js", "tracker.js", "nav_worker.js", "marks.json", "manifest.json"];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(CACHE);
+    await cache.addAll(ASSETS);
+    try {
+      await cache.put(FIFE_URL, await fetch(FIFE_URL, { mode: "no-cors" }));
+    } catch (err) {
+      // Installed offline: tracker.js plays the synthesized fife instead
+    }
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil((async () => {
+    for (const key of await caches.keys()) if (key !== CACHE) await caches.delete(key);
+    await self.clients.claim();
+  })());
+});
+
+self.addEventListener("fetch", (event) => {
+  const req = event.request;
+  if (req.method !== "GET") return;
+  if (req.url === FIFE_URL) {
+    event.respondWith(caches.match(FIFE_URL).then((hit) => hit || fetch(req)));
+    return;
+  }
+  if (!req.url.startsWith(self.registration.scope)) return;
+  event.respondWith((async () => {
+    const cache = await caches.open(CACHE);
+    const hit = await cache.match(req, { ignoreSearch: true });
+    const fresh = fetch(req).then((res) => {
+      if (res.ok) cache.put(req, res.clone());
+      return res;
+    });
+    if (hit) {
+      event.waitUntil(fresh.catch(() => {}));
+      return hit;
+    }
+    return fresh;
+  })());
+});
@@ -0,0 +1,305 @@
+// --- VMG tracker UI (FANPI / PÍFANO pages) ---
+// Settings come from the page's `tracker` argument and are swapped in place
+// on every rerun, so changing the waypoint does not restart the GPS watch.
+// The per-fix math runs in nav_worker.js (NavCore, navcore.py); this file
+// only renders what it sends back and plays the pífano.
+const FIFE_URL = "https://upload.wikimedia.org/wikipedia/commons/8/8a/Fife.ogg";  // cached by sw.js
+
+// Stand-in pífano when Fife.ogg cannot be loaded (offline before it was
+// ever cached): a fife-like D6 trill from the Web Audio API
+const synthFife = {
+  ctx: null,
+  osc: null,
+  trill: null,
+
+  play() {
+    if (this.osc) return;
+    this.ctx = this.ctx || new (window.AudioContext || window.webkitAudioContext)();
+    const gain = this.ctx.createGain();
+    const depth = this.ctx.createGain();
+    this.osc = this.ctx.createOscillator();
+    this.trill = this.ctx.createOscillator();
+    this.osc.type = "triangle";
+    this.osc.frequency.value = 1175;
+    this.trill.frequency.value = 6;
+    depth.gain.value = 60;
+    this.trill.connect(depth).connect(this.osc.frequency);
+    gain.gain.value = 0.3;
+    this.osc.connect(gain).connect(this.ctx.destination);
+    this.osc.start();
+    this.trill.start();
+  },
+
+  stop() {
+    if (!this.osc) return;
+    this.osc.stop();
+    this.trill.stop();
+    this.osc = null;
+  },
+};
+
+// --- gps-output: built once, then only the numbers that changed ---
+// Each layout is a list of lines; `{key}` is a text node the tracker fills
+// with an already formatted value (so 5.23 -> 5.24 kn is no change at 1
+// decimal). A line with a null value is hidden; the tracker's `marks` add
+// one line each. Writes wait for the next animation frame, where the latest
+// values of all the fixes since are applied at once.
+const LAYOUTS = {
+  full: [
+    "<b>{time}</b>",
+    "Tramo {leg}: {mark} | ETA total: {etaTotal} min",
+    "Rumbo Real: {hdg}°| Velocidad: {sog} kn",
+    "Rumbo al waypoint: {bearing}°| Tiempo al waypoint: {eta} min",
+    "Rumbo si viramos {tack} grados: {virtual}° | Tiempo al waypoint con el nuevo rumbo: {etaTack} min",
+    "Viento estimado: {twd}°",
+  ],
+  compact: [
+    "<b>{time}</b>",
+    "Tramo {leg}: {mark} | ETA total: {etaTotal} min",
+    "Rumbo Real: {hdg}° | Velocidad: {sog} kn",
+    "ETA actual: {eta} min | ETA si viras {tack}°: {etaTack} min",
+    "Viento estimado: {twd}°",
+  ],
+};
+
+const view = {
+  layout: null,
+  names: null,    // JSON of the mark names the lines were built for
+  msg: null,      // status line (waiting, stopped, errors), shown instead of the numbers
+  panel: null,
+  lines: [],      // [element, keys]
+  nodes: {},      // key -> text node
+  shown: {},      // key -> text on screen
+  values: {},     // key -> text for the next frame
+  message: null,  // [text, bold] for the next frame, null: the numbers
+  frame: null,
+
+  stale(settings) {
+    return this.layout !== settings.layout || this.names !== JSON.stringify((settings.marks || []).map((m) => m[0]));
+  },
+
+  build(settings) {
+    const output = document.getElementById("gps-output");
+    const marks = settings.marks || [];
+    this.layout = settings.layout;
+    this.names = JSON.stringify(marks.map((m) => m[0]));
+    output.textContent = "";
+    this.msg = output.appendChild(document.createElement("div"));
+    this.msg.style.whiteSpace = "pre-line";
+    this.panel = output.appendChild(document.createElement("div"));
+    this.lines = [];
+    this.nodes = {};
+    this.shown = {};
+    const templates = (LAYOUTS[settings.layout] || LAYOUTS.full).concat(
+      marks.map((m, i) => `{m${i}}: {m${i}dist} | ETA {m${i}eta} min | virando {m${i}etaTack} min`));
+    for (const template of templates) {
+      const line = this.panel.appendChild(document.createElement("div"));
+      line.innerHTML = template.replace(/\{(\w+)\}/g, '<span data-key="$1"></span>');
+      const keys = [];
+      for (const span of line.querySelectorAll("span[data-key]")) {
+        keys.push(span.dataset.key);
+        this.nodes[span.dataset.key] = span.appendChild(document.createTextNode(""));
+      }
+      this.lines.push([line, keys]);
+    }
+    this.schedule();
+  },
+
+  show(values) {
+    Object.assign(this.values, values);
+    this.message = null;
+    this.schedule();
+  },
+
+  say(text, bold = false) {
+    this.message = [text, bold];
+    this.schedule();
+  },
+
+  schedule() {
+    if (this.frame === null) this.frame = requestAnimationFrame(() => this.flush());
+  },
+
+  flush() {
+    this.frame = null;
+    if (this.message !== null) {
+      this.msg.textContent = this.message[0];
+      this.msg.style.fontWeight = this.message[1] ? "bold" : "";
+      this.msg.style.display = "";
+      this.panel.style.display = "none";
+    } else {
+      for (const key in this.nodes) {
+        const text = this.values[key] === undefined ? null : this.values[key];
+        if (text !== null && text !== this.shown[key]) this.nodes[key].nodeValue = text;
+        this.shown[key] = text;
+      }
+      for (const [line, keys] of this.lines) {
+        const display = keys.some((k) => this.shown[k] === null) ? "none" : "";
+        if (line.style.display !== display) line.style.display = display;
+      }
+      this.msg.style.display = "none";
+      this.panel.style.display = "";
+    }
+    setFrameHeight();  // uplink.js
+  },
+};
+
+const fmt = (x, digits) => isFinite(x) ? x.toFixed(digits) : "∞";
+const fmtDist = (m) => m < 1000 ? `${m.toFixed(0)} m` : `${(m / 1000).toFixed(1)} km`;
+
+const tracker = {
+  settings: null,  // {waypoint: [lat, lon], route: [[name, lat, lon], ...], marks: [[name, lat, lon], ...],
+                   //  tack_angle, layout, audio, alarm, sampling, gps_pause}
+  worker: null,    // nav_worker.js
+  core: null,      // NavCore in the page, when there are no workers
+  inflight: [],    // fix messages posted to the worker and not answered yet, oldest first
+  onPause: null,   // set by the page: stop the GPS watch for that many seconds (sampling.py)
+  audio: null,
+  active: false,
+
+  configure(settings) {
+    if (view.layout !== null && view.stale(settings)) view.build(settings);
+    this.settings = settings;
+    if (settings.audio && this.audio === null) {
+      // 🎵 Pífano audio setup
+      this.audio = new Audio(FIFE_URL);
+      this.audio.loop = true; // constant sound when active
+      this.audio.volume = 0.6;
+    }
+    this.send({ type: "configure", settings: settings });
+  },
+
+  connect() {
+    try {
+      this.worker = new Worker("nav_worker.js");
+      this.worker.onmessage = (event) => {
+        this.inflight.shift();  // the worker answers fixes in order, and only fixes
+        this.onResult(event.data);
+      };
+      this.worker.onerror = (event) => {
+        console.warn("Navigation worker failed, computing in the page:", event.message);
+        this.worker.terminate();
+        this.worker = null;
+        // The new core only has the settings: restart the session and redo
+        // the fixes the worker never answered
+        const lost = this.inflight;
+        this.inflight = [];
+        this.core = new NavCore(this.settings);
+        if (this.active) this.send({ type: "start" });
+        for (const msg of lost) this.send(msg);
+      };
+    } catch (err) {
+      this.core = new NavCore();
+    }
+  },
+
+  // To NavCore, in the worker or in the page (see navcore.py for the messages)
+  send(msg) {
+    if (this.worker === null && this.core === null) this.connect();
+    if (this.worker !== null) {
+      this.worker.postMessage(msg);
+      if (msg.type === "fix") this.inflight.push(msg);
+    } else this.onResult(this.core.handle(msg));
+  },
+
+  start() {
+    if (view.stale(this.settings)) view.build(this.settings);
+    view.say("📡 Waiting for GPS signal...");
+    this.send({ type: "start" });  // new Kalman filter, wind estimate and sampler
+    this.active = true;
+  },
+
+  stop() {
+    this.active = false;
+    this.silence();
+    view.say("Tracking stopped.", true);
+  },
+
+  silence() {
+    synthFife.stop();
+    if (this.audio && !this.audio.paused) {
+      this.audio.pause();
+      this.audio.currentTime = 0;
+    }
+  },
+
+  onError(err) {
+    if (view.layout === null) view.build(this.settings);
+    view.say("❌ " + err.message);
+  },
+
+  // timer: this fix's telemetry timer, sent along and answered back with the result
+  onFix(pos, timer) {
+    const c = pos.coords;
+    this.send({ type: "fix", t: pos.timestamp / 1000, lat: c.latitude, lon: c.longitude, acc: c.accuracy,
+                timer: timer });
+  },
+
+  onResult(r) {
+    if (r === null || !this.active) return;
+    const timer = r.timer;
+    telemetry.record("nav", r.ms);
+    telemetry.lap(timer, "worker");  // since the uplink: the round trip, nav included
+
+    if (r.kind === "acc") {
+      telemetry.drop("acc");
+      view.say(`⏳ Waiting for accurate fix (±${r.acc.toFixed(1)} m)...`);
+      return;
+    }
+    if (r.kind === "jump") {
+      telemetry.drop("jump");
+      console.warn("⚠️ Ignored unrealistic GPS jump");
+      return;
+    }
+    if (r.kind === "skip") {
+      telemetry.drop("skip");  // steady leg or moored: the last numbers stay on screen
+      return;
+    }
+    const time = new Date().toLocaleTimeString();
+    if (r.kind === "finished") {
+      this.silence();
+      view.say(`${time}\n🏁 Recorrido terminado`);
+      telemetry.end(timer);
+      return;
+    }
+
+    // 🎶 --- SOUND LOGIC --- (debounced in NavCore: see alarm.py)
+    if (this.settings.audio) {
+      if (r.alarm) {
+        if (this.audio.paused) {
+          this.audio.play().catch(err => {
+            console.warn("Audio play failed:", err);
+            synthFife.play();
+          });
+        }
+      } else {
+        this.silence();
+      }
+    }
+
+    const values = {
+      time: time,
+      leg: r.leg ? `${r.leg[0]}/${r.leg[1]}` : null,
+      mark: r.mark,
+      etaTotal: r.eta_total === null ? null : fmt(r.eta_total, 1),
+      hdg: r.cog !== null ? r.cog.toFixed(0) : "—",  // 0° is north, not unknown
+      sog: r.sog.toFixed(1),
+      bearing: r.bearing.toFixed(0),
+      eta: fmt(r.eta, 1),
+      tack: r.tack.toFixed(0),
+      virtual: isNaN(r.virtual_course) ? "—" : r.virtual_course.toFixed(0),
+      etaTack: fmt(r.eta_virtual, 1),
+      twd: r.twd !== null ? r.twd.toFixed(0) : null,
+    };
+    r.marks.forEach(([name, dist, eta, etaVirtual], i) => {
+      values[`m${i}`] = name;
+      values[`m${i}dist`] = fmtDist(dist);
+      values[`m${i}eta`] = fmt(eta, 1);
+      values[`m${i}etaTack`] = fmt(etaVirtual, 1);
+    });
+    view.show(values);
+    telemetry.lap(timer, "render");
+    telemetry.end(timer);
+    if (r.pause > 0 && this.onPause) this.onPause(r.pause);
+  },
+};
@@ -0,0 +1,221 @@
+// --- Streamlit component protocol (no build step needed) ---
+function sendMessage(type, data) {
+  window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data), "*");
+}
+
+function setValue(value) {
+  sendMessage("streamlit:setComponentValue", { value: value, dataType: "json" });
+}
+
+let frameHeight = 0;
+function setFrameHeight() {
+  const height = document.body.scrollHeight;
+  if (height === frameHeight) return;  // one message per size change, not per fix
+  frameHeight = height;
+  sendMessage("streamlit:setFrameHeight", { height: height });
+}
+
+// --- Local fix buffer (IndexedDB) ---
+// Every batch is written here before it is sent and deleted once Python
+// acknowledges it, so fixes taken offline, or before the phone killed the
+// tab, are uploaded the next time a page with the uplink loads.
+const fixStore = {
+  db: null,
+
+  open() {
+    if (this.db === null) {
+      this.db = new Promise((resolve, reject) => {
+        const req = indexedDB.open("vmg-gps", 1);
+        req.onupgradeneeded = () => req.result.createObjectStore("batches", { keyPath: ["stream", "seq"] });
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+      });
+    }
+    return this.db;
+  },
+
+  async run(mode, fn) {
+    const db = await this.open();
+    return new Promise((resolve, reject) => {
+      const tx = db.transaction("batches", mode);
+      const req = fn(tx.objectStore("batches"));
+      tx.oncomplete = () => resolve(req.result);
+      tx.onerror = () => reject(tx.error);
+    });
+  },
+
+  put(stream, seq, fixes) {
+    return this.run("readwrite", (s) => s.put({ stream: stream, seq: seq, fixes: fixes }));
+  },
+
+  remove(stream, upTo) {
+    return this.run("readwrite", (s) => s.delete(IDBKeyRange.bound([stream, 0], [stream, upTo])));
+  },
+
+  all() {
+    return this.run("readonly", (s) => s.getAll());
+  },
+};
+
+// --- Fix batching ---
+// Fixes are coalesced until there are `batchSize` of them or the oldest one
+// is `batchMs` old, then sent as one compressed message. Batches stay queued
+// (and are re-sent) until Python acknowledges them through the `ack`
+// argument, so a rerun that misses a value loses nothing.
+//
+// The stream id lives in sessionStorage: a reload of the tab carries on the
+// same stream (and the same track on the Python side), a new tab starts
+// another. Batches of other streams found in IndexedDB are sent first, one
+// stream at a time, at most MAX_BATCHES per message.
+const uplink = {
+  COLS: ["t", "lat", "lon", "acc", "spd", "hdg"],
+  ROUND: [1e3, 1e7, 1e7, 1e1, 1e2, 1e1],  // ms, ~1 cm, dm, cm/s, 0.1°
+  MAX_BATCHES: 50,
+  RESEND_MS: 5000,
+
+  batchSize: 10,
+  batchMs: 10000,
+  compress: true,
+  connected: window.parent !== window,  // false in the standalone offline page: buffer only
+  enabled: false,                       // the page wants fixes (its `upload` argument)
+  pending: null,  // {seq, fixes} being filled
+  timer: null,
+  queues: new Map(),  // stream -> [{seq, fixes}], oldest stream first
+  inflight: null,     // [stream, last seq] of the last message
+  sentAt: 0,
+  stream: null,
+  seq: 0,
+  sent: 0,  // fixes acknowledged
+  ready: null,
+
+  init() {
+    this.stream = sessionStorage.getItem("vmg-gps-stream");
+    if (this.stream === null) {
+      this.stream = Math.random().toString(36).slice(2);
+      sessionStorage.setItem("vmg-gps-stream", this.stream);
+    }
+    this.ready = fixStore.all().then((batches) => {
+      batches.sort((a, b) => a.fixes[0][0] - b.fixes[0][0] || a.seq - b.seq);
+      for (const b of batches) {
+        if (!this.queues.has(b.stream)) this.queues.set(b.stream, []);
+        this.queues.get(b.stream).push({ seq: b.seq, fixes: b.fixes });
+      }
+    }).catch((err) => console.warn("No local fix buffer:", err));
+    this.ready.then(() => {
+      // Our own stream goes last, after whatever an earlier tab left behind
+      const own = this.queues.get(this.stream) || [];
+      this.queues.delete(this.stream);
+      this.queues.set(this.stream, own);
+      this.send();
+    });
+    window.addEventListener("online", () => this.send());
+  },
+
+  configure(args) {
+    this.batchSize = args.batch_size || this.batchSize;
+    this.batchMs = args.batch_ms || this.batchMs;
+    this.compress = args.compress !== false;
+    this.enabled = args.upload !== false;
+    this.ready.then(() => this.onAck(args.ack));
+  },
+
+  onAck(ack) {
+    if (ack && this.queues.has(ack[0])) {
+      const all = this.queues.get(ack[0]);
+      const q = all.filter((b) => b.seq > ack[1]);
+      for (const b of all) if (b.seq <= ack[1]) this.sent += b.fixes.length;
+      if (q.length || ack[0] === this.stream) this.queues.set(ack[0], q);
+      else this.queues.delete(ack[0]);
+      fixStore.remove(ack[0], ack[1]).catch(() => {});
+    }
+    if (ack && this.inflight && ack[0] === this.inflight[0] && ack[1] >= this.inflight[1]) this.inflight = null;
+    // Next message: right away once the last one is acknowledged, else after RESEND_MS
+    if (this.inflight === null || Date.now() - this.sentAt > this.RESEND_MS) this.send();
+    else this.showStatus();
+  },
+
+  round(v, k) {
+    return (v === null || v === undefined || isNaN(v)) ? null : Math.round(v * k) / k;
+  },
+
+  toColumns(fixes) {
+    const cols = {};
+    this.COLS.forEach((name, j) => { cols[name] = fixes.map((f) => this.round(f[j], this.ROUND[j])); });
+    return cols;
+  },
+
+  async encode(cols) {
+    const json = JSON.stringify(cols);
+    if (!this.compress || typeof CompressionStream === "undefined") return { enc: "json", data: cols };
+    const gz = new Blob([json]).stream().pipeThrough(new CompressionStream("gzip"));
+    const buf = new Uint8Array(await new Response(gz).arrayBuffer());
+    let bin = "";
+    for (let i = 0; i < buf.length; i += 0x8000) {
+      bin += String.fromCharCode.apply(null, buf.subarray(i, i + 0x8000));
+    }
+    return { enc: "gzip", data: btoa(bin) };
+  },
+
+  queued() {
+    let n = 0;
+    for (const q of this.queues.values()) for (const b of q) n += b.fixes.length;
+    return n;
+  },
+
+  showStatus() {
+    const status = document.getElementById("gps-status");
+    const queued = this.queued();
+    if (status) status.textContent = `📼 ${this.sent} fixes sent` + (queued ? `, ${queued} buffered` : "");
+  },
+
+  async flush() {
+    clearTimeout(this.timer);
+    this.timer = null;
+    const batch = this.pending;
+    this.pending = null;
+    if (batch !== null) {
+      await this.ready;
+      this.queues.get(this.stream).push(batch);
+    }
+    // Waiting on another stream's backlog: ours goes after its ack
+    if (this.inflight === null || this.inflight[0] === this.stream) await this.send();
+  },
+
+  async send() {
+    await this.ready;
+    if (!this.enabled || !this.connected || !navigator.onLine) return this.showStatus();
+    for (const [stream, q] of this.queues) {
+      if (!q.length) continue;
+      const batches = q.slice(0, this.MAX_BATCHES);
+      const fixes = [].concat(...batches.map((b) => b.fixes));
+      const payload = await this.encode(this.toColumns(fixes));
+      this.inflight = [stream, batches[batches.length - 1].seq];
+      this.sentAt = Date.now();
+      const stats = Object.assign({ stream: this.stream }, telemetry.snapshot());  // core.js: fix latencies
+      setValue(Object.assign({ stream: stream, batches: batches.map((b) => [b.seq, b.fixes.length]), telemetry: stats },
+                             payload));
+      break;
+    }
+    this.showStatus();
+  },
+
+  // pos: a GeolocationPosition
+  addFix(pos) {
+    const c = pos.coords;
+    // [t, lat, lon, acc, spd, hdg] — null for values the phone does not give
+    if (this.pending === null) {
+      // Time-based, so a reloaded tab never reuses the seq of a buffered batch
+      this.seq = Math.max(this.seq + 1, Date.now());
+      this.pending = { seq: this.seq, fixes: [] };
+    }
+    this.pending.fixes.push([pos.timestamp / 1000, c.latitude, c.longitude, c.accuracy, c.speed, c.heading]);
+    fixStore.put(this.stream, this.pending.seq, this.pending.fixes).catch(() => {});
+    if (this.pending.fixes.length >= this.batchSize) {
+      this.flush();
+    } else if (this.timer === null) {
+      this.timer = setTimeout(() => this.flush(), this.batchMs);
+    }
+  },
+};
+
+uplink.init();
@@ -0,0 +1,215 @@
+"""Geodesy backends for ``nav.distance`` / ``nav.bearing``.
+
+Three ways to get distance and initial bearing between lat/lon points, all
+NumPy and broadcasting like nav.py:
+
+* ``LocalProjection`` — an equirectangular (local east/north) projection
+  about an origin in the sailing area, with the WGS-84 radii of curvature
+  and their variation with latitude precomputed there. A pair costs a
+  square root and an ``arctan2``, no sines or cosines. Against WGS-84, for
+  legs up to 30 km within 100 km of the origin: distance within 0.05 m,
+  bearing within 0.005°. The error grows with the square of the leg
+  length and with the distance to the origin: it is for racing in one
+  area, not for passages.
+* ``Haversine`` — the spherical formula the pages have always used
+  (R = 6371 km). Against WGS-84 the distance is off by up to 0.56 %
+  (0.2–0.3 % in the Ría de Arousa) and the bearing by up to 0.2° on legs
+  under 3000 km.
+* ``Vincenty`` — Vincenty's inverse on the WGS-84 ellipsoid, iterated to
+  1e-12 rad: 0.5 mm. It does not converge for nearly antipodal points;
+  those pairs fall back to Karney's algorithm when geographiclib is
+  installed, and to haversine when it is not.
+
+``nav.set_geodesy`` picks the backend of the process; bench.py measures the
+speed and the error of each one.
+"""
+import numpy as np
+
+R_SPHERE = 6371000.0              # meters, mean Earth radius (haversine)
+WGS84_A = 6378137.0               # meters, semi-major axis
+WGS84_F = 1 / 298.257223563       # flattening
+WGS84_B = WGS84_A * (1 - WGS84_F)
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+RIA_DE_AROUSA = (42.57, -8.90)    # default origin of the local projection
+VINCENTY_TOL = 1e-12              # radians
+VINCENTY_ITER = 200
+
+
+def _bearing_deg(y, x):
+    b = np.degrees(np.arctan2(y, x))
+    return b + 360 * (b < 0)  # cheaper than % 360 on big arrays
+
+
+def _norm(dx, dy):
+    return np.sqrt(dx * dx + dy * dy)  # np.hypot is several times slower, and nothing here overflows
+
+
+# --- Spherical ---
+class Haversine:
+    name = "haversine"
+
+    def __init__(self, radius=R_SPHERE):
+        self.radius = radius
+
+    def distance(self, lat1, lon1, lat2, lon2):
+        """Haversine distance in meters."""
+        φ1 = np.radians(lat1)
+        φ2 = np.radians(lat2)
+        dφ = φ2 - φ1
+        dλ = np.radians(np.subtract(lon2, lon1))
+        a = np.sin(dφ / 2) ** 2 + np.cos(φ1) * np.cos(φ2) * np.sin(dλ / 2) ** 2
+        return self.radius * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    def bearing(self, lat1, lon1, lat2, lon2):
+        """Initial great-circle bearing, degrees in [0, 360)."""
+        φ1 = np.radians(lat1)
+        φ2 = np.radians(lat2)
+        dλ = np.radians(np.subtract(lon2, lon1))
+        y = np.sin(dλ) * np.cos(φ2)
+        x = np.cos(φ1) * np.sin(φ2) - np.sin(φ1) * np.cos(φ2) * np.cos(dλ)
+        return _bearing_deg(y, x)
+
+    def inverse(self, lat1, lon1, lat2, lon2):
+        """Distance and bearing sharing the trigonometry."""
+        φ1 = np.radians(lat1)
+        φ2 = np.radians(lat2)
+        dλ = np.radians(np.subtract(lon2, lon1))
+        cosφ1, cosφ2, sinφ1, sinφ2 = np.cos(φ1), np.cos(φ2), np.sin(φ1), np.sin(φ2)
+        a = np.sin((φ2 - φ1) / 2) ** 2 + cosφ1 * cosφ2 * np.sin(dλ / 2) ** 2
+        dist = self.radius * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        return dist, _bearing_deg(np.sin(dλ) * cosφ2, cosφ1 * sinφ2 - sinφ1 * cosφ2 * np.cos(dλ))
+
+
+# --- Local projection ---
+def _meters_per_degree(lat):
+    """WGS-84 meters per degree of longitude (east) and of latitude (north) at ``lat``."""
+    s = np.sin(np.radians(lat))
+    w = np.sqrt(1 - WGS84_E2 * s * s)
+    east = np.radians(WGS84_A / w * np.cos(np.radians(lat)))
+    north = np.radians(WGS84_A * (1 - WGS84_E2) / w ** 3)
+    return east, north
+
+
+class LocalProjection:
+    """Equirectangular projection about ``origin`` (lat, lon).
+
+    The scale of a pair is taken at its mid latitude from a quadratic fit of
+    the WGS-84 scales around the origin, and the bearing is turned back by
+    half the meridian convergence so it is the initial bearing, like the
+    other backends. The scale is split into a term per point plus one cross
+    term, so for a track against the marks most of the work is per fix and
+    per mark, not per pair.
+    """
+    name = "local"
+
+    def __init__(self, origin=RIA_DE_AROUSA, span=1.0):
+        self.origin = (float(origin[0]), float(origin[1]))
+        lat0 = self.origin[0]
+        # Quadratic (east) and linear (north) in (latitude - lat0) degrees through lat0 and lat0 ± span
+        east, north = _meters_per_degree(np.array([lat0 - span, lat0, lat0 + span]))
+        self._e = (east[1], (east[2] - east[0]) / (2 * span), (east[2] - 2 * east[1] + east[0]) / (2 * span ** 2))
+        self._n = (north[1], (north[2] - north[0]) / (2 * span))
+        self._half_sin = 0.5 * np.sin(np.radians(lat0))
+
+    def _point(self, lat):
+        """Per-point halves of the east and north scales at the mid latitude, and the cross factor."""
+        d = np.asarray(lat, dtype=float) - self.origin[0]
+        e0, e1, e2 = self._e
+        n0, n1 = self._n
+        return 0.5 * e0 + d * (0.5 * e1 + 0.25 * e2 * d), 0.5 * n0 + 0.5 * n1 * d, d * (0.5 * e2)
+
+    def project(self, lat1, lon1, lat2, lon2):
+        """East and north meters from point 1 to point 2, and the longitude difference."""
+        e1, n1, c1 = self._point(lat1)
+        e2, n2, _ = self._point(lat2)
+        dλ = np.subtract(lon2, lon1)
+        dx = dλ * (e1 + e2 + c1 * (np.asarray(lat2, dtype=float) - self.origin[0]))
+        dy = np.subtract(lat2, lat1) * (n1 + n2)
+        return dx, dy, dλ
+
+    def _initial(self, dx, dy, dλ):
+        # The meridians converge by dλ·sin φ over the leg; the initial bearing is half of it off the mid one
+        b = np.degrees(np.arctan2(dx, dy)) - dλ * self._half_sin
+        return b + 360 * (b < 0)
+
+    def distance(self, lat1, lon1, lat2, lon2):
+        dx, dy, _ = self.project(lat1, lon1, lat2, lon2)
+        return _norm(dx, dy)
+
+    def bearing(self, lat1, lon1, lat2, lon2):
+        return self._initial(*self.project(lat1, lon1, lat2, lon2))
+
+    def inverse(self, lat1, lon1, lat2, lon2):
+        dx, dy, dλ = self.project(lat1, lon1, lat2, lon2)
+        return _norm(dx, dy), self._initial(dx, dy, dλ)
+
+
+# --- Ellipsoid ---
+class Vincenty:
+    name = "vincenty"
+
+    def inverse(self, lat1, lon1, lat2, lon2):
+        """Distance (m) and initial bearing (deg) on WGS-84."""
+        lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (lat1, lon1, lat2, lon2)))
+        f = WGS84_F
+        U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+        U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+        sinU1, cosU1, sinU2, cosU2 = np.sin(U1), np.cos(U1), np.sin(U2), np.cos(U2)
+        L = np.radians(lon2 - lon1)
+        λ = L.copy()
+        active = np.ones(λ.shape, dtype=bool)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for _ in range(VINCENTY_ITER):
+                sinλ, cosλ = np.sin(λ), np.cos(λ)
+                sinσ = np.hypot(cosU2 * sinλ, cosU1 * sinU2 - sinU1 * cosU2 * cosλ)
+                cosσ = sinU1 * sinU2 + cosU1 * cosU2 * cosλ
+                σ = np.arctan2(sinσ, cosσ)
+                sinα = np.where(sinσ > 0, cosU1 * cosU2 * sinλ / sinσ, 0.0)
+                cos2α = 1 - sinα ** 2
+                cos2σm = np.where(cos2α > 0, cosσ - 2 * sinU1 * sinU2 / cos2α, 0.0)  # on the equator
+                C = f / 16 * cos2α * (4 + f * (4 - 3 * cos2α))
+                λ_new = L + (1 - C) * f * sinα * (σ + C * sinσ * (cos2σm + C * cosσ * (-1 + 2 * cos2σm ** 2)))
+                active = np.abs(λ_new - λ) > VINCENTY_TOL
+                λ = λ_new
+                if not active.any():
+                    break
+            u2 = cos2α * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+            A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+            B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+            dσ = B * sinσ * (cos2σm + B / 4 * (cosσ * (-1 + 2 * cos2σm ** 2)
+                                              - B / 6 * cos2σm * (-3 + 4 * sinσ ** 2) * (-3 + 4 * cos2σm ** 2)))
+            dist = WGS84_B * A * (σ - dσ)
+            brg = np.where(sinσ > 0, _bearing_deg(cosU2 * np.sin(λ), cosU1 * sinU2 - sinU1 * cosU2 * np.cos(λ)), 0.0)
+        if active.any():
+            dist, brg = np.array(dist), np.array(brg)
+            dist[active], brg[active] = _antipodal(lat1[active], lon1[active], lat2[active], lon2[active])
+        return dist[()], brg[()]
+
+    def distance(self, lat1, lon1, lat2, lon2):
+        return self.inverse(lat1, lon1, lat2, lon2)[0]
+
+    def bearing(self, lat1, lon1, lat2, lon2):
+        return self.inverse(lat1, lon1, lat2, lon2)[1]
+
+
+def _antipodal(lat1, lon1, lat2, lon2):
+    """Karney (geographiclib) for the pairs Vincenty cannot solve, or haversine without it."""
+    try:
+        from geographiclib.geodesic import Geodesic
+    except ImportError:
+        h = Haversine()
+        return h.distance(lat1, lon1, lat2, lon2), h.bearing(lat1, lon1, lat2, lon2)
+    sol = [Geodesic.WGS84.Inverse(*p) for p in zip(lat1.tolist(), lon1.tolist(), lat2.tolist(), lon2.tolist())]
+    return np.array([s["s12"] for s in sol]), np.array([s["azi1"] % 360 for s in sol])
+
+
+BACKENDS = {"local": LocalProjection, "haversine": Haversine, "vincenty": Vincenty}
+
+
+def backend(mode, origin=None):
+    """A backend by name; ``origin`` (lat, lon) only applies to ``local``."""
+    if mode not in BACKENDS:
+        raise ValueError(f"unknown geodesy mode {mode!r}: {', '.join(BACKENDS)}")
+    if mode == "local":
+        return LocalProjection(RIA_DE_AROUSA if origin is None else origin)
+    return BACKENDS[mode]()
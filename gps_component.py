@@ -0,0 +1,192 @@
+"""Streamlit component that streams GPS fixes from the browser back to Python.
+
+The browser side (frontend/gps/index.html) runs its own ``watchPosition`` and
+coalesces fixes into batches by count (``batch_size``) and age (``batch_ms``).
+Each batch travels as one gzip-compressed columnar message, so the page
+reruns once per batch instead of once per fix. Python acknowledges what it
+has processed through the ``ack`` argument; unacknowledged batches are re-sent
+with the next one and de-duplicated here.
+
+With a ``tracker`` argument the same component also shows the VMG tracker of
+the FANPI / PÍFANO pages (frontend/gps/tracker.js); its per-fix navigation
+(navcore.py) runs in a Web Worker, nav_worker.js. All the JavaScript is
+served as static files that the browser caches; reruns only send the small
+arguments, so changing the waypoint updates the running tracker in place
+instead of reloading the iframe and restarting the GPS.
+
+Offline: every batch is kept in the browser's IndexedDB until acknowledged,
+and a service worker (frontend/gps/sw.js) caches the scripts, the marks
+(``marks.json``, written from marks.csv) and the pífano sound. The
+standalone ``offline.html`` tracker then opens with no connection at all;
+its fixes are uploaded in bulk by the next page with the uplink.
+
+Telemetry: every uplink message carries the browser's fix latency
+histograms and drop counters (telemetry.py), and the uplink times its own
+stages of the rerun; ``telemetry_panel`` shows both.
+"""
+import json
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from alarm import ALARM_JS
+from course import COURSE_JS
+from kalman import KALMAN_JS
+from marks import MARKS_FILE, Marks, page_waypoints
+from nav import NAV_JS
+from navcore import NAVCORE_JS
+from resources import metrics
+from sampling import SAMPLING_JS
+from telemetry import TELEMETRY_JS
+from track import TRACKS_DIR, TrackRecorder, decode_fixes, new_session_id, stream_session
+from wind import WIND_JS
+
+FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "gps")
+RECORDER_CAPACITY = 600  # fixes per session in memory; every batch is flushed anyway
+
+
+def _write_if_changed(path, text):
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == text:
+                return
+    except OSError:
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def write_core_js(path=os.path.join(FRONTEND, "core.js")):
+    """Write the browser copies of nav/kalman/alarm/course/wind/telemetry/sampling/navcore to ``core.js`` if they changed."""
+    text = ("// Generated by gps_component.py from nav.py, kalman.py, alarm.py, course.py, wind.py, telemetry.py,"
+            " sampling.py and navcore.py — do not edit\n")
+    _write_if_changed(path, text + NAV_JS + KALMAN_JS + ALARM_JS + COURSE_JS + WIND_JS + TELEMETRY_JS + SAMPLING_JS
+                      + NAVCORE_JS)
+
+
+def write_marks_json(path=os.path.join(FRONTEND, "marks.json")):
+    """Write the default area's marks (``[[name, lat, lon], ...]``) for the offline page."""
+    waypoints = page_waypoints(Marks.load(MARKS_FILE))
+    _write_if_changed(path, json.dumps([[name, lat, lon] for name, (lat, lon) in waypoints.items()], ensure_ascii=False))
+
+
+write_core_js()
+write_marks_json()
+_gps = components.declare_component("gps", path=FRONTEND)
+
+
+def accept_batch(value, last=None):
+    """New fixes in a component message, given the last acknowledged (stream, seq).
+
+    Returns ``(columns or None, ack)``.
+    """
+    if not value:
+        return None, last
+    stream = value["stream"]
+    last_seq = last[1] if last and last[0] == stream else 0
+    skip = sum(n for seq, n in value["batches"] if seq <= last_seq)
+    total = sum(n for _, n in value["batches"])
+    ack = [stream, max(last_seq, max(seq for seq, _ in value["batches"]))]
+    if skip >= total:
+        return None, ack
+    cols = decode_fixes(value)
+    return {name: col[skip:] for name, col in cols.items()}, ack
+
+
+def gps_batches(batch_size=10, batch_ms=10000, compress=True, on_batch=None, tracker=None, key="gps"):
+    """Render the GPS uplink and return the fixes that arrived since the last run.
+
+    Returns a dict of columns (see ``track.COLUMNS``) or ``None`` when there is
+    nothing new. ``on_batch``, if given, is called with the same columns.
+
+    Fixes are buffered in the browser (IndexedDB) until acknowledged, so a
+    dropped connection only delays them; ``ack[0]`` is the browser stream
+    they came from.
+
+    ``tracker`` turns on the Start/Stop VMG tracker; a dict with ``waypoint``
+    ``[lat, lon]``, optionally a ``route`` of ``[name, lat, lon]`` marks
+    (see course.py), ``tack_angle``, ``layout`` (``"full"`` or ``"compact"``),
+    ``marks`` (``[name, lat, lon]`` to show the ETAs to, on both tacks),
+    ``audio`` (sound the pífano), ``alarm`` (``TackAlarm`` settings),
+    ``sampling`` (``False``: compute every fix, see sampling.py) and
+    ``gps_pause`` (``False``: never stop the GPS watch on a steady leg).
+    """
+    ack_key = f"{key}_ack"
+    m = metrics()
+    # The component value is in session_state before the component is drawn,
+    # so this run can already acknowledge it
+    value = st.session_state.get(key)
+    with m.stage("gps/accept"):
+        fixes, ack = accept_batch(value, st.session_state.get(ack_key))
+    if value and value.get("telemetry"):
+        m.browser(value["telemetry"])
+    st.session_state[ack_key] = ack
+    if fixes is not None and len(fixes["t"]):
+        st.session_state[f"{key}_pos"] = (float(fixes["lat"][-1]), float(fixes["lon"][-1]))
+    # Before the ack goes out with the render: the browser drops what is acknowledged
+    if fixes is not None and on_batch is not None:
+        with m.stage("gps/record"):
+            on_batch(fixes)
+    with m.stage("gps/component"):
+        _gps(batch_size=batch_size, batch_ms=batch_ms, compress=compress, ack=ack, tracker=tracker,
+             key=key, default=None)
+    return fixes
+
+
+def last_position(key="gps"):
+    """``(lat, lon)`` of the last fix received in this browser session, or ``(None, None)``."""
+    return st.session_state.get(f"{key}_pos", (None, None))
+
+
+def telemetry_panel(label="🔧 Telemetría"):
+    """Expander with the latency percentiles of every stage and the dropped-fix counters.
+
+    Browser stages are per fix, merged over the browsers that sent fixes to
+    this server process; server stages are per rerun.
+    """
+    m = metrics()
+    with st.expander(label):
+        _, counters = m.fix_stages()
+        fixes = max(counters["fixes"], 1)
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Fixes", counters["fixes"])
+        c2.metric("Descartados por precisión", counters["acc"], f"{counters['acc'] / fixes:.1%}", delta_color="off")
+        c3.metric("Descartados por salto", counters["jump"], f"{counters['jump'] / fixes:.1%}", delta_color="off")
+        c4.metric("Sin recalcular", counters["skip"], f"{counters['skip'] / fixes:.1%}", delta_color="off")
+        rows = m.rows()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+            st.caption("Milisegundos. Navegador: del callback de watchPosition a gps-output en pantalla (total); "
+                       "servidor: cada rerun.")
+        else:
+            st.caption("Sin datos todavía.")
+
+
+def gps_tracker(tracker, key="gps"):
+    """Render only the VMG tracker, without sending fixes back to Python."""
+    _gps(tracker=tracker, upload=False, key=key, default=None)
+
+
+def record_fixes(root=TRACKS_DIR, batch_size=10, batch_ms=10000, tracker=None, key="gps"):
+    """Render the uplink (and ``tracker``) and append new fixes to the track of their browser stream.
+
+    Each stream (a browser tab, kept across reloads) records into its own
+    session under ``root``, which is reopened when its buffered fixes arrive
+    in a later Streamlit session. Batches are flushed before they are
+    acknowledged, so an acknowledged fix is on disk.
+    """
+    recorders = st.session_state.setdefault("recorders", {})
+    if "recorder" not in st.session_state:
+        st.session_state.recorder = TrackRecorder(os.path.join(root, new_session_id()), RECORDER_CAPACITY)
+
+    def on_batch(fixes):
+        stream = st.session_state[f"{key}_ack"][0]
+        if stream not in recorders:
+            recorders[stream] = TrackRecorder(stream_session(root, stream), RECORDER_CAPACITY)
+        recorder = st.session_state.recorder = recorders[stream]
+        recorder.append(fixes)
+        recorder.flush()
+
+    gps_batches(batch_size, batch_ms, on_batch=on_batch, tracker=tracker, key=key)
+    return st.session_state.recorder
@@ -0,0 +1,213 @@
+"""Constant-velocity Kalman filter for GPS fixes.
+
+Replaces the MIN_MOVE_DIST / MAX_JUMP_DIST gate of the pages: jitter is
+averaged out instead of dropped, glitches are rejected by an innovation
+gate, and speed / course over ground come from the filtered velocity instead
+of the phone's ``coords.speed`` / ``coords.heading`` (often null or noisy
+at low speed).
+
+The state is position and velocity in local east/north meters around the
+first fix. Both axes share dt and measurement noise, so they share one 2x2
+covariance and every fix costs a handful of multiplications.
+
+``KalmanFilter`` is the streaming (per fix) API; ``smooth`` runs the same
+filter over whole recorded tracks, vectorized across tracks. ``KALMAN_JS``
+is the browser version used by the pages.
+"""
+import numpy as np
+
+from nav import MS_TO_KN, R_EARTH
+
+Q_ACCEL = 0.2       # process noise, (m/s²)² per second — how hard a boat can accelerate
+GATE = 13.8         # chi² (2 dof, 99.9 %) above which a fix is an outlier
+MAX_REJECTS = 3     # consecutive outliers before the filter re-centers on the fixes
+INIT_SPEED = 5.0    # m/s — initial velocity uncertainty
+MIN_SOG = 0.5       # knots — below this the course is undefined (NaN)
+DEG = np.pi / 180
+
+
+def _predict(P00, P01, P11, dt, q):
+    dt2 = dt * dt
+    return (P00 + 2 * dt * P01 + dt2 * P11 + q * dt2 * dt / 3,
+            P01 + dt * P11 + q * dt2 / 2,
+            P11 + q * dt)
+
+
+def _sog_cog(vx, vy):
+    sog = np.hypot(vx, vy) * MS_TO_KN
+    cog = (np.degrees(np.arctan2(vx, vy)) + 360) % 360
+    return sog, np.where(sog >= MIN_SOG, cog, np.nan)
+
+
+class KalmanFilter:
+    """Streaming filter: ``update`` once per fix, O(1) work."""
+
+    def __init__(self, q=Q_ACCEL, gate=GATE):
+        self.q = q
+        self.gate = gate
+        self.origin = None
+        self.t = None
+        self.rejects = 0
+
+    def _reset(self, t, x, y, r):
+        self.t = t
+        self.x, self.y, self.vx, self.vy = x, y, 0.0, 0.0
+        self.P00, self.P01, self.P11 = r, 0.0, INIT_SPEED ** 2
+        self.rejects = 0
+
+    def update(self, t, lat, lon, acc):
+        """Fold in a fix; returns ``(lat, lon, sog_kn, cog)`` or ``None`` for an outlier."""
+        if self.origin is None:
+            self.origin = (lat, lon, np.cos(lat * DEG))
+        lat0, lon0, coslat0 = self.origin
+        zx = (lon - lon0) * DEG * R_EARTH * coslat0
+        zy = (lat - lat0) * DEG * R_EARTH
+        r = acc * acc
+        if self.t is None:
+            self._reset(t, zx, zy, r)
+        else:
+            dt = max(t - self.t, 0.0)
+            P00, P01, P11 = _predict(self.P00, self.P01, self.P11, dt, self.q)
+            px, py = self.x + self.vx * dt, self.y + self.vy * dt
+            S = P00 + r
+            ix, iy = zx - px, zy - py
+            if (ix * ix + iy * iy) / S > self.gate:
+                self.rejects += 1
+                if self.rejects <= MAX_REJECTS:
+                    return None
+                self._reset(t, zx, zy, r)  # the "outliers" agree: the boat really is there
+            else:
+                K0, K1 = P00 / S, P01 / S
+                self.x, self.y = px + K0 * ix, py + K0 * iy
+                self.vx, self.vy = self.vx + K1 * ix, self.vy + K1 * iy
+                self.P00, self.P01, self.P11 = (1 - K0) * P00, (1 - K0) * P01, P11 - K1 * P01
+                self.t = t
+                self.rejects = 0
+        sog, cog = _sog_cog(self.vx, self.vy)
+        return (lat0 + self.y / (DEG * R_EARTH),
+                lon0 + self.x / (DEG * R_EARTH * coslat0),
+                float(sog), float(cog))
+
+
+def smooth(t, lat, lon, acc, q=Q_ACCEL, gate=GATE):
+    """Filter whole tracks at once.
+
+    Inputs are (n_fixes,) for one track or (n_tracks, n_fixes) for many, NaN
+    padded; the loop runs over time and is vectorized across tracks. Returns a
+    dict of arrays shaped like the input: lat, lon, sog (knots), cog and
+    ``ok`` (False where a fix was rejected or missing; those rows carry the
+    last estimate).
+    """
+    one = np.ndim(lat) == 1
+    t, lat, lon, acc = (np.atleast_2d(np.asarray(a, dtype=float)) for a in (t, lat, lon, acc))
+    n_tracks, n = lat.shape
+    if n == 0:
+        shape = (0,) if one else (n_tracks, 0)
+        res = {k: np.empty(shape) for k in ("lat", "lon", "sog", "cog")}
+        res["ok"] = np.zeros(shape, dtype=bool)
+        return res
+    # Origin: first valid fix of each track
+    first = np.argmax(np.isfinite(lat), axis=1)
+    rows = np.arange(n_tracks)
+    lat0, lon0 = lat[rows, first], lon[rows, first]
+    coslat0 = np.cos(lat0 * DEG)
+    zx = (lon - lon0[:, None]) * DEG * R_EARTH * coslat0[:, None]
+    zy = (lat - lat0[:, None]) * DEG * R_EARTH
+    r = acc * acc
+
+    x = np.full(n_tracks, np.nan)
+    y, vx, vy = x.copy(), np.zeros(n_tracks), np.zeros(n_tracks)
+    P00, P01, P11 = np.zeros(n_tracks), np.zeros(n_tracks), np.zeros(n_tracks)
+    t_last = np.full(n_tracks, np.nan)
+    rejects = np.zeros(n_tracks, dtype=int)
+    out = {k: np.full((n_tracks, n), np.nan) for k in ("x", "y", "vx", "vy")}
+    ok = np.zeros((n_tracks, n), dtype=bool)
+
+    for i in range(n):
+        valid = np.isfinite(zx[:, i]) & np.isfinite(zy[:, i]) & np.isfinite(r[:, i]) & np.isfinite(t[:, i])
+        dt = np.where(valid & np.isfinite(t_last), np.maximum(t[:, i] - t_last, 0.0), 0.0)
+        p00, p01, p11 = _predict(P00, P01, P11, dt, q)
+        px, py = x + vx * dt, y + vy * dt
+        S = p00 + r[:, i]
+        ix, iy = zx[:, i] - px, zy[:, i] - py
+        with np.errstate(invalid="ignore"):
+            outlier = valid & np.isfinite(t_last) & ((ix * ix + iy * iy) / S > gate)
+        rejects = np.where(outlier, rejects + 1, 0)
+        reset = valid & (~np.isfinite(t_last) | (rejects > MAX_REJECTS))
+        accept = valid & ~outlier & ~reset
+        K0, K1 = p00 / S, p01 / S
+        x = np.where(accept, px + K0 * ix, np.where(reset, zx[:, i], x))
+        y = np.where(accept, py + K0 * iy, np.where(reset, zy[:, i], y))
+        vx = np.where(accept, vx + K1 * ix, np.where(reset, 0.0, vx))
+        vy = np.where(accept, vy + K1 * iy, np.where(reset, 0.0, vy))
+        P00 = np.where(accept, (1 - K0) * p00, np.where(reset, r[:, i], P00))
+        new_P01 = np.where(accept, (1 - K0) * p01, np.where(reset, 0.0, P01))
+        P11 = np.where(accept, p11 - K1 * p01, np.where(reset, INIT_SPEED ** 2, P11))
+        P01 = new_P01
+        t_last = np.where(accept | reset, t[:, i], t_last)
+        rejects = np.where(reset, 0, rejects)
+        ok[:, i] = accept | reset
+        out["x"][:, i], out["y"][:, i], out["vx"][:, i], out["vy"][:, i] = x, y, vx, vy
+
+    sog, cog = _sog_cog(out["vx"], out["vy"])
+    res = {
+        "lat": lat0[:, None] + out["y"] / (DEG * R_EARTH),
+        "lon": lon0[:, None] + out["x"] / (DEG * R_EARTH * coslat0[:, None]),
+        "sog": sog,
+        "cog": cog,
+        "ok": ok,
+    }
+    return {k: v[0] for k, v in res.items()} if one else res
+
+
+# --- Browser copy of the streaming filter (served as frontend/gps/core.js) ---
+KALMAN_JS = f"""
+// Constant-velocity Kalman filter (same as kalman.py)
+class KalmanCV {{
+  constructor(q = {Q_ACCEL}, gate = {GATE}) {{
+    this.q = q; this.gate = gate; this.origin = null; this.t = null; this.rejects = 0;
+  }}
+  reset(t, x, y, r) {{
+    this.t = t; this.x = x; this.y = y; this.vx = 0; this.vy = 0;
+    this.P00 = r; this.P01 = 0; this.P11 = {INIT_SPEED ** 2}; this.rejects = 0;
+  }}
+  // Returns {{lat, lon, sog, cog}} (sog in knots, cog null when slow) or null for an outlier
+  update(t, lat, lon, acc) {{
+    const D = Math.PI / 180;
+    if (this.origin === null) this.origin = {{ lat, lon, cos: Math.cos(lat * D) }};
+    const o = this.origin;
+    const zx = (lon - o.lon) * D * R_EARTH * o.cos;
+    const zy = (lat - o.lat) * D * R_EARTH;
+    const r = acc * acc;
+    if (this.t === null) {{
+      this.reset(t, zx, zy, r);
+    }} else {{
+      const dt = Math.max(t - this.t, 0), dt2 = dt * dt;
+      const P00 = this.P00 + 2 * dt * this.P01 + dt2 * this.P11 + this.q * dt2 * dt / 3;
+      const P01 = this.P01 + dt * this.P11 + this.q * dt2 / 2;
+      const P11 = this.P11 + this.q * dt;
+      const px = this.x + this.vx * dt, py = this.y + this.vy * dt;
+      const S = P00 + r, ix = zx - px, iy = zy - py;
+      if ((ix * ix + iy * iy) / S > this.gate) {{
+        this.rejects += 1;
+        if (this.rejects <= {MAX_REJECTS}) return null;
+        this.reset(t, zx, zy, r);
+      }} else {{
+        const K0 = P00 / S, K1 = P01 / S;
+        this.x = px + K0 * ix; this.y = py + K0 * iy;
+        this.vx += K1 * ix; this.vy += K1 * iy;
+        this.P00 = (1 - K0) * P00; this.P01 = (1 - K0) * P01; this.P11 = P11 - K1 * P01;
+        this.t = t; this.rejects = 0;
+      }}
+    }}
+    const sog = Math.hypot(this.vx, this.vy) * MS_TO_KN;
+    const cog = (Math.atan2(this.vx, this.vy) / D + 360) % 360;
+    return {{
+      lat: o.lat + this.y / (D * R_EARTH),
+      lon: o.lon + this.x / (D * R_EARTH * o.cos),
+      sog: sog,
+      cog: sog >= {MIN_SOG} ? cog : null,
+    }};
+  }}
+}}
+"""
@@ -0,0 +1,151 @@
+"""Waypoint / mark database with a spatial index.
+
+Marks are loaded from CSV (``name,lat,lon[,area]``) or GPX (``<wpt>``)
+files; a file without an area column puts its marks in an area named after
+the file. ``marks.csv`` holds the marks of the pages.
+
+The index is a global lat/lon grid of ``CELL_DEG`` cells: mark numbers are
+stored sorted by cell id, so the marks of a row of cells are one contiguous
+slice found with two ``searchsorted`` calls. That answers
+
+* ``within`` — marks within R meters (box of cells, then exact distance);
+* ``nearest`` — nearest N marks (grow a box of cells until it holds N, then
+  one ``within`` at the N-th distance);
+* ``ranges`` — distance and bearing to all (or some) marks, vectorized.
+
+Cells do not wrap at ±180° longitude; nobody races across the antimeridian
+here.
+"""
+import csv
+import io
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from nav import R_EARTH, bearing, distance
+
+MARKS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "marks.csv")
+DEFAULT_AREA = "Arousa"
+CELL_DEG = 0.1        # ~11 km N-S
+N_ROWS = int(round(180 / CELL_DEG))
+N_COLS = int(round(360 / CELL_DEG))
+MAX_RING = 20         # cells; past this nearest() just scans every mark
+
+
+def cell_rc(lat, lon):
+    row = np.clip(np.floor((np.asarray(lat, dtype=float) + 90) / CELL_DEG), 0, N_ROWS - 1).astype(np.int64)
+    col = np.clip(np.floor((np.asarray(lon, dtype=float) + 180) / CELL_DEG), 0, N_COLS - 1).astype(np.int64)
+    return row, col
+
+
+class Marks:
+    def __init__(self, names, lat, lon, areas):
+        self.names = list(names)
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.areas = list(areas)
+        row, col = cell_rc(self.lat, self.lon)
+        cells = row * N_COLS + col
+        self._order = np.argsort(cells, kind="stable")  # file order kept within a cell
+        self._cells = cells[self._order]
+
+    # --- Loading ---
+    @staticmethod
+    def parse_csv(text, area=DEFAULT_AREA):
+        rows = list(csv.DictReader(io.StringIO(text)))
+        return ([r["name"].strip() for r in rows], [float(r["lat"]) for r in rows],
+                [float(r["lon"]) for r in rows], [(r.get("area") or area).strip() for r in rows])
+
+    @staticmethod
+    def parse_gpx(text, area=DEFAULT_AREA):
+        names, lat, lon = [], [], []
+        for wpt in ET.fromstring(text).iter():
+            if wpt.tag.rsplit("}", 1)[-1] != "wpt":
+                continue
+            name = next((e.text for e in wpt if e.tag.rsplit("}", 1)[-1] == "name"), None)
+            names.append((name or f"WP{len(names) + 1}").strip())
+            lat.append(float(wpt.get("lat")))
+            lon.append(float(wpt.get("lon")))
+        return names, lat, lon, [area] * len(names)
+
+    @classmethod
+    def load(cls, *paths):
+        """Marks of every file in ``paths`` (CSV, or GPX by extension)."""
+        names, lat, lon, areas = [], [], [], []
+        for path in paths:
+            area = os.path.splitext(os.path.basename(path))[0]
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            parse = cls.parse_gpx if path.lower().endswith(".gpx") else cls.parse_csv
+            for acc, part in zip((names, lat, lon, areas), parse(text, area)):
+                acc.extend(part)
+        return cls(names, lat, lon, areas)
+
+    def __len__(self):
+        return len(self.names)
+
+    def as_dict(self, idx=None):
+        """``{name: (lat, lon)}`` of the marks ``idx`` (default: all), in that order."""
+        idx = range(len(self)) if idx is None else idx
+        return {self.names[i]: (float(self.lat[i]), float(self.lon[i])) for i in idx}
+
+    def in_area(self, area):
+        return np.array([i for i, a in enumerate(self.areas) if a == area], dtype=np.int64)
+
+    # --- Queries ---
+    def _box(self, row0, row1, col0, col1):
+        """Mark numbers in the cells of a box of rows/cols."""
+        rows = np.arange(max(row0, 0), min(row1, N_ROWS - 1) + 1)
+        c0, c1 = max(col0, 0), min(col1, N_COLS - 1)
+        i0 = np.searchsorted(self._cells, rows * N_COLS + c0, side="left")
+        i1 = np.searchsorted(self._cells, rows * N_COLS + c1, side="right")
+        chunks = [self._order[a:b] for a, b in zip(i0, i1) if b > a]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+    def ranges(self, lat, lon, idx=None):
+        """Distance (m) and bearing (deg) from a position to the marks ``idx`` (default: all)."""
+        idx = slice(None) if idx is None else idx
+        return distance(lat, lon, self.lat[idx], self.lon[idx]), bearing(lat, lon, self.lat[idx], self.lon[idx])
+
+    def within(self, lat, lon, radius_m):
+        """Mark numbers within ``radius_m`` of a position, nearest first."""
+        dlat = np.degrees(radius_m / R_EARTH)
+        dlon = dlat / max(np.cos(np.radians(abs(lat) + dlat)), 1e-6)
+        (r0, r1), (c0, c1) = cell_rc([lat - dlat, lat + dlat], [lon - dlon, lon + dlon])
+        idx = self._box(r0, r1, c0, c1)
+        d = distance(lat, lon, self.lat[idx], self.lon[idx])
+        keep = d <= radius_m
+        return idx[keep][np.argsort(d[keep], kind="stable")]
+
+    def nearest(self, lat, lon, n=5):
+        """The ``n`` nearest mark numbers to a position, nearest first."""
+        n = min(n, len(self))
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        row, col = cell_rc(lat, lon)
+        for k in range(MAX_RING + 1):
+            idx = self._box(row - k, row + k, col - k, col + k)
+            if len(idx) >= n:
+                break
+        else:
+            idx = np.arange(len(self))
+        # The box may miss marks in the next cells that are closer than its
+        # n-th mark, so take everything within that distance
+        d = distance(lat, lon, self.lat[idx], self.lon[idx])
+        return self.within(lat, lon, float(np.partition(d, n - 1)[n - 1]) * (1 + 1e-9))[:n]
+
+    def area_of(self, lat, lon):
+        """Area of the mark nearest to a position."""
+        idx = self.nearest(lat, lon, 1)
+        return self.areas[idx[0]] if len(idx) else DEFAULT_AREA
+
+
+def page_waypoints(marks, lat=None, lon=None):
+    """Waypoints for a page selector: the marks of the area the boat is in.
+
+    Without a position, the marks of ``DEFAULT_AREA``. File order is kept so
+    the selector does not reshuffle (and reset) as the boat moves.
+    """
+    area = DEFAULT_AREA if lat is None or lon is None else marks.area_of(lat, lon)
+    return marks.as_dict(marks.in_area(area))
@@ -0,0 +1,217 @@
+"""Navigation math shared by the VMG pages.
+
+All functions take NumPy arrays (or scalars) in degrees and broadcast, so a
+whole track can be evaluated against every waypoint in one call:
+
+    d = distance(lat[:, None], lon[:, None], wp_lat[None, :], wp_lon[None, :])
+
+gives an (n_fixes, n_waypoints) matrix in metres.
+
+Distances and bearings come from the geodesy backend of the process
+(geodesy.py): haversine unless ``set_geodesy`` or the ``VMG_GEODESY``
+environment variable (``local``, ``local:<lat>,<lon>``, ``haversine``,
+``vincenty``) chooses another one.
+
+``NAV_JS`` holds the same formulas for the browser side of the pages, so the
+JavaScript and the Python agree on the numbers.
+"""
+import os
+
+import numpy as np
+
+from geodesy import R_SPHERE, backend
+
+R_EARTH = R_SPHERE    # meters (spherical Earth, same as the JS pages)
+MS_TO_KN = 1.94384    # m/s -> knots
+KN_TO_MS = 0.5144     # knots -> m/s
+MIN_VMG = 0.1         # knots — below this the ETA is infinite
+
+
+# --- Geodesy backend ---
+_geo = None
+
+
+def set_geodesy(mode="haversine", origin=None):
+    """Use the ``mode`` backend of geodesy.py for every distance and bearing of the process.
+
+    ``origin`` (lat, lon) centers the ``local`` projection; it defaults to the
+    Ría de Arousa. Returns the backend.
+    """
+    global _geo
+    _geo = backend(mode, origin)
+    return _geo
+
+
+def geodesy():
+    """The backend in use."""
+    return _geo
+
+
+def _from_env(value):
+    mode, _, origin = value.partition(":")
+    return mode, tuple(float(x) for x in origin.split(",")) if origin else None
+
+
+# --- Core geometry ---
+def distance(lat1, lon1, lat2, lon2):
+    """Distance in meters."""
+    return _geo.distance(lat1, lon1, lat2, lon2)
+
+
+def bearing(lat1, lon1, lat2, lon2):
+    """Initial bearing from point 1 to point 2, degrees in [0, 360)."""
+    return _geo.bearing(lat1, lon1, lat2, lon2)
+
+
+def angle_diff(a, b):
+    """Smallest absolute difference between two headings, degrees in [0, 180]."""
+    d = np.abs(np.subtract(a, b)) % 360
+    return np.where(d > 180, 360 - d, d)
+
+
+# --- Boat performance ---
+def vmg(speed_kn, heading, bearing_wp):
+    """Velocity made good towards the waypoint, knots.
+
+    A missing heading (NaN) counts as pointing at the mark, like the pages do.
+    """
+    angle = np.where(np.isnan(heading), 0.0, angle_diff(heading, bearing_wp))
+    return speed_kn * np.cos(np.radians(angle))
+
+
+def eta(dist_m, vmg_kn):
+    """Minutes to cover ``dist_m`` at ``vmg_kn``; ``inf`` when VMG <= MIN_VMG."""
+    vmg_kn = np.asarray(vmg_kn, dtype=float)
+    safe = np.where(vmg_kn > MIN_VMG, vmg_kn, 1.0)
+    return np.where(vmg_kn > MIN_VMG, dist_m / (safe * KN_TO_MS) / 60, np.inf)
+
+
+def virtual_course(heading, bearing_wp, tack_angle=90.0):
+    """Course after turning ``tack_angle`` to whichever side points closer to the mark."""
+    plus = (heading + tack_angle) % 360
+    minus = (heading - tack_angle + 360) % 360
+    return np.where(angle_diff(plus, bearing_wp) < angle_diff(minus, bearing_wp), plus, minus)
+
+
+def tack_course(heading, twd):
+    """Course after tacking (or gybing) through the wind ``twd``: the heading mirrored about the wind axis."""
+    return (2 * np.asarray(twd, dtype=float) - heading) % 360
+
+
+def solve(lat, lon, speed_kn, heading, wp_lat, wp_lon, tack_angle=90.0):
+    """Evaluate fixes against waypoints in one call.
+
+    Fix arrays have shape (n,), waypoint arrays shape (m,); every result is an
+    (n, m) matrix. Returns a dict with dist, bearing, vmg, eta, and the
+    virtual course / VMG / ETA after a ``tack_angle`` turn.
+    """
+    lat = np.asarray(lat, dtype=float)[:, None]
+    lon = np.asarray(lon, dtype=float)[:, None]
+    speed_kn = np.asarray(speed_kn, dtype=float)[:, None]
+    heading = np.asarray(heading, dtype=float)[:, None]
+    wp_lat = np.asarray(wp_lat, dtype=float)[None, :]
+    wp_lon = np.asarray(wp_lon, dtype=float)[None, :]
+
+    dist, brg = _geo.inverse(lat, lon, wp_lat, wp_lon)
+    v = vmg(speed_kn, heading, brg)
+    virt = virtual_course(heading, brg, tack_angle)
+    v_virt = vmg(speed_kn, virt, brg)
+    return {
+        "dist": dist,
+        "bearing": brg,
+        "vmg": v,
+        "eta": eta(dist, v),
+        "virtual_course": virt,
+        "vmg_virtual": v_virt,
+        "eta_virtual": eta(dist, v_virt),
+    }
+
+
+def evaluate(lat, lon, sog, cog, twd, wp_lat, wp_lon, tack_angle=90.0):
+    """One filtered fix against ``(m,)`` waypoints, on this tack and on the other.
+
+    The other tack mirrors ``cog`` about the estimated wind ``twd``, or turns
+    ``tack_angle`` towards each mark while there is no estimate (``None``).
+    ``cog`` is NaN when unknown. Returns ``(m,)`` arrays dist, bearing, vmg,
+    eta, virtual_course and eta_virtual: what the tracker shows, per mark.
+    """
+    dist, brg = _geo.inverse(lat, lon, np.asarray(wp_lat, dtype=float), np.asarray(wp_lon, dtype=float))
+    v = vmg(sog, cog, brg)
+    if twd is None or np.isnan(cog):
+        virt = virtual_course(cog, brg, tack_angle)
+    else:
+        virt = np.broadcast_to(tack_course(cog, twd), np.shape(brg))
+    v_virt = vmg(sog, virt, brg)
+    return {
+        "dist": dist,
+        "bearing": brg,
+        "vmg": v,
+        "eta": eta(dist, v),
+        "virtual_course": virt,
+        "eta_virtual": eta(dist, v_virt),
+    }
+
+
+set_geodesy(*_from_env(os.environ.get("VMG_GEODESY", "haversine")))
+
+
+# --- Browser copy of the same formulas (served as frontend/gps/core.js) ---
+NAV_JS = f"""
+const R_EARTH = {R_EARTH};
+const MS_TO_KN = {MS_TO_KN};
+const KN_TO_MS = {KN_TO_MS};
+const MIN_VMG = {MIN_VMG};
+
+// Haversine distance
+function haversine(lat1, lon1, lat2, lon2) {{
+  const dLat = (lat2 - lat1) * Math.PI / 180;
+  const dLon = (lon2 - lon1) * Math.PI / 180;
+  const a = Math.sin(dLat / 2)**2 +
+            Math.cos(lat1 * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180) *
+            Math.sin(dLon / 2)**2;
+  return R_EARTH * 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
+}}
+
+// Bearing calculation
+function bearingTo(lat1, lon1, lat2, lon2) {{
+  const y = Math.sin((lon2 - lon1) * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180);
+  const x = Math.cos(lat1 * Math.PI / 180) * Math.sin(lat2 * Math.PI / 180) -
+            Math.sin(lat1 * Math.PI / 180) * Math.cos(lat2 * Math.PI / 180) *
+            Math.cos((lon2 - lon1) * Math.PI / 180);
+  return (Math.atan2(y, x) * 180 / Math.PI + 360) % 360;
+}}
+
+function angleDiff(a, b) {{
+  let d = Math.abs(a - b) % 360;
+  return d > 180 ? 360 - d : d;
+}}
+
+// Minutes to cover dist (m) at vmg (kn); Infinity when vmg <= MIN_VMG
+function etaMin(dist, vmg) {{
+  return vmg > MIN_VMG ? dist / (vmg * KN_TO_MS) / 60 : Infinity;
+}}
+
+// One filtered fix against waypoints, on this tack and on the other (same as
+// nav.evaluate); cog null/NaN when unknown, twd null without a wind estimate
+function evaluate(lat, lon, sog, cog, twd, wpLat, wpLon, tackAngle = 90.0) {{
+  const known = cog !== null && !isNaN(cog);
+  const vmgTo = (course, brg) => sog * Math.cos((isNaN(course) ? 0 : angleDiff(course, brg)) * Math.PI / 180);
+  const out = {{ dist: [], bearing: [], vmg: [], eta: [], virtualCourse: [], etaVirtual: [] }};
+  for (let i = 0; i < wpLat.length; i++) {{
+    const dist = haversine(lat, lon, wpLat[i], wpLon[i]);
+    const brg = bearingTo(lat, lon, wpLat[i], wpLon[i]);
+    let virt = NaN;
+    if (known && twd !== null) {{
+      virt = (2 * twd - cog + 720) % 360;
+    }} else if (known) {{
+      const plus = (cog + tackAngle) % 360;
+      const minus = (cog - tackAngle + 360) % 360;
+      virt = angleDiff(plus, brg) < angleDiff(minus, brg) ? plus : minus;
+    }}
+    const v = vmgTo(known ? cog : NaN, brg);
+    out.dist.push(dist); out.bearing.push(brg); out.vmg.push(v); out.eta.push(etaMin(dist, v));
+    out.virtualCourse.push(virt); out.etaVirtual.push(etaMin(dist, vmgTo(virt, brg)));
+  }}
+  return out;
+}}
+"""
@@ -0,0 +1,317 @@
+"""The tracker's per-fix navigation, in one place for the browser and the server.
+
+``NavCore`` takes the raw fixes of ``watchPosition`` and does everything
+between the GPS and the screen: the accuracy check, the Kalman filter, the
+route, the wind estimate, the sampler (sampling.py), VMG/ETA on this tack
+and on the other against the waypoint and every mark of ``marks``
+(``nav.evaluate``), and the pífano alarm. What it returns is a plain dict
+of numbers, ready to show.
+
+``NAVCORE_JS`` is the same class for the browser, built on the other
+``*_JS`` copies in core.js. The tracker runs it in a Web Worker
+(frontend/gps/nav_worker.js), so the page's main thread only renders; the
+worker speaks the ``handle`` protocol below. Without workers the tracker
+runs it in the page.
+
+    python navcore.py --minutes 30
+    python navcore.py --parity      # NAVCORE_JS in node gives the same answers
+
+``NAVCORE_JS`` is kept by hand, so ``--parity`` runs one set of fixes,
+inaccurate ones and jumps included, through both and compares every field.
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import time
+
+import numpy as np
+
+from alarm import TackAlarm
+from course import Course, CourseTracker
+from kalman import KalmanFilter
+from marks import MARKS_FILE, Marks, page_waypoints
+from nav import angle_diff, distance, evaluate
+from sampling import SamplingController
+from wind import WindEstimator
+
+ACC_THRESHOLD = 20.0  # meters; less accurate fixes are not used
+PARITY_TOL = 1e-6     # relative difference allowed between Python and JS numbers
+
+
+class NavCore:
+    """Tracker settings as in ``gps_component.gps_batches``; ``update`` once per fix."""
+
+    def __init__(self, settings=None):
+        self.settings = {}
+        self.course = None
+        self.alarm = None
+        self.configure(settings or {})
+        self.start()
+
+    def configure(self, settings):
+        """Swap the settings in place; the route and the alarm restart only when theirs change."""
+        old, self.settings = self.settings, settings
+        if self.alarm is None or old.get("alarm") != settings.get("alarm"):
+            self.alarm = TackAlarm(**(settings.get("alarm") or {}))
+        if old.get("route") != settings.get("route") or (self.course is None and settings.get("route")):
+            route = settings.get("route") or []
+            self.course = CourseTracker(Course(*zip(*route))) if route else None
+        marks = settings.get("marks") or []
+        self.names = [m[0] for m in marks]
+        self.mark_lat = [m[1] for m in marks]
+        self.mark_lon = [m[2] for m in marks]
+
+    def start(self):
+        self.kf = KalmanFilter()
+        self.wind = WindEstimator()
+        self.sampler = None if self.settings.get("sampling") is False else SamplingController()
+
+    def update(self, t, lat, lon, acc):
+        """One raw fix; returns a dict whose ``kind`` is ``acc``, ``jump``, ``skip``, ``finished`` or ``fix``."""
+        if acc > ACC_THRESHOLD:
+            return {"kind": "acc", "acc": acc}
+        fix = self.kf.update(t, lat, lon, acc)
+        if fix is None:
+            return {"kind": "jump"}
+        lat, lon, sog, cog = fix
+
+        # With a route the waypoint is the next mark to round
+        wp = self.settings["waypoint"]
+        c = self.course
+        if c is not None:
+            c.update(t, lat, lon, sog, cog)
+            if c.finished:
+                return {"kind": "finished"}
+            wp = (c.course.lat[c.leg], c.course.lon[c.leg])
+        twd = self.wind.update(t, sog, cog)
+        pause = 0.0
+        if self.sampler is not None:
+            if not self.sampler.update(t, sog, cog, float(distance(lat, lon, *wp))):
+                return {"kind": "skip"}
+            if self.settings.get("gps_pause") is not False:
+                pause = self.sampler.pause()
+
+        tack_angle = self.settings.get("tack_angle", 90.0)
+        r = evaluate(lat, lon, sog, cog, twd, [wp[0], *self.mark_lat], [wp[1], *self.mark_lon], tack_angle)
+        eta, eta_v, virt = float(r["eta"][0]), float(r["eta_virtual"][0]), float(r["virtual_course"][0])
+        known = not np.isnan(cog)
+        return {
+            "kind": "fix",
+            "t": t, "sog": sog, "cog": cog if known else None, "twd": twd,
+            "bearing": float(r["bearing"][0]), "dist": float(r["dist"][0]), "eta": eta,
+            "virtual_course": virt, "eta_virtual": eta_v,
+            "tack": float(angle_diff(cog, virt)) if twd is not None and known else tack_angle,
+            "leg": None if c is None else [c.leg + 1, len(c.course)],
+            "mark": None if c is None else c.course.names[c.leg],
+            "eta_total": None if c is None else eta + c.eta_rest(),
+            "alarm": self.alarm.update(t, eta, eta_v),
+            "pause": pause,
+            "marks": [[name, float(d), float(e), float(ev)] for name, d, e, ev in
+                      zip(self.names, r["dist"][1:], r["eta"][1:], r["eta_virtual"][1:])],
+        }
+
+
+# --- Parity with the browser copy ---
+# Runs core.js in node: stdin is {settings, rows}, stdout the update of every
+# row, non-finite numbers as strings (JSON has none)
+_PARITY_JS = """
+const fs = require("fs");
+eval(fs.readFileSync(process.argv[1], "utf8") + ";globalThis.NavCore = NavCore;");
+const input = JSON.parse(fs.readFileSync(0, "utf8"));
+const core = new NavCore(input.settings);
+const out = input.rows.map((row) => core.update(...row));
+process.stdout.write(JSON.stringify(out, (k, v) => (typeof v === "number" && !isFinite(v) ? String(v) : v)));
+"""
+
+
+def _plain(value):
+    """``value`` as the node side writes it: lists for tuples, non-finite floats as "NaN"/"Infinity"."""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.number)):
+        value = float(value)
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "Infinity" if value > 0 else "-Infinity"
+    return value
+
+
+def _diff(py, js, path=""):
+    """Paths where two results differ beyond ``PARITY_TOL``."""
+    if isinstance(py, float) and isinstance(js, (int, float)) and not isinstance(js, bool):
+        return [] if abs(py - js) <= PARITY_TOL * max(1.0, abs(py)) else [f"{path}: {py} != {js}"]
+    if isinstance(py, dict) and isinstance(js, dict):
+        if py.keys() != js.keys():
+            return [f"{path}: keys {sorted(py.keys() ^ js.keys())}"]
+        return [d for k in py for d in _diff(py[k], js[k], f"{path}.{k}")]
+    if isinstance(py, list) and isinstance(js, list) and len(py) == len(js):
+        return [d for i, (a, b) in enumerate(zip(py, js)) for d in _diff(a, b, f"{path}[{i}]")]
+    return [] if py == js else [f"{path}: {py!r} != {js!r}"]
+
+
+def parity_fixes(minutes=20, seed=0):
+    """A synthetic track with the fixes NavCore must turn down: inaccurate ones and jumps."""
+    from replay import synthetic_track
+
+    track = synthetic_track(minutes=minutes, seed=seed, t0=1.7e9)
+    rows = [list(row) for row in zip(*(track[k].tolist() for k in ("t", "lat", "lon", "acc")))]
+    for i in range(97, len(rows), 97):
+        rows[i][3] = 2 * ACC_THRESHOLD
+    for i in range(301, len(rows), 301):
+        rows[i][1] += 0.01  # ~1 km off
+    return rows
+
+
+def parity(settings, rows, core_js=None):
+    """Differences between ``NavCore`` and ``NAVCORE_JS`` (run by node) over ``rows``: list of strings."""
+    if core_js is None:
+        import gps_component  # writes core.js
+
+        core_js = os.path.join(gps_component.FRONTEND, "core.js")
+    core = NavCore(settings)
+    py = [_plain(core.update(*row)) for row in rows]
+    proc = subprocess.run(["node", "-e", _PARITY_JS, core_js], input=json.dumps({"settings": settings, "rows": rows}),
+                          capture_output=True, text=True, check=True)
+    js = json.loads(proc.stdout)
+    return [f"fix {i}{d}" for i, (a, b) in enumerate(zip(py, js)) for d in _diff(a, b)]
+
+
+def parity_settings():
+    """Tracker settings that reach every part of NavCore: marks, a route, the sampler and the alarm."""
+    from replay import OSTREIRA
+
+    marks = [[name, lat, lon] for name, (lat, lon) in page_waypoints(Marks.load(MARKS_FILE)).items()]
+    return [
+        {"waypoint": list(OSTREIRA), "marks": marks, "sampling": False, "tack_angle": 90.0},
+        {"waypoint": list(OSTREIRA), "route": marks[:3], "tack_angle": 100.0, "alarm": {"min_dwell": 5}},
+    ]
+
+
+def main():
+    from replay import OSTREIRA, synthetic_track
+
+    p = argparse.ArgumentParser(description="Time NavCore per fix on a synthetic track against every mark of the area")
+    p.add_argument("--minutes", type=float, default=30)
+    p.add_argument("--parity", action="store_true", help="compare with NAVCORE_JS run by node instead")
+    args = p.parse_args()
+
+    if args.parity:
+        rows = parity_fixes(args.minutes)
+        diffs = [d for settings in parity_settings() for d in parity(settings, rows)]
+        for d in diffs[:20]:
+            print("  " + d)
+        print(f"{'✅' if not diffs else '❌'} NavCore vs NAVCORE_JS: {len(rows)} fixes × {len(parity_settings())} settings,"
+              f" {len(diffs)} differences")
+        raise SystemExit(bool(diffs))
+
+    marks = [[name, lat, lon] for name, (lat, lon) in page_waypoints(Marks.load(MARKS_FILE)).items()]
+    track = synthetic_track(minutes=args.minutes)
+    core = NavCore({"waypoint": list(OSTREIRA), "marks": marks, "sampling": False})
+    kinds = {}
+    t0 = time.perf_counter()
+    for row in zip(*(track[k].tolist() for k in ("t", "lat", "lon", "acc"))):
+        r = core.update(*row)
+        kinds[r["kind"]] = kinds.get(r["kind"], 0) + 1
+    dt = time.perf_counter() - t0
+    print(f"{len(track['t'])} fixes against {len(marks) + 1} marks: {dt / len(track['t']) * 1e6:.0f} µs/fix, {kinds}")
+
+
+# --- Browser copy (served as frontend/gps/core.js) ---
+NAVCORE_JS = f"""
+// Per-fix navigation (same as navcore.py); runs in nav_worker.js
+const ACC_THRESHOLD = {ACC_THRESHOLD};
+
+class NavCore {{
+  constructor(settings = {{}}) {{
+    this.settings = {{}}; this.course = null; this.alarm = null;
+    this.configure(settings);
+    this.start();
+  }}
+  configure(settings) {{
+    const old = this.settings;
+    this.settings = settings;
+    if (this.alarm === null || JSON.stringify(old.alarm) !== JSON.stringify(settings.alarm)) {{
+      const a = settings.alarm || {{}};
+      this.alarm = new TackAlarm(a.margin_on, a.margin_off, a.min_dwell, a.max_toggles, a.window);
+    }}
+    if (JSON.stringify(old.route) !== JSON.stringify(settings.route) ||
+        (this.course === null && settings.route && settings.route.length)) {{
+      this.course = (settings.route && settings.route.length) ? new CourseTracker(settings.route) : null;
+    }}
+    const marks = settings.marks || [];
+    this.names = marks.map((m) => m[0]);
+    this.markLat = marks.map((m) => m[1]);
+    this.markLon = marks.map((m) => m[2]);
+  }}
+  start() {{
+    this.kf = new KalmanCV();
+    this.wind = new WindEstimator();
+    this.sampler = this.settings.sampling === false ? null : new SamplingController();
+  }}
+  // One raw fix (t in seconds); kind: acc, jump, skip, finished or fix
+  update(t, lat, lon, acc) {{
+    if (acc > ACC_THRESHOLD) return {{ kind: "acc", acc: acc }};
+    const fix = this.kf.update(t, lat, lon, acc);
+    if (!fix) return {{ kind: "jump" }};
+    const sog = fix.sog, cog = fix.cog;
+
+    let wp = this.settings.waypoint;
+    const c = this.course;
+    if (c) {{
+      c.update(t, fix.lat, fix.lon, sog);
+      if (c.finished) return {{ kind: "finished" }};
+      wp = [c.mark[1], c.mark[2]];
+    }}
+    const twd = this.wind.update(t, sog, cog);
+    let pause = 0;
+    if (this.sampler) {{
+      if (!this.sampler.update(t, sog, cog, haversine(fix.lat, fix.lon, wp[0], wp[1]))) return {{ kind: "skip" }};
+      if (this.settings.gps_pause !== false) pause = this.sampler.pause();
+    }}
+
+    const tackAngle = this.settings.tack_angle === undefined ? 90.0 : this.settings.tack_angle;
+    const r = evaluate(fix.lat, fix.lon, sog, cog, twd, [wp[0], ...this.markLat], [wp[1], ...this.markLon], tackAngle);
+    const eta = r.eta[0], etaV = r.etaVirtual[0], virt = r.virtualCourse[0];
+    const known = cog !== null && !isNaN(cog);
+    return {{
+      kind: "fix",
+      t: t, sog: sog, cog: known ? cog : null, twd: twd,
+      bearing: r.bearing[0], dist: r.dist[0], eta: eta,
+      virtual_course: virt, eta_virtual: etaV,
+      tack: (twd !== null && known) ? angleDiff(cog, virt) : tackAngle,
+      leg: c ? [c.leg + 1, c.marks.length] : null,
+      mark: c ? c.mark[0] : null,
+      eta_total: c ? eta + c.etaRest() : null,
+      alarm: this.alarm.update(t, eta, etaV),
+      pause: pause,
+      marks: this.names.map((name, i) => [name, r.dist[i + 1], r.eta[i + 1], r.etaVirtual[i + 1]]),
+    }};
+  }}
+  // Worker protocol (browser only): {{type: "configure", settings}}, {{type: "start"}},
+  // {{type: "fix", t, lat, lon, acc, timer}} -> the update's result plus ms, its run
+  // time, and the fix's telemetry timer as it came (the page's clock, not ours)
+  handle(msg) {{
+    if (msg.type === "configure") this.configure(msg.settings);
+    else if (msg.type === "start") this.start();
+    else if (msg.type === "fix") {{
+      const t0 = performance.now();
+      const r = this.update(msg.t, msg.lat, msg.lon, msg.acc);
+      r.ms = performance.now() - t0;
+      r.timer = msg.timer;
+      return r;
+    }}
+    return null;
+  }}
+}}
+"""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Concurrent-session load for the Streamlit pages.
+
+Opens ``--sessions`` headless sessions of each page (``streamlit.testing``
+AppTest: Streamlit's own script runner, without a browser) and keeps them all
+alive, like a whole club connected at once. Every session then reruns
+``--reruns`` times; on the pages that record, each rerun carries a GPS batch
+the way the component sends one. Prints rerun latency percentiles and the
+memory every extra session costs (Python allocations, ``tracemalloc``). The
+``(empty)`` row is a one-line page: the harness's own cost per session, to
+subtract from the others.
+
+    python page_load.py --sessions 50 --reruns 5
+    python page_load.py --pages pifano2.py --sessions 20
+    python page_load.py --uncached   # rebuild the shared resources on every rerun, for comparison
+
+Sessions record into a temporary directory, not ``tracks/``. Reruns are
+sequential: AppTest sets up and tears down a process-wide runtime on every
+run, so two cannot overlap; on the server the same reruns would share the
+GIL anyway, and reruns/s is the throughput of one process.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+PAGES = ["vmg5.py", "pifano.py", "pifano2.py", "vmg3.py"]
+RECORDING = {"vmg5.py", "pifano2.py", "vmg3.py"}  # pages with the GPS uplink
+RUA_NORTE = (42.5521, -8.9403)
+
+
+def gps_value(session, seq, n=10):
+    """A component message with ``n`` fixes, as frontend/gps/uplink.js sends it."""
+    t0 = 1_760_000_000 + seq * n
+    return {
+        "stream": f"load{session}", "batches": [[seq, n]], "enc": "json",
+        "data": {
+            "t": [t0 + i for i in range(n)],
+            "lat": [RUA_NORTE[0] + 1e-5 * (seq * n + i) for i in range(n)],
+            "lon": [RUA_NORTE[1]] * n,
+            "acc": [5.0] * n, "spd": [None] * n, "hdg": [None] * n,
+        },
+    }
+
+
+def run_page(path, sessions, reruns, uncached=False):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    page = os.path.basename(path)
+
+    def rerun(k, at, seq):
+        if page in RECORDING:
+            at.session_state["gps"] = gps_value(k, seq)
+        if uncached:
+            st.cache_resource.clear()
+        t0 = time.perf_counter()
+        at.run(timeout=60)
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].message}")
+        return time.perf_counter() - t0
+
+    # The first session pays the imports and the shared resources
+    rerun(-1, AppTest.from_file(path), 1)
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    apps = [AppTest.from_file(path) for _ in range(sessions)]
+    for k, at in enumerate(apps):
+        rerun(k, at, 1)
+    per_session = (tracemalloc.get_traced_memory()[0] - base) / sessions
+    tracemalloc.stop()
+
+    # Every session reruns, round robin, as their fixes arrive
+    jobs = [(k, at, seq) for seq in range(2, reruns + 2) for k, at in enumerate(apps)]
+    t0 = time.perf_counter()
+    latencies = np.array([rerun(*job) for job in jobs])
+    wall = time.perf_counter() - t0
+    return {
+        "sessions": sessions,
+        "kb_per_session": per_session / 1024,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "max_ms": float(latencies.max() * 1000),
+        "reruns_per_s": len(jobs) / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load for the Streamlit pages")
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=5, help="reruns per session")
+    parser.add_argument("--uncached", action="store_true", help="clear st.cache_resource before every rerun")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(tempfile.mkdtemp(prefix="page_load-"))  # recorded tracks go here
+    empty = os.path.join(os.getcwd(), "(empty)")
+    with open(empty, "w") as f:
+        f.write("import streamlit as st\nst.write('')\n")
+    print(f"{'page':14} {'sessions':>8} {'KB/session':>11} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'reruns/s':>9}")
+    for page in [empty] + args.pages:
+        r = run_page(os.path.join(here, page), args.sessions, args.reruns, args.uncached)
+        print(f"{os.path.basename(page):14} {r['sessions']:8} {r['kb_per_session']:11.1f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} "
+              f"{r['max_ms']:8.1f} {r['reruns_per_s']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
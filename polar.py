@@ -0,0 +1,188 @@
+"""Boat polar: speed by true wind angle (TWA) and true wind speed (TWS).
+
+Polar files are the usual table, first row the wind speeds, first column the
+wind angles, separated by ``;``, ``,``, tabs or spaces::
+
+    twa/tws;6;8;10;12
+    40;4.1;5.0;5.6;5.9
+    52;4.8;5.7;6.2;6.5
+    ...
+
+On load the table is resampled to a 1° x 0.5 kn grid and the optimal upwind
+(beat) and downwind (run) VMG angles are solved for every wind speed on that
+grid, so per-fix questions are an index computation and a bilinear blend.
+"""
+import io
+
+import numpy as np
+
+from nav import KN_TO_MS, R_EARTH, angle_diff
+
+TWA_STEP = 1.0   # degrees
+TWS_STEP = 0.5   # knots
+TACK_ANGLE = 90.0  # degrees, for a polar with no upwind VMG at any wind speed
+
+
+def _interp_rows(x_new, x, table):
+    """Linear interpolation of every column of ``table`` (rows indexed by ``x``)."""
+    return np.stack([np.interp(x_new, x, col) for col in table.T], axis=1)
+
+
+class Polar:
+    def __init__(self, twa, tws, speed):
+        """``speed[i, j]`` is the boat speed in knots at ``twa[i]``, ``tws[j]``."""
+        self.twa = np.asarray(twa, dtype=float)
+        self.tws = np.asarray(tws, dtype=float)
+        self.speed = np.asarray(speed, dtype=float)
+
+        # Resampled grid, with zero speed head to wind and at zero wind
+        twa_src = np.concatenate([[0.0], self.twa]) if self.twa[0] > 0 else self.twa
+        spd_src = np.vstack([np.zeros(len(self.tws)), self.speed]) if self.twa[0] > 0 else self.speed
+        tws_src = np.concatenate([[0.0], self.tws]) if self.tws[0] > 0 else self.tws
+        spd_src = np.hstack([np.zeros((len(twa_src), 1)), spd_src]) if self.tws[0] > 0 else spd_src
+        self.grid_twa = np.arange(0, 180 + TWA_STEP, TWA_STEP)
+        self.grid_tws = np.arange(0, tws_src[-1] + TWS_STEP, TWS_STEP)
+        by_twa = _interp_rows(self.grid_twa, twa_src, spd_src)          # (n_twa, n_tws_src)
+        self.grid = _interp_rows(self.grid_tws, tws_src, by_twa.T).T    # (n_twa, n_tws)
+
+        # Optimal VMG angles for every grid wind speed
+        v = self.grid * np.cos(np.radians(self.grid_twa))[:, None]
+        up = self.grid_twa < 90
+        down = ~up
+        self.beat_idx = np.argmax(np.where(up[:, None], v, -np.inf), axis=0)
+        self.run_idx = np.argmin(np.where(down[:, None], v, np.inf), axis=0)
+        cols = np.arange(len(self.grid_tws))
+        self.beat_angle = self.grid_twa[self.beat_idx]
+        self.beat_vmg = v[self.beat_idx, cols]
+        self.run_angle = self.grid_twa[self.run_idx]
+        self.run_vmg = -v[self.run_idx, cols]
+        # No upwind VMG (no wind: every speed is 0) makes the beat angle 0°;
+        # a tack there turns as at the lightest wind that has one
+        sailing = np.flatnonzero(self.beat_angle > 0)
+        light = self.beat_angle[sailing[0]] if len(sailing) else TACK_ANGLE / 2
+        self._tack_beat = np.where(self.beat_angle > 0, self.beat_angle, light)
+
+    # --- Loading / saving ---
+    @classmethod
+    def parse(cls, text):
+        rows = []
+        for line in io.StringIO(text):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            for sep in (";", ",", "\t"):
+                line = line.replace(sep, " ")
+            rows.append(line.split())
+        tws = np.array(rows[0][1:], dtype=float)
+        body = np.array([r[:len(tws) + 1] for r in rows[1:]], dtype=float)
+        return cls(body[:, 0], tws, body[:, 1:])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.parse(f.read())
+
+    def to_text(self):
+        lines = ["twa/tws;" + ";".join(f"{w:g}" for w in self.tws)]
+        for a, row in zip(self.twa, self.speed):
+            lines.append(f"{a:g};" + ";".join(f"{s:.2f}" for s in row))
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_text())
+
+    # --- Lookups ---
+    def _tws_index(self, tws):
+        x = np.clip(np.asarray(tws, dtype=float) / TWS_STEP, 0, len(self.grid_tws) - 1)
+        return np.rint(x).astype(int)
+
+    def boat_speed(self, twa, tws):
+        """Boat speed in knots, bilinear on the resampled grid (any TWA sign/range)."""
+        a = np.abs((np.asarray(twa, dtype=float) + 180) % 360 - 180) / TWA_STEP
+        w = np.clip(np.asarray(tws, dtype=float) / TWS_STEP, 0, len(self.grid_tws) - 1)
+        i0 = np.minimum(a.astype(int), len(self.grid_twa) - 2)
+        j0 = np.minimum(w.astype(int), len(self.grid_tws) - 2)
+        fa, fw = a - i0, w - j0
+        g = self.grid
+        return ((1 - fa) * ((1 - fw) * g[i0, j0] + fw * g[i0, j0 + 1]) +
+                fa * ((1 - fw) * g[i0 + 1, j0] + fw * g[i0 + 1, j0 + 1]))
+
+    def optimum(self, tws):
+        """Optimal beat/run TWA (degrees) and VMG (knots) for a wind speed."""
+        j = self._tws_index(tws)
+        return {
+            "beat_angle": self.beat_angle[j],
+            "beat_vmg": self.beat_vmg[j],
+            "run_angle": self.run_angle[j],
+            "run_vmg": self.run_vmg[j],
+        }
+
+    def tack_angle(self, tws):
+        """Heading change of a tack between optimal close-hauled courses (never 0°, see ``__init__``)."""
+        return 2 * self._tack_beat[self._tws_index(tws)]
+
+    def gybe_angle(self, tws):
+        """Heading change of a gybe between optimal downwind courses."""
+        return 2 * (180 - self.run_angle[self._tws_index(tws)])
+
+    # --- Routing to a mark ---
+    def best_headings(self, bearing_wp, twd, tws):
+        """Headings to sail towards a mark: ``(h1, h2, direct)``.
+
+        When the mark is inside the beat or run angle the two headings are the
+        optimal tacks/gybes (``direct`` False); otherwise both equal the
+        bearing and the mark can be laid directly.
+        """
+        bearing_wp = np.asarray(bearing_wp, dtype=float)
+        twd = np.asarray(twd, dtype=float)
+        j = self._tws_index(tws)
+        beat, run = self.beat_angle[j], self.run_angle[j]
+        off = angle_diff(bearing_wp, twd)
+        upwind = off < beat
+        downwind = off > run
+        half = np.where(upwind, beat, run)
+        h1 = np.where(upwind | downwind, (twd + half) % 360, bearing_wp)
+        h2 = np.where(upwind | downwind, (twd - half) % 360, bearing_wp)
+        return h1, h2, ~(upwind | downwind)
+
+    def tack_plan(self, lat, lon, wp_lat, wp_lon, twd, tws, heading):
+        """Best two-leg route to the mark starting on the tack nearer ``heading``.
+
+        Returns a dict with the heading of each leg, leg lengths in meters,
+        ETA in minutes and the tack/gybe point (lat, lon) at the end of the
+        first leg. Uses a local flat-earth frame, fine for in-bay distances.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        # Mark in local east/north meters
+        north = np.radians(np.asarray(wp_lat) - lat) * R_EARTH
+        east = np.radians(np.asarray(wp_lon) - lon) * R_EARTH * np.cos(np.radians(lat))
+        bearing_wp = (np.degrees(np.arctan2(east, north)) + 360) % 360
+        h1, h2, direct = self.best_headings(bearing_wp, twd, tws)
+        # First leg on the tack closer to the current heading
+        first_is_h1 = angle_diff(heading, h1) <= angle_diff(heading, h2)
+        ha = np.radians(np.where(first_is_h1, h1, h2))
+        hb = np.radians(np.where(first_is_h1, h2, h1))
+        # Solve a * u(ha) + b * u(hb) = mark for the leg lengths a, b
+        det = np.sin(ha) * np.cos(hb) - np.cos(ha) * np.sin(hb)
+        safe = np.where(np.abs(det) > 1e-9, det, 1.0)
+        a = np.where(direct, np.hypot(east, north), (east * np.cos(hb) - north * np.sin(hb)) / safe)
+        b = np.where(direct, 0.0, (north * np.sin(ha) - east * np.cos(ha)) / safe)
+        twa_a = angle_diff(np.degrees(ha), twd)
+        twa_b = angle_diff(np.degrees(hb), twd)
+        spd_a = np.maximum(self.boat_speed(twa_a, tws), 1e-6) * KN_TO_MS
+        spd_b = np.maximum(self.boat_speed(twa_b, tws), 1e-6) * KN_TO_MS
+        eta_min = (a / spd_a + b / spd_b) / 60
+        tack_lat = lat + np.degrees(a * np.cos(ha) / R_EARTH)
+        tack_lon = lon + np.degrees(a * np.sin(ha) / (R_EARTH * np.cos(np.radians(lat))))
+        return {
+            "heading_1": np.degrees(ha) % 360,
+            "heading_2": np.degrees(hb) % 360,
+            "leg_1": a,
+            "leg_2": b,
+            "eta": eta_min,
+            "tack_lat": tack_lat,
+            "tack_lon": tack_lon,
+            "direct": direct,
+        }
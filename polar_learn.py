@@ -0,0 +1,192 @@
+"""Learn a boat polar from recorded sessions.
+
+Each session is binned by true wind angle (heading relative to the session's
+wind direction) and true wind speed, keeping a high percentile of speed per
+bin (what the boat *can* do, not what it did while tacking or luffing).
+Sessions are processed in parallel; the bins are merged weighted by sample
+count, smoothed along TWA and written as a polar file ``polar.Polar`` reads.
+
+    python polar_learn.py --twd 200 --tws 12 -o polar.csv
+    python polar_learn.py --wind wind.csv -o polar.csv   # session,twd,tws per line
+
+Wind may also be given per session as "twd"/"tws" in its meta.json.
+
+Speed and course come from the Kalman-smoothed track (kalman.smooth),
+over a chord of ``2 * CHORD`` fixes: at 1 Hz, raw fix-to-fix differences
+are mostly GPS noise (3 m of it reads as ~10 kn). ``--check`` learns the
+polar back from synthetic sessions sailed at one speed:
+
+    python polar_learn.py --check
+"""
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from kalman import smooth as kalman_smooth
+from nav import MS_TO_KN, angle_diff, bearing, distance
+from polar import Polar
+from track import TRACKS_DIR, list_sessions, read_track
+
+TWA_BIN = 5.0        # degrees
+TWS_BIN = 2.0        # knots
+QUANTILE = 0.9       # speed kept per bin
+MIN_SAMPLES = 10     # per bin and session
+MAX_ACC = 20.0       # meters, same as ACC_THRESHOLD in the pages
+MAX_TURN = 5.0       # deg/s — drop fixes while turning (tacks, gybes)
+CHORD = 10            # fixes each side of a fix for its SOG, COG and rate of turn
+CHECK_TOL = 0.10     # --check: relative speed error allowed
+CHECK_SHARE = 0.01   # --check: bins with less of the samples (right after a tack) are not checked
+
+
+def sog_cog(track):
+    """Speed (knots), course over ground and rate of turn (deg/s) of the accurate fixes.
+
+    From the Kalman-smoothed positions ``CHORD`` fixes before and after each
+    fix (NaN at the ends and for rejected fixes); the phone's speed and
+    heading win where it gives them. Returns ``(idx, sog, cog, turn)``, idx
+    indexing ``track``.
+    """
+    idx = np.flatnonzero(track["acc"] <= MAX_ACC)
+    t = track["t"][idx].astype(float)
+    k = kalman_smooth(t, track["lat"][idx], track["lon"][idx], track["acc"][idx])
+    n, w = len(idx), CHORD
+    spd, cog, turn = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+    if n > 2 * w:
+        lat, lon = k["lat"], k["lon"]
+        dt = t[2 * w:] - t[:-2 * w]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            spd[w:-w] = distance(lat[:-2 * w], lon[:-2 * w], lat[2 * w:], lon[2 * w:]) / dt
+        cog[w:-w] = bearing(lat[:-2 * w], lon[:-2 * w], lat[2 * w:], lon[2 * w:])
+        # Course in, course out: a tack anywhere in the chord shows up
+        before = bearing(lat[:-2 * w], lon[:-2 * w], lat[w:-w], lon[w:-w])
+        after = bearing(lat[w:-w], lon[w:-w], lat[2 * w:], lon[2 * w:])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            turn[w:-w] = angle_diff(after, before) / (dt / 2)
+    spd[~k["ok"]] = np.nan
+    spd = np.where(np.isnan(track["spd"][idx]), spd, track["spd"][idx])
+    cog = np.where(np.isnan(track["hdg"][idx]), cog, track["hdg"][idx])
+    return idx, spd * MS_TO_KN, cog, turn
+
+
+def bin_track(track, twd, tws):
+    """Binned speed quantiles for one track: DataFrame(tws, twa, n, speed)."""
+    if len(track["t"]) < 3:
+        return pd.DataFrame(columns=["tws", "twa", "n", "speed"])
+    _, sog, cog, turn = sog_cog(track)
+    with np.errstate(invalid="ignore"):
+        ok = np.isfinite(sog) & np.isfinite(cog) & (turn <= MAX_TURN) & (sog > 0.5)
+    twa = angle_diff(cog[ok], twd)
+    df = pd.DataFrame({
+        "tws": np.round(tws / TWS_BIN) * TWS_BIN,
+        "twa": np.floor(twa / TWA_BIN) * TWA_BIN + TWA_BIN / 2,
+        "speed": sog[ok],
+    })
+    g = df.groupby(["tws", "twa"])["speed"]
+    out = pd.DataFrame({"n": g.size(), "speed": g.quantile(QUANTILE)}).reset_index()
+    return out[out["n"] >= MIN_SAMPLES]
+
+
+def bin_session(args):
+    """``bin_track`` of a recorded session: args ``(path, twd, tws)``."""
+    path, twd, tws = args
+    return bin_track(read_track(path), twd, tws)
+
+
+def merge_bins(frames):
+    """Sample-weighted mean of per-session bins -> (twa, tws, speed table)."""
+    df = pd.concat(frames, ignore_index=True)
+    if df.empty:
+        raise ValueError("no usable fixes in the given sessions")
+    df["w"] = df["n"] * df["speed"]
+    merged = df.groupby(["twa", "tws"])[["w", "n"]].sum()
+    table = (merged["w"] / merged["n"]).unstack("tws").sort_index()
+    return table.index.to_numpy(), table.columns.to_numpy(), table.to_numpy()
+
+
+def smooth(twa, speed):
+    """Fill gaps along TWA per wind speed and smooth with a [1, 2, 1] kernel."""
+    out = np.empty_like(speed)
+    for j in range(speed.shape[1]):
+        col = speed[:, j]
+        good = np.isfinite(col)
+        col = np.interp(twa, twa[good], col[good]) if good.any() else np.zeros_like(col)
+        padded = np.concatenate([[col[0]], col, [col[-1]]])
+        out[:, j] = (padded[:-2] + 2 * padded[1:-1] + padded[2:]) / 4
+    return out
+
+
+def learn(sessions, winds, workers=None):
+    """Polar from ``sessions`` (paths) with ``winds[path] = (twd, tws)``."""
+    jobs = [(path, *winds[path]) for path in sessions if path in winds]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(bin_session, jobs, chunksize=max(1, len(jobs) // 64)))
+    twa, tws, speed = merge_bins(frames)
+    return Polar(twa, tws, smooth(twa, speed))
+
+
+def session_winds(root, names, twd=None, tws=None, wind_csv=None):
+    winds = {}
+    table = {}
+    if wind_csv:
+        with open(wind_csv, newline="") as f:
+            for row in csv.reader(f):
+                if row and not row[0].startswith("#") and row[0] != "session":
+                    table[row[0]] = (float(row[1]), float(row[2]))
+    for name in names:
+        path = os.path.join(root, name)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if name in table:
+            winds[path] = table[name]
+        elif meta.get("twd") is not None and meta.get("tws") is not None:
+            winds[path] = (float(meta["twd"]), float(meta["tws"]))
+        elif twd is not None and tws is not None:
+            winds[path] = (twd, tws)
+    return winds
+
+
+def check(sessions=3, minutes=60, speed_kn=5.0, twd=20.0, tws=12.0):
+    """Largest relative error of the speeds learned from synthetic sessions sailed at ``speed_kn``."""
+    from replay import synthetic_track
+
+    df = pd.concat([bin_track(synthetic_track(minutes=minutes, twd=twd, speed_kn=speed_kn, seed=i), twd, tws)
+                    for i in range(sessions)], ignore_index=True)
+    df = df[df.groupby("twa")["n"].transform("sum") >= CHECK_SHARE * df["n"].sum()]
+    twa, _, speed = merge_bins([df])
+    return float(np.nanmax(np.abs(speed / speed_kn - 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learn a polar from recorded tracks")
+    parser.add_argument("sessions", nargs="*", help="session names (default: all)")
+    parser.add_argument("--root", default=TRACKS_DIR)
+    parser.add_argument("--twd", type=float, help="true wind direction for all sessions (deg)")
+    parser.add_argument("--tws", type=float, help="true wind speed for all sessions (kn)")
+    parser.add_argument("--wind", help="CSV with session,twd,tws")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("-o", "--output", default="polar.csv")
+    parser.add_argument("--check", action="store_true", help="learn synthetic sessions back instead")
+    args = parser.parse_args()
+
+    if args.check:
+        err = check()
+        print(f"{'✅' if err <= CHECK_TOL else '❌'} synthetic polar: max speed error {err:.1%} (allowed {CHECK_TOL:.0%})")
+        raise SystemExit(err > CHECK_TOL)
+
+    names = args.sessions or list_sessions(args.root)
+    winds = session_winds(args.root, names, args.twd, args.tws, args.wind)
+    if not winds:
+        parser.error("no session has a wind; use --twd/--tws or --wind")
+    polar = learn(list(winds), winds, args.workers)
+    polar.save(args.output)
+    print(f"⛵ Polar from {len(winds)} sessions -> {args.output}")
+    print(polar.to_text())
+
+
+if __name__ == "__main__":
+    main()
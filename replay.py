@@ -0,0 +1,187 @@
+"""Replay recorded or synthetic tracks through the VMG/ETA pipeline.
+
+Two ways to run the same math the pages run on the phone, without a GPS:
+
+* ``FixPipeline`` — one fix at a time (Kalman filter, VMG/ETA, virtual tack,
+  pífano alarm), fed by ``play`` at real time or N× speed.
+* ``run_batch`` — a whole track at once, vectorized, as fast as the CPU goes.
+
+    python replay.py tracks/20261017-140200-3fa2c1 --wp 42.5521,-8.9403 --speed 10
+    python replay.py --synthetic 50 --minutes 90 --headless
+"""
+import argparse
+import time
+
+import numpy as np
+
+from alarm import TackAlarm
+from kalman import KalmanFilter, smooth
+from nav import KN_TO_MS, R_EARTH, angle_diff, bearing, evaluate, solve
+from track import read_track
+from wind import WindEstimator
+
+RUA_NORTE = (42.5521, -8.9403)
+OSTREIRA = (42.5946, -8.9134)
+
+
+def synthetic_track(start=RUA_NORTE, mark=OSTREIRA, minutes=60, twd=None, speed_kn=5.0,
+                    tack_angle=90.0, leg_s=240, noise_m=3.0, t0=None, seed=0):
+    """Windward-leeward laps between ``start`` and ``mark`` at 1 Hz, with GPS noise.
+
+    The wind blows from the mark (or from ``twd``). Upwind the boat sails
+    ``tack_angle / 2`` off the wind and tacks every ``leg_s`` seconds or at
+    the layline; downwind it runs straight to the start. Phones on the water
+    often give no speed or heading, so ``spd`` and ``hdg`` are NaN.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60)
+    t0 = time.time() if t0 is None else t0
+    twd = float(bearing(*start, *mark)) if twd is None else twd
+    coslat = np.cos(np.radians(start[0]))
+    mark_xy = (np.radians(mark[1] - start[1]) * R_EARTH * coslat, np.radians(mark[0] - start[0]) * R_EARTH)
+    targets = [mark_xy, (0.0, 0.0)]
+    lat, lon = np.empty(n), np.empty(n)
+    x, y = 0.0, 0.0  # meters east/north of start
+    side, leg, target = 1, 0, 0
+    for i in range(n):
+        tx, ty = targets[target]
+        brg = np.degrees(np.arctan2(tx - x, ty - y)) % 360
+        if np.hypot(tx - x, ty - y) < 30:
+            target = 1 - target  # rounded: head for the other end
+        if angle_diff(brg, twd) < tack_angle / 2:
+            leg += 1
+            h = (twd + side * tack_angle / 2) % 360
+            if leg >= leg_s or angle_diff(h, brg) > tack_angle:  # time to tack, or past the layline
+                side, leg = -side, 0
+        else:
+            h = brg
+        h = (h + rng.normal(0, 3)) % 360
+        v = speed_kn * KN_TO_MS * (1 + rng.normal(0, 0.03))
+        x += v * np.sin(np.radians(h))
+        y += v * np.cos(np.radians(h))
+        lat[i] = start[0] + np.degrees(y / R_EARTH)
+        lon[i] = start[1] + np.degrees(x / (R_EARTH * coslat))
+    lat += np.degrees(rng.normal(0, noise_m, n) / R_EARTH)
+    lon += np.degrees(rng.normal(0, noise_m, n) / (R_EARTH * coslat))
+    return {
+        "t": t0 + np.arange(n, dtype=float),
+        "lat": lat,
+        "lon": lon,
+        "acc": np.full(n, max(noise_m * 1.5, 3.0)),
+        "spd": np.full(n, np.nan),
+        "hdg": np.full(n, np.nan),
+    }
+
+
+class FixPipeline:
+    """Per-fix version of the page logic (pifano2.py), in Python.
+
+    Like the page, the virtual tack mirrors the heading about the estimated
+    wind once ``WindEstimator`` has one, and turns ``tack_angle`` before that.
+    """
+
+    def __init__(self, wp_lat, wp_lon, tack_angle=90.0, acc_threshold=20.0, alarm=None):
+        self.wp = (wp_lat, wp_lon)
+        self.tack_angle = tack_angle
+        self.acc_threshold = acc_threshold
+        self.kf = KalmanFilter()
+        self.alarm = alarm or TackAlarm()
+        self.wind = WindEstimator()
+
+    def update(self, t, lat, lon, acc):
+        """Returns the page's numbers for a fix, or ``None`` when it is dropped."""
+        if acc > self.acc_threshold:
+            return None
+        fix = self.kf.update(t, lat, lon, acc)
+        if fix is None:
+            return None
+        lat, lon, sog, cog = fix
+        return self.compute(t, lat, lon, sog, cog, self.wind.update(t, sog, cog))
+
+    def compute(self, t, lat, lon, sog, cog, twd):
+        """The page's numbers for a filtered fix, given the wind estimate ``twd`` (or ``None``)."""
+        r = evaluate(lat, lon, sog, cog, twd, [self.wp[0]], [self.wp[1]], self.tack_angle)
+        brg, dist, vmg, eta, virt, eta_v = (float(r[k][0]) for k in
+                                             ("bearing", "dist", "vmg", "eta", "virtual_course", "eta_virtual"))
+        return {
+            "t": t, "lat": lat, "lon": lon, "sog": sog, "cog": cog,
+            "bearing": brg, "dist": dist, "vmg": vmg, "eta": eta,
+            "virtual_course": virt, "eta_virtual": eta_v, "twd": twd,
+            "alarm": self.alarm.update(t, eta, eta_v),
+        }
+
+
+def play(track, speed=1.0):
+    """Yield fixes ``(t, lat, lon, acc)`` paced at ``speed`` × real time (0: no pacing)."""
+    t = track["t"]
+    wall0, t_first = time.perf_counter(), (t[0] if len(t) else 0.0)
+    for row in zip(t.tolist(), track["lat"].tolist(), track["lon"].tolist(), track["acc"].tolist()):
+        if speed:
+            delay = (row[0] - t_first) / speed - (time.perf_counter() - wall0)
+            if delay > 0:
+                time.sleep(delay)
+        yield row
+
+
+def run_batch(track, wp_lat, wp_lon, tack_angle=90.0, acc_threshold=20.0):
+    """Whole-track version of ``FixPipeline``; one row per accepted fix.
+
+    ``track`` may also be several tracks stacked as (n_tracks, n_fixes)
+    arrays; results then keep that shape with NaN for dropped fixes.
+    """
+    acc = np.where(track["acc"] > acc_threshold, np.nan, track["acc"])
+    lat = np.where(np.isnan(acc), np.nan, track["lat"])
+    f = smooth(track["t"], lat, track["lon"], acc)
+    shape = f["lat"].shape
+    res = solve(f["lat"].ravel(), f["lon"].ravel(), f["sog"].ravel(), f["cog"].ravel(),
+                [wp_lat], [wp_lon], tack_angle)
+    out = {k: v[:, 0].reshape(shape) for k, v in res.items()}
+    out.update({k: f[k] for k in ("lat", "lon", "sog", "cog")})
+    for k, v in out.items():
+        out[k] = np.where(f["ok"], v, np.nan)
+    out["t"] = np.asarray(track["t"], dtype=float)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay tracks without a GPS")
+    parser.add_argument("session", nargs="?", help="recorded session directory")
+    parser.add_argument("--synthetic", type=int, default=0, help="number of synthetic boats instead")
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--wp", default=f"{OSTREIRA[0]},{OSTREIRA[1]}", help="waypoint as LAT,LON")
+    parser.add_argument("--tack", type=float, default=90.0)
+    parser.add_argument("--speed", type=float, default=1.0, help="× real time (0: as fast as possible)")
+    parser.add_argument("--headless", action="store_true", help="vectorized batch, print a summary")
+    args = parser.parse_args()
+    wp_lat, wp_lon = (float(x) for x in args.wp.split(","))
+
+    if args.synthetic:
+        tracks = [synthetic_track(mark=(wp_lat, wp_lon), minutes=args.minutes, seed=i) for i in range(args.synthetic)]
+    elif args.session:
+        tracks = [read_track(args.session)]
+    else:
+        parser.error("give a session or --synthetic N")
+
+    if args.headless:
+        stacked = {k: np.stack([np.asarray(tr[k], dtype=float) for tr in tracks]) for k in tracks[0]}
+        t0 = time.perf_counter()
+        out = run_batch(stacked, wp_lat, wp_lon, args.tack)
+        elapsed = time.perf_counter() - t0
+        n = stacked["t"].size
+        print(f"⛵ {len(tracks)} tracks, {n} fixes in {elapsed:.2f} s ({n / elapsed:,.0f} fixes/s)")
+        print(f"   mean VMG {np.nanmean(out['vmg']):.2f} kn, final distance "
+              f"{np.nanmean(out['dist'][:, -1]):.0f} m")
+        return
+
+    pipe = FixPipeline(wp_lat, wp_lon, args.tack)
+    for fix in play(tracks[0], args.speed):
+        r = pipe.update(*fix)
+        if r is None:
+            continue
+        print(f"{time.strftime('%H:%M:%S', time.localtime(r['t']))} "
+              f"rumbo {r['cog']:5.0f}° | {r['sog']:4.1f} kn | al wp {r['bearing']:3.0f}° {r['dist']:6.0f} m | "
+              f"ETA {r['eta']:6.1f} min | virando {r['eta_virtual']:6.1f} min {'🎵' if r['alarm'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
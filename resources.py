@@ -0,0 +1,61 @@
+"""Process-wide resources shared by every Streamlit session.
+
+Each browser session reruns its page from the top, so whatever a page builds
+it builds again for every session and every rerun. What does not depend on
+the session lives here behind ``st.cache_resource``: one object per server
+process, shared by all sessions, which must treat it as read-only.
+
+* ``marks`` — the mark database with its grid index, reloaded when the file
+  changes;
+* ``waypoints`` — the page selector of an area (``marks.page_waypoints``),
+  one dict per area;
+* ``polar`` — a parsed polar per uploaded file content;
+* ``metrics`` — the latency telemetry of the process (telemetry.py).
+
+The tracker's static assets (``frontend/gps/core.js``, ``marks.json``) are
+written once per process when gps_component is imported. Heavy modules are
+imported only where they are used: pandas by the pages that chart with it,
+pydeck by bench.py. ``page_load.py`` measures what a session costs.
+"""
+import os
+
+import streamlit as st
+
+from marks import DEFAULT_AREA, MARKS_FILE, Marks
+from polar import Polar
+from telemetry import Metrics
+
+
+@st.cache_resource(show_spinner=False)
+def _marks(path, mtime):
+    return Marks.load(path)
+
+
+@st.cache_resource(show_spinner=False)
+def _waypoints(path, mtime, area):
+    marks = _marks(path, mtime)
+    return marks.as_dict(marks.in_area(area))
+
+
+def marks(path=MARKS_FILE):
+    """The shared ``Marks`` of ``path``."""
+    return _marks(path, os.path.getmtime(path))
+
+
+def waypoints(lat=None, lon=None, path=MARKS_FILE):
+    """Shared ``marks.page_waypoints``: the marks of the area of ``(lat, lon)``, or ``DEFAULT_AREA``."""
+    mtime = os.path.getmtime(path)
+    area = DEFAULT_AREA if lat is None or lon is None else _marks(path, mtime).area_of(lat, lon)
+    return _waypoints(path, mtime, area)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def polar(text):
+    """Shared ``Polar`` parsed from a polar file's text."""
+    return Polar.parse(text)
+
+
+@st.cache_resource(show_spinner=False)
+def metrics():
+    """Shared ``telemetry.Metrics``: stage timings of every session and the browsers' fix latencies."""
+    return Metrics()
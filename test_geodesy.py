@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from geodesy import RIA_DE_AROUSA, Haversine, LocalProjection, Vincenty, backend
+
+rng = np.random.default_rng(0)
+
+
+def bearing_error(a, b):
+    return np.abs((np.subtract(a, b) + 180) % 360 - 180)
+
+
+def pairs(origin, max_from_origin, max_leg, n=20000):
+    """Random legs up to ``max_leg`` meters starting within ``max_from_origin`` meters of ``origin``."""
+    def move(lat, lon, dist):
+        a = rng.uniform(0, 2 * np.pi, n)
+        return (lat + np.degrees(dist * np.cos(a) / 6371e3),
+                lon + np.degrees(dist * np.sin(a) / (6371e3 * np.cos(np.radians(lat)))))
+    lat1, lon1 = move(origin[0], origin[1], rng.uniform(0, max_from_origin, n))
+    lat2, lon2 = move(lat1, lon1, rng.uniform(10, max_leg, n))
+    return lat1, lon1, lat2, lon2
+
+
+def test_vincenty_reference():
+    # Flinders Peak -> Buninyong (Vincenty 1975, Geoscience Australia)
+    dms = lambda d, m, s: np.sign(d) * (abs(d) + m / 60 + s / 3600)
+    dist, brg = Vincenty().inverse(dms(-37, 57, 3.72030), dms(144, 25, 29.52440),
+                                   dms(-37, 39, 10.15610), dms(143, 55, 35.38390))
+    assert dist == pytest.approx(54972.271, abs=0.0005)
+    assert brg == pytest.approx(dms(306, 52, 5.37), abs=0.01 / 3600)
+
+
+def test_local_projection_within_bounds():
+    lat1, lon1, lat2, lon2 = pairs(RIA_DE_AROUSA, 100e3, 30e3)
+    dv, bv = Vincenty().inverse(lat1, lon1, lat2, lon2)
+    dl, bl = LocalProjection().inverse(lat1, lon1, lat2, lon2)
+    assert np.abs(dl - dv).max() < 0.05
+    assert bearing_error(bl, bv).max() < 0.005
+
+
+def test_haversine_within_bounds():
+    lat1, lon1, lat2, lon2 = pairs((0.0, 0.0), 8000e3, 3000e3)
+    dv, bv = Vincenty().inverse(lat1, lon1, lat2, lon2)
+    dh, bh = Haversine().inverse(lat1, lon1, lat2, lon2)
+    ok = (dv < 3000e3) & (np.abs(lat2) < 85)
+    assert (np.abs(dh - dv) / dv)[ok].max() < 0.0057  # 0.56 %, as rounded in the docstring
+    assert bearing_error(bh, bv)[ok].max() < 0.2
+
+
+def test_distance_and_bearing_agree_with_inverse():
+    lat1, lon1, lat2, lon2 = pairs(RIA_DE_AROUSA, 10e3, 5e3, n=100)
+    for name in ("local", "haversine", "vincenty"):
+        g = backend(name)
+        dist, brg = g.inverse(lat1, lon1, lat2, lon2)
+        assert np.allclose(g.distance(lat1, lon1, lat2, lon2), dist)
+        assert np.allclose(g.bearing(lat1, lon1, lat2, lon2), brg)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        backend("flat")
@@ -0,0 +1,39 @@
+import numpy as np
+
+from gps_component import accept_batch
+from track import COLUMNS
+
+
+def message(stream, batches):
+    """A component value with ``batches`` [[seq, n], ...] of fixes t = 1, 2, ..."""
+    n = sum(k for _, k in batches)
+    data = {name: [float(i) for i in range(1, n + 1)] for name in COLUMNS}
+    return {"stream": stream, "batches": batches, "enc": "json", "data": data}
+
+
+def test_new_batches():
+    fixes, ack = accept_batch(message("a", [[1, 2], [2, 3]]))
+    assert ack == ["a", 2]
+    assert np.array_equal(fixes["t"], [1, 2, 3, 4, 5])
+
+
+def test_resent_batches_are_dropped():
+    value = message("a", [[1, 2], [2, 3]])
+    fixes, ack = accept_batch(value, ["a", 1])
+    assert ack == ["a", 2]
+    assert np.array_equal(fixes["t"], [3, 4, 5])
+    assert accept_batch(value, ack) == (None, ["a", 2])
+
+
+def test_old_batch_does_not_move_the_ack_back():
+    fixes, ack = accept_batch(message("a", [[3, 2]]), ["a", 5])
+    assert fixes is None and ack == ["a", 5]
+
+
+def test_new_stream_starts_over():
+    fixes, ack = accept_batch(message("b", [[1, 2]]), ["a", 5])
+    assert ack == ["b", 1] and len(fixes["t"]) == 2
+
+
+def test_no_message():
+    assert accept_batch(None, ["a", 3]) == (None, ["a", 3])
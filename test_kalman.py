@@ -0,0 +1,40 @@
+import numpy as np
+
+from kalman import KalmanFilter, smooth
+from replay import synthetic_track
+
+
+def test_smooth_empty_track():
+    f = smooth([], [], [], [])
+    assert all(f[k].shape == (0,) for k in ("lat", "lon", "sog", "cog", "ok"))
+    assert f["ok"].dtype == bool
+    f = smooth(*(np.empty((3, 0)) for _ in range(4)))
+    assert all(v.shape == (3, 0) for v in f.values())
+
+
+def test_smooth_skips_nan_latitude_and_accuracy():
+    track = synthetic_track(minutes=10, seed=0, t0=0.0)
+    lat, acc = track["lat"].copy(), track["acc"].copy()
+    lat[100:110] = np.nan
+    acc[200:210] = np.nan
+    f = smooth(track["t"], lat, track["lon"], acc)
+    assert not f["ok"][100:110].any() and not f["ok"][200:210].any()
+    assert f["ok"][300:].all()
+    assert np.isfinite(f["lat"]).all() and np.isfinite(f["lon"]).all()
+
+
+def test_smooth_matches_streaming_filter():
+    track = synthetic_track(minutes=5, seed=1, t0=0.0)
+    f = smooth(track["t"], track["lat"], track["lon"], track["acc"])
+    kf = KalmanFilter()
+    rows = [kf.update(*row) for row in zip(*(track[k].tolist() for k in ("t", "lat", "lon", "acc")))]
+    assert np.allclose(f["lat"], [r[0] for r in rows]) and np.allclose(f["lon"], [r[1] for r in rows])
+    assert np.allclose(f["sog"], [r[2] for r in rows])
+
+
+def test_smooth_stacked_tracks_like_one_by_one():
+    tracks = [synthetic_track(minutes=3, seed=i, t0=0.0) for i in range(3)]
+    stacked = smooth(*(np.stack([tr[k] for tr in tracks]) for k in ("t", "lat", "lon", "acc")))
+    for i, tr in enumerate(tracks):
+        one = smooth(tr["t"], tr["lat"], tr["lon"], tr["acc"])
+        assert np.allclose(stacked["lat"][i], one["lat"]) and np.array_equal(stacked["ok"][i], one["ok"])
@@ -0,0 +1,17 @@
+import shutil
+
+import pytest
+
+from navcore import NavCore, parity, parity_fixes, parity_settings
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+@pytest.mark.parametrize("settings", parity_settings())
+def test_js_copy_gives_the_same_answers(settings):
+    assert parity(settings, parity_fixes()) == []
+
+
+def test_kinds():
+    core = NavCore(parity_settings()[0])
+    kinds = {core.update(*row)["kind"] for row in parity_fixes(minutes=10)}
+    assert kinds == {"fix", "acc", "jump"}
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from polar import Polar
+
+TWA = np.arange(30.0, 181.0, 5.0)
+TWS = np.array([6.0, 8.0, 10.0, 12.0])
+
+
+def sine_polar():
+    """Speed ∝ sin(TWA): upwind VMG ∝ sin(2·TWA), best at 45°."""
+    return Polar(TWA, TWS, 0.6 * np.sin(np.radians(TWA))[:, None] * TWS[None, :])
+
+
+def test_tack_angle():
+    p = sine_polar()
+    for tws in TWS:
+        assert p.tack_angle(tws) == pytest.approx(90.0, abs=1.0)
+    assert p.optimum(10)["beat_angle"] == pytest.approx(45.0, abs=0.5)
+
+
+def test_text_round_trip():
+    p = sine_polar()
+    q = Polar.parse(p.to_text())
+    assert np.allclose(q.tws, p.tws) and np.allclose(q.speed, p.speed, atol=0.005)
+    assert q.tack_angle(10) == p.tack_angle(10)
+
+
+def test_boat_speed_on_the_table():
+    p = sine_polar()
+    assert p.boat_speed(90, 10) == pytest.approx(6.0)
+    assert p.boat_speed(-90, 10) == pytest.approx(6.0)
+
+
+def test_tack_angle_without_wind():
+    p = sine_polar()
+    assert p.tack_angle(0) == p.tack_angle(0.5) == p.tack_angle(TWS[0] / 2) > 0
+    with_zero_row = Polar(TWA, np.concatenate([[0.0], TWS]), np.hstack([np.zeros((len(TWA), 1)), p.speed]))
+    assert with_zero_row.tack_angle(0) == pytest.approx(90.0, abs=1.0)
+    becalmed = Polar(TWA, TWS, np.zeros((len(TWA), len(TWS))))
+    assert becalmed.tack_angle(0) == becalmed.tack_angle(10) == 90.0
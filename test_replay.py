@@ -0,0 +1,32 @@
+import numpy as np
+
+from nav import angle_diff, bearing
+from replay import OSTREIRA, RUA_NORTE, FixPipeline, synthetic_track
+
+
+def run(track, pipe):
+    return [pipe.update(*row) for row in zip(*(track[k].tolist() for k in ("t", "lat", "lon", "acc")))]
+
+
+def test_fix_pipeline_finds_the_wind():
+    track = synthetic_track(minutes=60, seed=0, t0=0.0)
+    out = run(track, FixPipeline(*OSTREIRA))
+    assert all(r is not None for r in out)
+    twd = float(bearing(*RUA_NORTE, *OSTREIRA))  # synthetic_track's wind blows from the mark
+    found = [r for r in out if r["twd"] is not None]
+    assert found and found[0]["t"] < 600
+    assert max(float(angle_diff(r["twd"], twd)) for r in found) < 5.0
+
+
+def test_virtual_tack_mirrors_the_course_about_the_wind():
+    out = run(synthetic_track(minutes=30, seed=1, t0=0.0), FixPipeline(*OSTREIRA))
+    for r in out:
+        if r["twd"] is not None and np.isfinite(r["cog"]):
+            assert abs(float(angle_diff(r["virtual_course"], r["twd"])) - float(angle_diff(r["cog"], r["twd"]))) < 1e-6
+
+
+def test_inaccurate_fixes_are_dropped():
+    track = synthetic_track(minutes=2, seed=0, t0=0.0)
+    track["acc"][10:20] = 50.0
+    out = run(track, FixPipeline(*OSTREIRA))
+    assert all(r is None for r in out[10:20]) and out[20] is not None
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+
+from track import COLUMNS, TrackRecorder, column_path, read_track
+
+
+def rows(t):
+    return [[ti, 42.5, -8.9, 5.0, None, None] for ti in t]
+
+
+def test_fixes_not_after_the_last_are_dropped(tmp_path):
+    rec = TrackRecorder(str(tmp_path / "s"), capacity=16, flush_every=4)
+    rec.append(rows([1, 2, 3]))
+    rec.append(rows([2, 3, 4, 5]))
+    rec.append(rows([5]))
+    rec.flush()
+    assert len(rec) == 5
+    assert np.array_equal(read_track(rec.path)["t"], [1, 2, 3, 4, 5])
+
+
+def test_reopened_session_skips_resent_fixes(tmp_path):
+    path = str(tmp_path / "s")
+    rec = TrackRecorder(path, capacity=8, flush_every=8)
+    rec.append(rows(range(1, 11)))
+    rec.flush()
+    rec = TrackRecorder(path, capacity=8, flush_every=8)
+    assert len(rec) == 10
+    rec.append(rows(range(5, 13)))
+    rec.flush()
+    assert np.array_equal(read_track(path)["t"], np.arange(1, 13))
+
+
+def test_reopen_trims_a_partial_flush(tmp_path):
+    path = str(tmp_path / "s")
+    rec = TrackRecorder(path, capacity=8, flush_every=8)
+    rec.append(rows(range(1, 6)))
+    rec.flush()
+    # Crash mid-flush: t got two more fixes, lat half a float
+    with open(column_path(path, "t"), "ab") as f:
+        np.array([6.0, 7.0], dtype=COLUMNS["t"]).tofile(f)
+    with open(column_path(path, "lat"), "ab") as f:
+        f.write(b"\x00\x00")
+    rec = TrackRecorder(path, capacity=8, flush_every=8)
+    assert len(rec) == 5
+    rec.append(rows([6, 7]))
+    rec.flush()
+    sizes = {name: os.path.getsize(column_path(path, name)) // np.dtype(dt).itemsize for name, dt in COLUMNS.items()}
+    assert set(sizes.values()) == {7}
+    assert np.array_equal(read_track(path)["t"], np.arange(1, 8))
+
+
+def test_recent_wraps_the_ring(tmp_path):
+    rec = TrackRecorder(str(tmp_path / "s"), capacity=4, flush_every=2)
+    rec.append(rows(range(1, 8)))
+    assert np.array_equal(rec.recent()["t"], [4, 5, 6, 7])
+    assert np.array_equal(rec.recent(2)["t"], [6, 7])
@@ -0,0 +1,214 @@
+"""Track recording: in-memory ring buffer + columnar files on disk.
+
+A session is a directory with one raw little-endian file per column::
+
+    tracks/20261017-140200-3fa2c1/
+        meta.json   {"session": ..., "boat": ..., "columns": {...}}
+        t.f8        epoch seconds
+        lat.f4      degrees
+        lon.f4      degrees
+        acc.f4      meters
+        spd.f4      m/s (NaN when the phone gives none)
+        hdg.f4      degrees (NaN when the phone gives none)
+
+Files are append-only, so flushing is a plain write at the end of each file,
+and reading is ``np.fromfile`` (or ``np.memmap``) per column. At 28 bytes a
+fix, a full day at 1 Hz is about 2.4 MB per boat. float32 keeps positions to
+~0.4 m, well under the ACC_THRESHOLD the pages accept.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+
+# Column name -> dtype, in row order of a fix [t, lat, lon, acc, spd, hdg]
+COLUMNS = {
+    "t": "<f8",
+    "lat": "<f4",
+    "lon": "<f4",
+    "acc": "<f4",
+    "spd": "<f4",
+    "hdg": "<f4",
+}
+TRACKS_DIR = "tracks"
+
+
+def new_session_id(suffix=None):
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + (suffix or uuid.uuid4().hex[:6])
+
+
+def stream_session(root, stream):
+    """Session directory of a browser fix stream: the one it already has under ``root``, or a new one."""
+    stream = "".join(c for c in str(stream) if c.isalnum())[:16] or uuid.uuid4().hex[:6]
+    for name in list_sessions(root)[::-1]:
+        if name.endswith("-" + stream):
+            return os.path.join(root, name)
+    return os.path.join(root, new_session_id(stream))
+
+
+def column_path(path, name):
+    return os.path.join(path, f"{name}.{COLUMNS[name][1:]}")
+
+
+def as_columns(fixes):
+    """Normalize a batch of fixes to a dict of typed column arrays.
+
+    Accepts rows ``[[t, lat, lon, acc, spd, hdg], ...]`` (``None`` for a
+    missing value) or a dict of columns.
+    """
+    if isinstance(fixes, dict):
+        return {name: np.asarray(fixes[name], dtype=dt) for name, dt in COLUMNS.items()}
+    rows = np.array(fixes, dtype=float).reshape(-1, len(COLUMNS))  # None -> NaN
+    return {name: rows[:, i].astype(dt) for i, (name, dt) in enumerate(COLUMNS.items())}
+
+
+def decode_fixes(message):
+    """Columns of a fix batch as sent by the GPS component.
+
+    ``message["enc"]`` is ``"gzip"`` (base64 of gzipped columnar JSON) or
+    ``"json"`` (the columns themselves in ``message["data"]``).
+    """
+    data = message["data"]
+    if message["enc"] == "gzip":
+        data = json.loads(gzip.decompress(base64.b64decode(data)))
+    return as_columns(data)
+
+
+class TrackRecorder:
+    """Keeps the last ``capacity`` fixes in memory and appends them to disk.
+
+    Fixes are flushed once ``flush_every`` are pending, and always before the
+    ring would overwrite one that is not on disk yet. An existing session is
+    carried on: fixes no newer than its last one are skipped, so a batch that
+    is sent again (say, from the browser's offline buffer) is stored once.
+    """
+
+    def __init__(self, path, capacity=3600, flush_every=60, boat=None):
+        self.path = path
+        self.capacity = capacity
+        self.flush_every = min(flush_every, capacity)
+        self.buf = {name: np.empty(capacity, dtype=dt) for name, dt in COLUMNS.items()}
+        self.head = 0      # next slot to write
+        self.size = 0      # valid fixes in the ring
+        self.pending = 0   # fixes in the ring not yet on disk
+        self.count = 0     # fixes recorded in total
+        self.boat = boat
+        self.last_t = -np.inf
+        if os.path.exists(os.path.join(path, "meta.json")):
+            _trim_columns(path)
+            t = read_track(path, mmap=True)["t"]
+            self.count = len(t)
+            self.last_t = float(t[-1]) if len(t) else -np.inf
+
+    def __len__(self):
+        return self.count
+
+    def append(self, fixes):
+        cols = as_columns(fixes)
+        new = cols["t"] > self.last_t
+        if not new.all():
+            cols = {name: arr[new] for name, arr in cols.items()}
+        n = len(cols["t"])
+        if n:
+            self.last_t = max(self.last_t, float(cols["t"].max()))
+        start = 0
+        while start < n:
+            # Never let the ring lap unflushed data
+            room = min(self.capacity - self.pending, self.capacity - self.head)
+            k = min(room, n - start)
+            for name, arr in cols.items():
+                self.buf[name][self.head:self.head + k] = arr[start:start + k]
+            self.head = (self.head + k) % self.capacity
+            self.size = min(self.size + k, self.capacity)
+            self.pending += k
+            self.count += k
+            start += k
+            if self.pending >= self.flush_every:
+                self.flush()
+
+    def _last(self, n):
+        """Indexes of the last ``n`` fixes in the ring, oldest first, as slices."""
+        first = (self.head - n) % self.capacity
+        if first + n <= self.capacity:
+            return [slice(first, first + n)]
+        return [slice(first, self.capacity), slice(0, self.head)]
+
+    def flush(self):
+        if not self.pending:
+            return
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            # Created lazily so that page loads without fixes leave no empty sessions
+            os.makedirs(self.path, exist_ok=True)
+            with open(meta_path, "w") as f:
+                json.dump({"session": os.path.basename(self.path), "boat": self.boat, "columns": COLUMNS}, f)
+        parts = self._last(self.pending)
+        for name in COLUMNS:
+            with open(column_path(self.path, name), "ab") as f:
+                for s in parts:
+                    self.buf[name][s].tofile(f)
+        self.pending = 0
+
+    def recent(self, n=None):
+        """The last ``n`` fixes (default: all in the ring) as a dict of columns."""
+        n = self.size if n is None else min(n, self.size)
+        parts = self._last(n)
+        return {name: np.concatenate([col[s] for s in parts]) for name, col in self.buf.items()}
+
+
+def _trim_columns(path):
+    """Truncate every column file to the fixes they all hold.
+
+    A crash mid-flush can leave some columns longer than others; appending
+    after those tails would misalign the columns for good.
+    """
+    sizes = {}
+    for name, dt in COLUMNS.items():
+        fname = column_path(path, name)
+        sizes[name] = os.path.getsize(fname) if os.path.exists(fname) else 0
+    n = min(size // np.dtype(dt).itemsize for (name, dt), size in zip(COLUMNS.items(), sizes.values()))
+    for name, dt in COLUMNS.items():
+        if sizes[name] > n * np.dtype(dt).itemsize:
+            os.truncate(column_path(path, name), n * np.dtype(dt).itemsize)
+
+
+def read_track(path, mmap=False):
+    """Load a recorded session as a dict of column arrays.
+
+    With ``mmap=True`` the columns are read-only memory maps instead of copies.
+    """
+    track = {}
+    for name, dt in COLUMNS.items():
+        fname = column_path(path, name)
+        if not os.path.exists(fname) or os.path.getsize(fname) == 0:
+            track[name] = np.empty(0, dtype=dt)
+        elif mmap:
+            track[name] = np.memmap(fname, dtype=dt, mode="r")
+        else:
+            track[name] = np.fromfile(fname, dtype=dt)
+    # A crash mid-flush can leave columns of unequal length; trim to the shortest
+    n = min(len(col) for col in track.values())
+    return {name: col[:n] for name, col in track.items()}
+
+
+def session_digest(path):
+    """Hash of a session's column files, to key caches on its content."""
+    h = hashlib.blake2b(digest_size=16)
+    for name in COLUMNS:
+        fname = column_path(path, name)
+        if os.path.exists(fname):
+            with open(fname, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+    return h.hexdigest()
+
+
+def list_sessions(root=TRACKS_DIR):
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root) if os.path.exists(os.path.join(root, d, "meta.json")))
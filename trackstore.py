@@ -0,0 +1,166 @@
+"""Query recorded sessions by time range and area without loading them.
+
+Every column is opened as a read-only ``np.memmap``, so a query only touches
+the pages it needs and memory stays flat however many sessions are stored.
+
+Two indexes per session:
+
+* time — fixes are recorded in time order, so ``t.f8`` itself is the sorted
+  index and a time range is a ``searchsorted`` plus a zero-copy slice.
+* space — a coarse lat/lon grid over the Ría de Arousa (``AREA``). Fix numbers
+  are stored grouped by cell (``grid_order.i4``) with the offset of each cell
+  (``grid_starts.i8``); fixes outside the area share one overflow cell.
+  The grid files are rebuilt when the session has grown since indexing.
+"""
+import json
+import os
+
+import numpy as np
+
+from nav import distance
+from track import TRACKS_DIR, list_sessions, read_track
+
+# Ría de Arousa, with margin around the marks of the pages
+AREA = (42.45, 42.65, -9.05, -8.75)  # lat_min, lat_max, lon_min, lon_max
+CELL_DEG = 0.005                     # ~550 m N-S, ~410 m E-W
+
+N_ROWS = int(round((AREA[1] - AREA[0]) / CELL_DEG))
+N_COLS = int(round((AREA[3] - AREA[2]) / CELL_DEG))
+OUTSIDE = N_ROWS * N_COLS            # overflow cell id
+
+
+def grid_cells(lat, lon):
+    """Cell id of each position (``OUTSIDE`` when out of ``AREA``)."""
+    row = np.floor((np.asarray(lat, dtype=float) - AREA[0]) / CELL_DEG).astype(np.int64)
+    col = np.floor((np.asarray(lon, dtype=float) - AREA[2]) / CELL_DEG).astype(np.int64)
+    inside = (row >= 0) & (row < N_ROWS) & (col >= 0) & (col < N_COLS)
+    return np.where(inside, row * N_COLS + col, OUTSIDE)
+
+
+def bbox_cells(lat_min, lat_max, lon_min, lon_max):
+    """Cell ids overlapping a box, plus ``OUTSIDE`` when the box leaves ``AREA``."""
+    r0 = max(int(np.floor((lat_min - AREA[0]) / CELL_DEG)), 0)
+    r1 = min(int(np.floor((lat_max - AREA[0]) / CELL_DEG)), N_ROWS - 1)
+    c0 = max(int(np.floor((lon_min - AREA[2]) / CELL_DEG)), 0)
+    c1 = min(int(np.floor((lon_max - AREA[2]) / CELL_DEG)), N_COLS - 1)
+    cells = [r * N_COLS + c for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+    if lat_min < AREA[0] or lat_max >= AREA[1] or lon_min < AREA[2] or lon_max >= AREA[3]:
+        cells.append(OUTSIDE)
+    return cells
+
+
+def radius_bbox(lat, lon, radius_m):
+    dlat = np.degrees(radius_m / 6371000.0)
+    dlon = dlat / np.cos(np.radians(lat))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+class Session:
+    """Memory-mapped view of one recorded session with its indexes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.cols = read_track(path, mmap=True)
+        self.n = len(self.cols["t"])
+        self._order = None
+        self._starts = None
+
+    @property
+    def t_range(self):
+        t = self.cols["t"]
+        return (float(t[0]), float(t[-1])) if self.n else (np.inf, -np.inf)
+
+    def time_slice(self, t0=None, t1=None):
+        """Half-open fix range ``[i0, i1)`` with ``t0 <= t <= t1``."""
+        t = self.cols["t"]
+        i0 = 0 if t0 is None else int(np.searchsorted(t, t0, side="left"))
+        i1 = self.n if t1 is None else int(np.searchsorted(t, t1, side="right"))
+        return i0, max(i0, i1)
+
+    def _load_grid(self):
+        if self._order is not None:
+            return
+        info_path = os.path.join(self.path, "grid.json")
+        order_path = os.path.join(self.path, "grid_order.i4")
+        starts_path = os.path.join(self.path, "grid_starts.i8")
+        info = {}
+        if os.path.exists(info_path):
+            with open(info_path) as f:
+                info = json.load(f)
+        if info != {"n": self.n, "area": list(AREA), "cell_deg": CELL_DEG}:
+            cells = grid_cells(self.cols["lat"], self.cols["lon"])
+            order = np.argsort(cells, kind="stable").astype("<i4")  # time order kept within a cell
+            starts = np.searchsorted(cells[order], np.arange(OUTSIDE + 2)).astype("<i8")
+            order.tofile(order_path)
+            starts.tofile(starts_path)
+            with open(info_path, "w") as f:
+                json.dump({"n": self.n, "area": list(AREA), "cell_deg": CELL_DEG}, f)
+        self._order = np.memmap(order_path, dtype="<i4", mode="r") if self.n else np.empty(0, "<i4")
+        self._starts = np.memmap(starts_path, dtype="<i8", mode="r")
+
+    def bbox_indexes(self, lat_min, lat_max, lon_min, lon_max, i0=0, i1=None):
+        """Sorted fix numbers inside the box and inside ``[i0, i1)``."""
+        i1 = self.n if i1 is None else i1
+        if not self.n or i0 >= i1:
+            return np.empty(0, dtype=np.int64)
+        self._load_grid()
+        chunks = [self._order[self._starts[c]:self._starts[c + 1]] for c in bbox_cells(lat_min, lat_max, lon_min, lon_max)]
+        idx = np.concatenate(chunks).astype(np.int64) if chunks else np.empty(0, dtype=np.int64)
+        idx = idx[(idx >= i0) & (idx < i1)]
+        lat = self.cols["lat"][idx]
+        lon = self.cols["lon"][idx]
+        keep = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        return np.sort(idx[keep])
+
+
+class TrackStore:
+    """All sessions under ``root``, opened lazily and kept as memory maps."""
+
+    def __init__(self, root=TRACKS_DIR):
+        self.root = root
+        self._sessions = {}
+
+    def sessions(self):
+        return list_sessions(self.root)
+
+    def session(self, name):
+        s = self._sessions.get(name)
+        if s is None:
+            s = self._sessions[name] = Session(os.path.join(self.root, name))
+        return s
+
+    def refresh(self, name=None):
+        """Forget cached maps (of one session or all), e.g. after more fixes were flushed."""
+        if name is None:
+            self._sessions.clear()
+        else:
+            self._sessions.pop(name, None)
+
+    def query(self, t0=None, t1=None, bbox=None, sessions=None):
+        """Yield ``(session, columns)`` for every session with matching fixes.
+
+        With only a time range the columns are zero-copy slices of the memory
+        maps; with a ``bbox`` (lat_min, lat_max, lon_min, lon_max) they are
+        gathered copies of just the matching fixes.
+        """
+        for name in sessions or self.sessions():
+            s = self.session(name)
+            first, last = s.t_range
+            if (t0 is not None and last < t0) or (t1 is not None and first > t1):
+                continue
+            i0, i1 = s.time_slice(t0, t1)
+            if i0 == i1:
+                continue
+            if bbox is None:
+                yield name, {k: col[i0:i1] for k, col in s.cols.items()}
+                continue
+            idx = s.bbox_indexes(*bbox, i0=i0, i1=i1)
+            if len(idx):
+                yield name, {k: col[idx] for k, col in s.cols.items()}
+
+    def near(self, lat, lon, radius_m, t0=None, t1=None, sessions=None):
+        """Like ``query`` but for fixes within ``radius_m`` of a point."""
+        for name, cols in self.query(t0, t1, radius_bbox(lat, lon, radius_m), sessions):
+            keep = distance(lat, lon, cols["lat"], cols["lon"]) <= radius_m
+            if keep.any():
+                yield name, {k: col[keep] for k, col in cols.items()}
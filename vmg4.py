@@ -1,11 +1,15 @@
+from datetime import datetime
+
 import streamlit as st
-import streamlit.components.v1 as components
+
+from gps_component import record_fixes
 
 st.set_page_config(page_title="📡 Live GPS Tracker", layout="centered")
 
 st.title("📡 Live GPS Tracker")
 st.markdown("""
-This app reads your phone’s GPS every second.
+This app records your phone’s GPS every second and shows the last fix received
+(fixes arrive in batches, so it updates every few seconds).
 Tap **Start Tracking** to begin and **Stop Tracking** to end.
 """)
 
@@ -22,53 +26,23 @@ with col2:
     if st.button("⏹ Stop Tracking"):
         st.session_state.tracking = False
 
-# --- HTML + JavaScript for continuous GPS updates ---
+# --- Last fix, from the GPS component (one watch for display and recording) ---
 if st.session_state.tracking:
     st.success("✅ Tracking active — move around to see updates!")
-    html_code = """
-    <div id="output" style="font-size:16px; color:#222; margin-top:10px;"></div>
-    <script>
-    let watchID = null;
-
-    function startWatch() {
-      const output = document.getElementById("output");
-      if (navigator.geolocation) {
-        watchID = navigator.geolocation.watchPosition(
-          (pos) => {
-            const lat = pos.coords.latitude.toFixed(6);
-            const lon = pos.coords.longitude.toFixed(6);
-            const acc = pos.coords.accuracy.toFixed(1);
-            const time = new Date().toLocaleTimeString();
-            output.innerHTML = `<b>Time:</b> ${time}<br>
-                                <b>Latitude:</b> ${lat}<br>
-                                <b>Longitude:</b> ${lon}<br>
-                                <b>Accuracy:</b> ±${acc} m`;
-          },
-          (err) => {
-            output.innerHTML = "❌ Error: " + err.message;
-          },
-          { enableHighAccuracy: true, maximumAge: 1000, timeout: 5000 }
-        );
-      } else {
-        output.innerHTML = "Geolocation not supported.";
-      }
-    }
-
-    function stopWatch() {
-      if (watchID !== null) {
-        navigator.geolocation.clearWatch(watchID);
-        watchID = null;
-        document.getElementById("output").innerHTML = "<b>Tracking stopped.</b>";
-      }
-    }
-
-    // Auto-start watching on load
-    startWatch();
-
-    // Stop watching if user closes tab
-    window.onbeforeunload = stopWatch;
-    </script>
-    """
-    components.html(html_code, height=200)
+    recorder = record_fixes()  # batched like every other page: a rerun per batch, not per fix
+    last = recorder.recent(1)
+    if len(last["t"]):
+        time_s = datetime.fromtimestamp(float(last["t"][0])).strftime("%H:%M:%S")
+        st.markdown(f"""
+**Time:** {time_s}  
+**Latitude:** {last["lat"][0]:.6f}  
+**Longitude:** {last["lon"][0]:.6f}  
+**Accuracy:** ±{last["acc"][0]:.1f} m
+""")
+    else:
+        st.info("📡 Waiting for GPS signal...")
+    st.caption(f"📼 {len(recorder)} fixes recorded")
 else:
+    if "recorder" in st.session_state:
+        st.session_state.recorder.flush()
     st.warning("Tracking is stopped. Tap ▶️ **Start Tracking** to begin.")
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analysis import analyze
+from course import Course
+from replay import synthetic_track
+from resources import waypoints as area_waypoints
+from track import TRACKS_DIR, list_sessions, read_track, session_digest
+
+st.set_page_config(page_title="VMG Análisis", layout="centered")
+
+st.title("📊 Análisis")
+st.markdown("VMG segundo a segundo, tiempo en la virada mala, pérdidas por virada y distancia navegada de una sesión grabada.")
+
+# --- Waypoints ---
+waypoints = area_waypoints()
+
+# --- Source and course ---
+sessions = list_sessions()
+source = st.selectbox("Track", sessions[::-1] + ["Sintético"])
+wp_name = st.selectbox("Selecionar Waypoint", list(waypoints.keys()),
+                       index=list(waypoints).index("Ostreira") if "Ostreira" in waypoints else 0)
+route = st.sidebar.multiselect("Recorrido", list(waypoints.keys())) or [wp_name]
+tack_angle = st.sidebar.number_input("Ángulo de virada (sin viento estimado)", 60.0, 140.0, 90.0, 5.0)
+
+
+# --- Analysis, computed once per session content and course ---
+@st.cache_data(max_entries=16, show_spinner="Analizando…")
+def session_analysis(digest, route, marks, tack_angle, _source):
+    """``digest`` keys the cache on the session files; ``_source`` (not hashed) is where to read them."""
+    if _source is None:
+        track = synthetic_track(mark=marks[0], minutes=60, seed=0, t0=0.0)
+    else:
+        track = read_track(_source)
+    lat, lon = zip(*marks)
+    return analyze(track, Course(route, lat, lon), tack_angle)
+
+
+if source == "Sintético":
+    digest, path = "synthetic", None
+else:
+    path = f"{TRACKS_DIR}/{source}"
+    digest = session_digest(path)
+result = session_analysis(digest, route, [waypoints[n] for n in route], tack_angle, path)
+if result is None:
+    st.warning("La sesión no tiene fixes suficientes.")
+    st.stop()
+
+series, legs, tacks = result["series"], result["legs"], result["tacks"]
+sailing = series["leg"] >= 0
+done = [leg for leg in legs if leg["rounded"]] or legs  # an unfinished leg has no fair rhumb line
+sailed = sum(leg["sailed"] for leg in done)
+rhumb = sum(leg["rhumb"] for leg in done)
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Tiempo", f"{sailing.sum() / 60:.0f} min")
+c2.metric("VMG media", f"{np.nanmean(series['vmg']):.2f} kn")
+c3.metric("Virada mala", f"{series['wrong'].sum() / max(sailing.sum(), 1):.0%}")
+c4.metric("Navegado / directo", f"{sailed / rhumb:.2f}" if rhumb else "—")
+
+# --- Charts (switching only redraws: the analysis above is cached) ---
+chart = st.radio("Gráfico", ["VMG", "ETA", "Viradas", "Tramos"], horizontal=True)
+index = pd.to_datetime(series["t"], unit="s")
+if chart == "VMG":
+    vmg = pd.Series(series["vmg"], index=index)
+    st.line_chart(pd.DataFrame({"VMG": vmg, "VMG (1 min)": vmg.rolling(60, min_periods=10).mean()}))
+    st.caption("Nudos hacia la baliza del tramo, cada segundo.")
+elif chart == "ETA":
+    eta = pd.DataFrame({
+        "ETA actual": np.where(np.isfinite(series["eta"]), series["eta"], np.nan),
+        "ETA virando": np.where(np.isfinite(series["eta_virtual"]), series["eta_virtual"], np.nan),
+    }, index=index)
+    st.line_chart(eta)
+    st.caption(f"🎵 {series['wrong'].sum() / 60:.1f} min en la virada mala (virando se llegaba antes).")
+elif chart == "Viradas":
+    if not tacks:
+        st.info("No se detectaron viradas.")
+    else:
+        df = pd.DataFrame(tacks)
+        df["hora"] = pd.to_datetime(df["t"], unit="s").dt.strftime("%H:%M:%S")
+        df["tramo"] = [legs[k]["mark"] for k in df["leg"]]
+        st.bar_chart(df.set_index("hora")["lost"], y_label="metros perdidos")
+        st.caption(f"{len(df)} viradas · {df['lost'].mean():.1f} m perdidos de media · "
+                   f"{df['seconds'].mean():.0f} s por virada")
+        st.dataframe(df[["hora", "tramo", "seconds", "lost"]].rename(
+            columns={"seconds": "duración (s)", "lost": "perdido (m)"}), hide_index=True)
+else:
+    df = pd.DataFrame(legs)
+    df["minutos"] = df["seconds"] / 60
+    df["navegado / directo"] = df["sailed"] / df["rhumb"].where(df["rhumb"] > 0)
+    df["virada mala (min)"] = df["wrong_s"] / 60
+    st.dataframe(df[["mark", "rounded", "minutos", "vmg", "virada mala (min)", "tacks", "lost", "sailed", "rhumb",
+                     "navegado / directo"]].rename(columns={
+        "mark": "baliza", "rounded": "rodeada", "vmg": "VMG (kn)", "tacks": "viradas", "lost": "perdido (m)",
+        "sailed": "navegado (m)", "rhumb": "directo (m)"}), hide_index=True)
@@ -0,0 +1,51 @@
+import numpy as np
+import streamlit as st
+
+from fleetmap import fleet_map
+from resources import waypoints as area_waypoints
+from simplify import lod_track
+from track import TRACKS_DIR
+from trackstore import TrackStore
+
+st.set_page_config(page_title="VMG Flota", layout="wide")
+st.title("🗺️ Flota")
+st.markdown("Tracks grabados y última posición de cada barco. Sin conexión se dibuja sin mapa base.")
+
+# --- Sessions (memory maps, opened once per browser session) ---
+if "store" not in st.session_state:
+    st.session_state.store = TrackStore(TRACKS_DIR)
+store = st.session_state.store
+sessions = store.sessions()
+chosen = st.multiselect("Sesiones", sessions, default=sessions[-10:])
+tiles = st.sidebar.text_input("Teselas (URL {z}/{x}/{y}, opcional)", "") or None
+live = st.sidebar.toggle("En directo", value=False)
+# Longer sessions are drawn from their downsampled levels (simplify.py)
+max_points = st.sidebar.number_input("Puntos por track", 1000, 1_000_000, 50_000, step=10_000)
+
+
+@st.fragment(run_every=5 if live else None)
+def fleet():
+    if live:
+        store.refresh()  # pick up the fixes flushed since the last run
+    tracks, names, lat, lon, cog = {}, [], [], [], []
+    for name in chosen:
+        cols = store.session(name).cols
+        if not len(cols["t"]):
+            continue
+        seconds, lod = lod_track(store.session(name).path, max_points)
+        tracks[f"{name}@{seconds}" if seconds else name] = lod
+        names.append(name.rsplit("-", 1)[-1])
+        lat.append(cols["lat"][-1])
+        lon.append(cols["lon"][-1])
+        cog.append(cols["hdg"][-1])
+    fleet_map(
+        tracks=tracks,
+        boats={"name": names, "lat": np.array(lat), "lon": np.array(lon), "cog": np.array(cog)},
+        marks=area_waypoints(),
+        tiles=tiles,
+        height=600,
+    )
+    st.caption(f"{len(tracks)} tracks · {sum(len(c['t']) for c in tracks.values()):,} puntos")
+
+
+fleet()
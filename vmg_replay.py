@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from nav import angle_diff
+from replay import FixPipeline, play, run_batch, synthetic_track
+from resources import waypoints as area_waypoints
+from track import TRACKS_DIR, list_sessions, read_track
+
+st.set_page_config(page_title="VMG Replay", layout="centered")
+
+st.title("⏯️ VMG Replay")
+st.markdown("Reproduce una sesión grabada (o una regata sintética) con los mismos cálculos que FANPI/PÍFANO, sin GPS.")
+
+# --- Waypoints ---
+waypoints = area_waypoints()
+
+# --- Source ---
+sessions = list_sessions()
+source = st.selectbox("Track", ["Sintético"] + sessions)
+wp_name = st.selectbox("Selecionar Waypoint", list(waypoints.keys()),
+                       index=list(waypoints).index("Ostreira") if "Ostreira" in waypoints else 0)
+wp_lat, wp_lon = waypoints[wp_name]
+speed = st.select_slider("Velocidad", options=[1, 2, 5, 10, 30, 60, 0], value=10,
+                         format_func=lambda x: f"{x}×" if x else "máxima")
+
+if source == "Sintético":
+    track = synthetic_track(mark=(wp_lat, wp_lon), minutes=60, seed=0)
+else:
+    track = read_track(f"{TRACKS_DIR}/{source}")
+
+# --- Whole track at once ---
+batch = run_batch(track, wp_lat, wp_lon)
+ok = np.isfinite(batch["lat"])
+st.caption(f"{ok.sum()} fixes · VMG media {np.nanmean(batch['vmg']):.2f} kn")
+chart = pd.DataFrame({
+    "ETA actual": np.where(np.isfinite(batch["eta"]), batch["eta"], np.nan),
+    "ETA virando": np.where(np.isfinite(batch["eta_virtual"]), batch["eta_virtual"], np.nan),
+}, index=pd.to_datetime(batch["t"], unit="s"))
+st.line_chart(chart[ok])
+
+# --- Fix by fix, as on the phone ---
+if st.button("▶️ Reproducir"):
+    output = st.empty()
+    progress = st.progress(0.0)
+    pipe = FixPipeline(wp_lat, wp_lon)
+    n = len(track["t"])
+    for i, fix in enumerate(play(track, speed)):
+        r = pipe.update(*fix)
+        if r is None:
+            continue
+        hdg = "—" if np.isnan(r["cog"]) else f"{r['cog']:.0f}"
+        eta = f"{r['eta']:.1f}" if np.isfinite(r["eta"]) else "∞"
+        eta_virtual = f"{r['eta_virtual']:.1f}" if np.isfinite(r["eta_virtual"]) else "∞"
+        # The turn the virtual tack takes: mirrored about the wind once there is one
+        tack = pipe.tack_angle if r["twd"] is None or np.isnan(r["cog"]) else float(angle_diff(r["cog"], r["virtual_course"]))
+        output.markdown(
+            f"**{time.strftime('%H:%M:%S', time.localtime(r['t']))}** {'🎵' if r['alarm'] else ''}  \n"
+            f"Rumbo Real: {hdg}° | Velocidad: {r['sog']:.1f} kn  \n"
+            f"Rumbo al waypoint: {r['bearing']:.0f}° | Tiempo al waypoint: {eta} min  \n"
+            f"Rumbo si viramos {tack:.0f} grados: {r['virtual_course']:.0f}° | "
+            f"Tiempo al waypoint con el nuevo rumbo: {eta_virtual} min"
+        )
+        progress.progress((i + 1) / n)
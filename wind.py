@@ -0,0 +1,165 @@
+"""True wind direction from the boat's own tacks and gybes.
+
+The pages only know the course over ground. Sailing close-hauled, the two
+tacks lie symmetric about the wind, so the bisector of the headings before
+and after a tack points into the wind (and, after a gybe, away from it).
+``WindEstimator`` watches the smoothed COG stream:
+
+* a *steady leg* is at least ``MIN_LEG`` seconds within ``STEADY_DEG`` of
+  its own mean heading;
+* a *maneuver* is two steady legs at most ``MAX_TURN_S`` seconds apart
+  whose headings differ by ``MIN_TURN``–``MAX_TURN`` degrees;
+* it is a tack when the bisector is on the side of the current estimate,
+  or, with no estimate yet, when the boat slowed below ``TACK_SLOWDOWN`` of
+  its leg speed or turned more than ``GYBE_MAX_TURN`` degrees;
+* once there is an estimate, a turn whose bisector is more than
+  ``MAX_SHIFT`` degrees off the wind axis is a course change (bearing away
+  at a mark, say), not a maneuver, and is ignored.
+
+The estimate is the circular mean of the maneuvers of the last ``WINDOW``
+seconds (at most ``MAX_EVENTS``; the latest one is kept however old, so a
+long run without maneuvers keeps the last estimate), so memory stays
+bounded. With it, the
+virtual tack is the heading mirrored about the wind (``nav.tack_course``)
+instead of a fixed 90° turn.
+"""
+from collections import deque
+
+import numpy as np
+
+from nav import angle_diff
+
+STEADY_DEG = 25.0     # max deviation from the leg's mean heading (COG is noisy)
+MIN_LEG = 20.0        # seconds
+MAX_TURN_S = 45.0     # seconds between two legs for them to be one maneuver
+MIN_TURN = 50.0       # degrees
+MAX_TURN = 120.0      # degrees (bearing away at a mark is wider)
+GYBE_MAX_TURN = 80.0  # without an estimate, a wider turn is a tack
+TACK_SLOWDOWN = 0.8   # without an estimate, a slower turn is a tack
+MAX_SHIFT = 30.0      # degrees between a maneuver's bisector and the wind axis
+WINDOW = 900.0        # seconds
+MAX_EVENTS = 32
+
+
+def circular_mean(deg):
+    r = np.radians(deg)
+    return float(np.degrees(np.arctan2(np.sin(r).sum(), np.cos(r).sum())) % 360)
+
+
+class WindEstimator:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.events = deque(maxlen=MAX_EVENTS)  # (t, twd, turn, is_tack)
+        self.seg = None    # current leg: t0, t1, sin, cos, sog sum, n, checked
+        self.prev = None   # last steady leg: (heading, t_end, mean sog)
+        self.turn_min = np.inf
+
+    @property
+    def twd(self):
+        """Estimated true wind direction (degrees), or ``None``."""
+        return circular_mean([e[1] for e in self.events]) if self.events else None
+
+    @property
+    def tack_angle(self):
+        """Mean tack angle seen in the window, or ``None``."""
+        turns = [e[2] for e in self.events if e[3]]
+        return float(np.mean(turns)) if turns else None
+
+    def _heading(self, seg):
+        return float(np.degrees(np.arctan2(seg["sin"], seg["cos"])) % 360)
+
+    def update(self, t, sog, cog):
+        """Feed one smoothed fix (SOG in knots, COG NaN when unknown); returns ``twd``."""
+        while len(self.events) > 1 and t - self.events[0][0] > self.window:
+            self.events.popleft()
+        if cog is None or not np.isfinite(cog):
+            return self.twd
+        seg = self.seg
+        if seg is not None and angle_diff(cog, self._heading(seg)) <= STEADY_DEG:
+            seg["t1"] = t
+            seg["sin"] += np.sin(np.radians(cog))
+            seg["cos"] += np.cos(np.radians(cog))
+            seg["sog"] += sog
+            seg["n"] += 1
+        else:
+            if seg is not None and seg["t1"] - seg["t0"] >= MIN_LEG:
+                self.prev = (self._heading(seg), seg["t1"], seg["sog"] / seg["n"])
+                self.turn_min = np.inf
+            seg = self.seg = {"t0": t, "t1": t, "sin": np.sin(np.radians(cog)),
+                              "cos": np.cos(np.radians(cog)), "sog": sog, "n": 1, "checked": False}
+        self.turn_min = min(self.turn_min, sog)
+
+        if not seg["checked"] and seg["t1"] - seg["t0"] >= MIN_LEG:
+            seg["checked"] = True
+            if self.prev is not None and seg["t0"] - self.prev[1] <= MAX_TURN_S:
+                self._maneuver(t, self.prev, (self._heading(seg), seg["t1"], seg["sog"] / seg["n"]))
+        return self.twd
+
+    def _maneuver(self, t, before, after):
+        turn = float(angle_diff(before[0], after[0]))
+        if not MIN_TURN <= turn <= MAX_TURN:
+            return
+        bisector = circular_mean([before[0], after[0]])
+        twd = self.twd
+        if twd is not None:
+            tack = angle_diff(bisector, twd) < 90
+            if angle_diff(bisector, twd if tack else (twd + 180) % 360) > MAX_SHIFT:
+                return
+        else:
+            leg_sog = (before[2] + after[2]) / 2
+            tack = self.turn_min < TACK_SLOWDOWN * leg_sog or turn > GYBE_MAX_TURN
+        self.events.append((t, bisector if tack else (bisector + 180) % 360, turn, tack))
+
+
+# --- Browser copy (served as frontend/gps/core.js) ---
+WIND_JS = f"""
+// True wind from tacks and gybes (same as wind.py)
+function circularMean(degs) {{
+  let s = 0, c = 0;
+  for (const d of degs) {{ s += Math.sin(d * Math.PI / 180); c += Math.cos(d * Math.PI / 180); }}
+  return (Math.atan2(s, c) * 180 / Math.PI + 360) % 360;
+}}
+
+class WindEstimator {{
+  constructor(windowS = {WINDOW}) {{
+    this.windowS = windowS; this.events = []; this.seg = null; this.prev = null; this.turnMin = Infinity;
+  }}
+  get twd() {{ return this.events.length ? circularMean(this.events.map((e) => e[1])) : null; }}
+  heading(seg) {{ return (Math.atan2(seg.sin, seg.cos) * 180 / Math.PI + 360) % 360; }}
+  // t in seconds, sog in knots, cog null when unknown; returns the wind direction or null
+  update(t, sog, cog) {{
+    while (this.events.length > 1 && t - this.events[0][0] > this.windowS) this.events.shift();
+    if (cog === null || !isFinite(cog)) return this.twd;
+    const D = Math.PI / 180;
+    let seg = this.seg;
+    if (seg !== null && angleDiff(cog, this.heading(seg)) <= {STEADY_DEG}) {{
+      seg.t1 = t; seg.sin += Math.sin(cog * D); seg.cos += Math.cos(cog * D); seg.sog += sog; seg.n += 1;
+    }} else {{
+      if (seg !== null && seg.t1 - seg.t0 >= {MIN_LEG}) {{
+        this.prev = [this.heading(seg), seg.t1, seg.sog / seg.n];
+        this.turnMin = Infinity;
+      }}
+      seg = this.seg = {{ t0: t, t1: t, sin: Math.sin(cog * D), cos: Math.cos(cog * D), sog: sog, n: 1, checked: false }};
+    }}
+    this.turnMin = Math.min(this.turnMin, sog);
+    if (!seg.checked && seg.t1 - seg.t0 >= {MIN_LEG}) {{
+      seg.checked = true;
+      if (this.prev !== null && seg.t0 - this.prev[1] <= {MAX_TURN_S}) {{
+        this.maneuver(t, this.prev, [this.heading(seg), seg.t1, seg.sog / seg.n]);
+      }}
+    }}
+    return this.twd;
+  }}
+  maneuver(t, before, after) {{
+    const turn = angleDiff(before[0], after[0]);
+    if (turn < {MIN_TURN} || turn > {MAX_TURN}) return;
+    const bisector = circularMean([before[0], after[0]]);
+    const twd = this.twd;
+    const tack = twd !== null ? angleDiff(bisector, twd) < 90
+      : this.turnMin < {TACK_SLOWDOWN} * (before[2] + after[2]) / 2 || turn > {GYBE_MAX_TURN};
+    if (twd !== null && angleDiff(bisector, tack ? twd : (twd + 180) % 360) > {MAX_SHIFT}) return;
+    this.events.push([t, tack ? bisector : (bisector + 180) % 360, turn, tack]);
+    if (this.events.length > {MAX_EVENTS}) this.events.shift();
+  }}
+}}
+"""